@@ -2,12 +2,20 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from re import split as re_split
+from re import UNICODE, compile as re_compile, split as re_split
 from sqlite3 import Row, connect
 from typing import Any, Dict
 
 from flask import Blueprint, jsonify, request
 
+from .vector_search import (
+    CORPUS_SOURCES,
+    connect_readonly,
+    encode_query,
+    get_vector_index,
+    vector_search_available,
+)
+
 mizane_bp = Blueprint("mizane", __name__)
 
 ROOT = Path(__file__).resolve().parents[3]
@@ -25,13 +33,16 @@ def get_connection():
 
 
 def serialize_document(row: Row) -> Dict[str, Any]:
-    metadata = row.get("extra_metadata")
+    metadata = row["extra_metadata"] if "extra_metadata" in row.keys() else None
     parsed_metadata = metadata
     if isinstance(metadata, str):
         try:
             parsed_metadata = json.loads(metadata)
         except json.JSONDecodeError:
             parsed_metadata = metadata
+    # Les vecteurs vivent dans document_embeddings : on n'expose que le résumé.
+    if isinstance(parsed_metadata, dict) and isinstance(parsed_metadata.get("embedding"), dict):
+        parsed_metadata["embedding"].pop("vector", None)
     return {
         "id": row["id"],
         "publication_date": row["publication_date"],
@@ -50,15 +61,30 @@ def _split_keywords(param: str) -> list[str]:
     return [token.strip() for token in re_split(r"[,;]+", raw) if token.strip()]
 
 
-@mizane_bp.route("/documents", methods=["GET"])
-def list_documents():
-    page = max(1, int(request.args.get("page", 1)))
-    limit = min(100, int(request.args.get("limit", DEFAULT_LIMIT)))
-    offset = (page - 1) * limit
-    corpus = request.args.get("corpus", "joradp")
+# Projection indexée maintenue par le moissonneur (BB/backend/shared/document_projection.py)
+PROJECTION_TABLE = "documents_search_projection"
+PROJECTION_FTS_TABLE = "documents_search_fts"
+FTS_TOKEN_PATTERN = re_compile(r"\w+", UNICODE)
 
-    where = []
-    params: list[Any] = []
+
+def _projection_available(conn) -> bool:
+    row = conn.execute(
+        "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN (?, ?)",
+        (PROJECTION_TABLE, PROJECTION_FTS_TABLE),
+    ).fetchone()
+    return row[0] == 2
+
+
+def _fts_expression(value: str) -> str | None:
+    """Tous les mots de `value`, en préfixe, au format FTS5."""
+    tokens = FTS_TOKEN_PATTERN.findall(value.lower())
+    if not tokens:
+        return None
+    return " AND ".join(f'"{token}"*' for token in tokens)
+
+
+def _legacy_document_filters(where: list[str], params: list[Any]) -> None:
+    """Filtres `LIKE` sur le JSON brut, si la projection n'existe pas encore."""
     if request.args.get("year"):
         where.append("strftime('%Y', publication_date) = ?")
         params.append(request.args["year"])
@@ -67,12 +93,6 @@ def list_documents():
         pattern = f"%{search}%"
         where.append("(url LIKE ? OR extra_metadata LIKE ?)")
         params.extend([pattern, pattern])
-    if request.args.get("from"):
-        where.append("publication_date >= ?")
-        params.append(request.args["from"])
-    if request.args.get("to"):
-        where.append("publication_date <= ?")
-        params.append(request.args["to"])
     document_number = (request.args.get("document_number") or "").strip()
     if document_number:
         pattern = f"%{document_number}%"
@@ -99,10 +119,75 @@ def list_documents():
         where.append("(url NOT LIKE ? AND extra_metadata NOT LIKE ?)")
         params.extend([pattern, pattern])
 
-    where_clause = f"WHERE {' AND '.join(where)}" if where else ""
-    order_by = "ORDER BY publication_date DESC"
+
+def _projection_document_filters(where: list[str], params: list[Any]) -> None:
+    """Mêmes filtres, compilés en prédicats indexés (projection + FTS5)."""
+    fts_in = f"id IN (SELECT rowid FROM {PROJECTION_FTS_TABLE} WHERE {PROJECTION_FTS_TABLE} MATCH ?)"
+    fts_not_in = f"id NOT IN (SELECT rowid FROM {PROJECTION_FTS_TABLE} WHERE {PROJECTION_FTS_TABLE} MATCH ?)"
+    projection_in = f"id IN (SELECT document_id FROM {PROJECTION_TABLE} WHERE {{}})"
+
+    year = (request.args.get("year") or "").strip()
+    if year:
+        where.append(projection_in.format("publication_year = ?"))
+        params.append(int(year) if year.isdigit() else -1)
+
+    document_number = (request.args.get("document_number") or "").strip()
+    if document_number.isdigit() and len(document_number) in (1, 2, 3, 4, 7):
+        # Numéro (« 12 »), année (« 2024 ») ou identifiant complet (« 2024012 »)
+        if len(document_number) == 4:
+            where.append(projection_in.format("issue_year = ?"))
+            params.append(int(document_number))
+        elif len(document_number) == 7:
+            where.append(projection_in.format("issue_year = ? AND issue_number = ?"))
+            params.extend([int(document_number[:4]), document_number[4:]])
+        else:
+            where.append(projection_in.format("issue_number = ?"))
+            params.append(document_number.zfill(3))
+    elif document_number:
+        expression = _fts_expression(document_number)
+        if expression:
+            where.append(fts_in)
+            params.append(expression)
+
+    for keyword in [request.args.get("search") or "", *_split_keywords("keywords_and")]:
+        expression = _fts_expression(keyword)
+        if expression:
+            where.append(fts_in)
+            params.append(expression)
+    or_expressions = [expr for expr in map(_fts_expression, _split_keywords("keywords_or")) if expr]
+    if or_expressions:
+        where.append(fts_in)
+        params.append(" OR ".join(f"({expr})" for expr in or_expressions))
+    not_expressions = [expr for expr in map(_fts_expression, _split_keywords("keywords_not")) if expr]
+    if not_expressions:
+        where.append(fts_not_in)
+        params.append(" OR ".join(f"({expr})" for expr in not_expressions))
+
+
+@mizane_bp.route("/documents", methods=["GET"])
+def list_documents():
+    page = max(1, int(request.args.get("page", 1)))
+    limit = min(100, int(request.args.get("limit", DEFAULT_LIMIT)))
+    offset = (page - 1) * limit
+    corpus = request.args.get("corpus", "joradp")
 
     with get_connection() as conn:
+        where = []
+        params: list[Any] = []
+        if _projection_available(conn):
+            _projection_document_filters(where, params)
+        else:
+            _legacy_document_filters(where, params)
+        if request.args.get("from"):
+            where.append("publication_date >= ?")
+            params.append(request.args["from"])
+        if request.args.get("to"):
+            where.append("publication_date <= ?")
+            params.append(request.args["to"])
+
+        where_clause = f"WHERE {' AND '.join(where)}" if where else ""
+        order_by = "ORDER BY publication_date DESC, id DESC"
+
         total_stmt = f"SELECT COUNT(*) AS total FROM documents {where_clause}"
         total = conn.execute(total_stmt, params).fetchone()["total"]
         stmt = (
@@ -124,6 +209,87 @@ def statistics():
     return jsonify(total=row["total"] or 0, last_updated=row["last_updated"])
 
 
+SEMANTIC_LIMIT = 10
+MAX_SEMANTIC_LIMIT = 50
+# Les dates de décision sont stockées en JJ-MM-AAAA : comparaison sur la forme AAAA-MM-JJ
+DECISION_DATE_ISO = (
+    "CASE WHEN length(decision_date)=10 AND substr(decision_date,3,1)='-' AND substr(decision_date,6,1)='-' "
+    "THEN substr(decision_date,7,4)||'-'||substr(decision_date,4,2)||'-'||substr(decision_date,1,2) "
+    "ELSE decision_date END"
+)
+
+
+def _decision_date_column(conn) -> str:
+    """Colonne indexée `decision_date_iso` si la base BB l'a déjà, sinon l'expression."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(supreme_court_decisions)").fetchall()}
+    return "decision_date_iso" if "decision_date_iso" in columns else DECISION_DATE_ISO
+
+
+def _document_year_predicate(conn) -> str:
+    """Filtre d'année JORADP sur une colonne indexée (projection, puis `jo_year`)."""
+    if _projection_available(conn):
+        return f"id IN (SELECT document_id FROM {PROJECTION_TABLE} WHERE publication_year = ?)"
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(documents)").fetchall()}
+    if "jo_year" in columns:
+        return "jo_year = ?"
+    return "CAST(strftime('%Y', publication_date) AS INTEGER) = ?"
+
+
+def _semantic_filter_ids(conn, corpus: str, filters: Dict[str, Any]) -> set | None:
+    """Ids autorisés par les filtres du formulaire (None si aucun filtre)."""
+    where = []
+    params: list[Any] = []
+    if corpus == "joradp":
+        table, date_column = "documents", "publication_date"
+        if filters.get("year"):
+            where.append(_document_year_predicate(conn))
+            year = str(filters["year"]).strip()
+            params.append(int(year) if year.isdigit() else -1)
+    else:
+        table, date_column = "supreme_court_decisions", _decision_date_column(conn)
+    if filters.get("from"):
+        where.append(f"{date_column} >= ?")
+        params.append(filters["from"])
+    if filters.get("to"):
+        where.append(f"{date_column} <= ?")
+        params.append(filters["to"])
+    if not where:
+        return None
+    rows = conn.execute(f"SELECT id FROM {table} WHERE {' AND '.join(where)}", params).fetchall()
+    return {row[0] for row in rows}
+
+
+def _like_semantic_fallback(conn, query: str, limit: int):
+    pattern = f"%{query}%"
+    return conn.execute(
+        "SELECT id, publication_date, url, file_path, metadata_collected_at, extra_metadata, text_path "
+        "FROM documents WHERE url LIKE ? OR extra_metadata LIKE ? ORDER BY publication_date DESC LIMIT ?",
+        (pattern, pattern, limit),
+    ).fetchall()
+
+
+def _fetch_ranked(conn, corpus: str, ranked: list[tuple[int, float]]) -> list[Dict[str, Any]]:
+    if not ranked:
+        return []
+    ids = [item_id for item_id, _ in ranked]
+    placeholders = ",".join("?" * len(ids))
+    if corpus == "joradp":
+        rows = conn.execute(
+            "SELECT id, publication_date, url, file_path, metadata_collected_at, extra_metadata, text_path "
+            f"FROM documents WHERE id IN ({placeholders})",
+            ids,
+        ).fetchall()
+        by_id = {row["id"]: serialize_document(row) for row in rows}
+    else:
+        rows = conn.execute(
+            "SELECT id, decision_number, decision_date, object_ar, object_fr, summary_ar, summary_fr "
+            f"FROM supreme_court_decisions WHERE id IN ({placeholders})",
+            ids,
+        ).fetchall()
+        by_id = {row["id"]: dict(row) for row in rows}
+    return [{**by_id[item_id], "score": round(score, 4)} for item_id, score in ranked if item_id in by_id]
+
+
 @mizane_bp.route("/semantic-search", methods=["POST"])
 def semantic_search():
     payload = request.get_json(silent=True) or {}
@@ -131,13 +297,35 @@ def semantic_search():
     if not query:
         return jsonify({"query": query, "results": [], "message": "Saisissez une question."})
 
-    pattern = f"%{query}%"
-    with get_connection() as conn:
-        rows = conn.execute(
-            "SELECT id, publication_date, url, file_path, metadata_collected_at, extra_metadata, text_path "
-            "FROM documents WHERE url LIKE ? OR extra_metadata LIKE ? ORDER BY publication_date DESC LIMIT 5",
-            (pattern, pattern),
-        ).fetchall()
-    results = [serialize_document(row) for row in rows]
-    message = f"{len(results)} documents potentiellement associés à votre requête."
-    return jsonify(query=query, results=results, message=message)
+    corpus = payload.get("corpus") if payload.get("corpus") in CORPUS_SOURCES else "joradp"
+    filters = payload.get("filters") if isinstance(payload.get("filters"), dict) else {}
+    language = payload.get("language_scope") if payload.get("language_scope") in ("ar", "fr", "both") else "both"
+    try:
+        limit = max(1, min(int(payload.get("limit", SEMANTIC_LIMIT)), MAX_SEMANTIC_LIMIT))
+    except (TypeError, ValueError):
+        limit = SEMANTIC_LIMIT
+
+    available, reason = vector_search_available()
+    conn = connect_readonly(DB_PATH)
+    try:
+        if not available:
+            # Repli textuel si le modèle d'embedding n'est pas installé sur ce serveur
+            rows = _like_semantic_fallback(conn, query, limit) if corpus == "joradp" else []
+            results = [serialize_document(row) for row in rows]
+            message = f"{len(results)} documents potentiellement associés à votre requête."
+            return jsonify(query=query, results=results, message=message, mode="keyword", warning=reason)
+
+        allowed = _semantic_filter_ids(conn, corpus, filters)
+        ranked = get_vector_index(DB_PATH).search(
+            corpus,
+            encode_query(query),
+            limit,
+            lang=language if corpus == "coursupreme" else "fr",
+            allowed=allowed,
+        )
+        results = _fetch_ranked(conn, corpus, ranked)
+    finally:
+        conn.close()
+
+    message = f"{len(results)} résultats les plus proches de votre requête."
+    return jsonify(query=query, corpus=corpus, results=results, message=message, mode="semantic")
@@ -0,0 +1,290 @@
+"""Recherche vectorielle en lecture seule sur les embeddings de harvester.db.
+
+Le moissonneur (BB) calcule et stocke les embeddings ; Mizane se contente de
+les lire. La base est ouverte en `mode=ro` (aucun verrou d'écriture possible)
+et les vecteurs sont chargés une fois en matrices float32 normalisées, puis
+complétés par les seules lignes nouvelles ou modifiées quand la base change. Une recherche devient un produit
+matrice-vecteur suivi d'un top-k.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from sqlite3 import Row, connect
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+EMBEDDING_MODEL_NAME = os.getenv("MIZANE_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+# Intervalle minimal entre deux vérifications de fraîcheur de la base
+RELOAD_CHECK_SECONDS = float(os.getenv("MIZANE_VECTOR_RELOAD_CHECK", "30"))
+
+# corpus -> [(langue, table, colonne identifiant, colonne vecteur)]
+CORPUS_SOURCES: Dict[str, List[Tuple[str, str, str, str]]] = {
+    "joradp": [
+        ("fr", "document_embeddings", "document_id", "embedding"),
+    ],
+    "coursupreme": [
+        ("fr", "supreme_court_decisions", "id", "embedding_fr"),
+        ("ar", "supreme_court_decisions", "id", "embedding_ar"),
+    ],
+}
+
+_MODEL = None
+_MODEL_LOCK = threading.Lock()
+
+
+def connect_readonly(db_path: Path):
+    """Connexion SQLite en lecture seule (URI `mode=ro`)."""
+    if not db_path.exists():
+        raise RuntimeError("La base harvester.db est introuvable.")
+    conn = connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+    conn.row_factory = Row
+    return conn
+
+
+def get_embedding_model():
+    """Modèle sentence-transformers (même modèle que le moissonneur), ou None s'il est absent."""
+    global _MODEL
+    if _MODEL is not None:
+        return _MODEL
+    with _MODEL_LOCK:
+        if _MODEL is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                return None
+            _MODEL = SentenceTransformer(EMBEDDING_MODEL_NAME)
+    return _MODEL
+
+
+class _Matrix:
+    """Vecteurs normalisés d'une langue d'un corpus (instance immuable)."""
+
+    def __init__(self, ids: "np.ndarray", matrix: Optional["np.ndarray"]):
+        self.ids = ids
+        self.matrix = matrix
+
+    @classmethod
+    def empty(cls) -> "_Matrix":
+        return cls(np.empty(0, dtype=np.int64), None)
+
+    def merged(self, changes: Dict[int, Optional[bytes]]) -> "_Matrix":
+        """Nouvelle matrice où les ids de `changes` sont remplacés (ou retirés si blob vide)."""
+        if not changes:
+            return self
+        dimension = self.matrix.shape[1] if self.matrix is not None else None
+        ids: List[int] = []
+        vectors = []
+        for item_id, blob in changes.items():
+            if not blob:
+                continue
+            vector = np.frombuffer(bytes(blob), dtype=np.float32)
+            if dimension is None:
+                dimension = vector.shape[0]
+            if vector.shape[0] != dimension:
+                continue
+            norm = float(np.linalg.norm(vector))
+            if norm == 0.0 or not np.isfinite(norm):
+                continue
+            ids.append(int(item_id))
+            vectors.append(vector / norm)
+        changed = np.fromiter(changes, dtype=np.int64, count=len(changes))
+        keep = ~np.isin(self.ids, changed)
+        parts = [self.matrix[keep]] if self.matrix is not None and keep.any() else []
+        if vectors:
+            parts.append(np.vstack(vectors).astype(np.float32, copy=False))
+        matrix = np.vstack(parts) if parts else None
+        return _Matrix(np.concatenate([self.ids[keep], np.asarray(ids, dtype=np.int64)]), matrix)
+
+    def search(self, query: "np.ndarray", limit: int, allowed: Optional[set] = None) -> List[Tuple[int, float]]:
+        if self.matrix is None or query.shape[0] != self.matrix.shape[1]:
+            return []
+        scores = self.matrix @ query
+        if allowed is not None:
+            mask = np.isin(self.ids, np.fromiter(allowed, dtype=np.int64, count=len(allowed)))
+            scores = np.where(mask, scores, -np.inf)
+            limit = min(limit, int(mask.sum()))
+        limit = min(limit, scores.shape[0])
+        if limit <= 0:
+            return []
+        candidates = np.argpartition(-scores, limit - 1)[:limit]
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(self.ids[position]), float(scores[position])) for position in order]
+
+
+class _SourceState:
+    """Curseurs de relecture incrémentale d'une source (table, colonne vecteur)."""
+
+    def __init__(self):
+        self.matrix = _Matrix.empty()
+        self.last_rowid = 0
+        self.last_updated: Optional[str] = None
+        self.has_updated_at: Optional[bool] = None
+        self.keys: set = set()  # identifiants vus (avec ou sans vecteur), pour détecter les suppressions
+
+
+class ReadOnlyVectorIndex:
+    """
+    Matrices d'embeddings par corpus, tenues à jour quand harvester.db change.
+
+    Comme l'index ANN du moissonneur, seules les lignes de rowid supérieur au
+    dernier vu sont relues (plus celles dont `updated_at` a avancé, pour les
+    embeddings recalculés sur place). Une relecture complète n'a lieu que si
+    des lignes ont disparu. La lecture SQLite se fait hors du verrou des
+    recherches, qui continuent sur les matrices courantes pendant ce temps.
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._states: Dict[Tuple[str, str], _SourceState] = {}
+        self._matrices: Dict[str, Dict[str, _Matrix]] = {}
+        self._signature: Optional[Tuple] = None
+        self._checked_at = 0.0
+
+    def _file_signature(self) -> Tuple:
+        # Le WAL change avant le fichier principal tant qu'aucun checkpoint n'a eu lieu
+        parts = []
+        for suffix in ("", "-wal"):
+            path = Path(f"{self.db_path}{suffix}")
+            if path.exists():
+                stat = path.stat()
+                parts.append((suffix, stat.st_mtime_ns, stat.st_size))
+        return tuple(parts)
+
+    @staticmethod
+    def _read_changes(conn, state: _SourceState, table: str, key: str, column: str) -> Dict[int, Optional[bytes]]:
+        """Lignes nouvelles ou modifiées depuis le dernier passage ({id: blob})."""
+        if state.has_updated_at is None:
+            columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
+            state.has_updated_at = "updated_at" in columns
+        updated = "updated_at" if state.has_updated_at else "NULL"
+        sql = f"SELECT rowid, {key}, {column}, {updated} FROM {table} WHERE rowid > ?"
+        params: list[Any] = [state.last_rowid]
+        if state.has_updated_at and state.last_updated is not None:
+            # `>=` : plusieurs écritures peuvent partager la même seconde
+            sql += " OR updated_at >= ?"
+            params.append(state.last_updated)
+        changes: Dict[int, Optional[bytes]] = {}
+        for rowid, item_id, blob, updated_at in conn.execute(sql, params):
+            changes[int(item_id)] = blob
+            state.keys.add(int(item_id))
+            state.last_rowid = max(state.last_rowid, int(rowid))
+            if updated_at is not None and (state.last_updated is None or str(updated_at) > state.last_updated):
+                state.last_updated = str(updated_at)
+        return changes
+
+    def _refresh_source(self, conn, state: _SourceState, table: str, key: str, column: str) -> _SourceState:
+        changes = self._read_changes(conn, state, table, key, column)
+        state.matrix = state.matrix.merged(changes)
+        count = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        if count < len(state.keys):
+            # Des lignes ont été supprimées : on repart d'un état vide
+            state = _SourceState()
+            state.matrix = state.matrix.merged(self._read_changes(conn, state, table, key, column))
+        return state
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._matrices and now - self._checked_at < RELOAD_CHECK_SECONDS:
+            return
+        # Un seul rafraîchissement à la fois ; les autres recherches gardent les matrices courantes
+        if not self._refresh_lock.acquire(blocking=not self._matrices):
+            return
+        try:
+            if self._matrices and time.monotonic() - self._checked_at < RELOAD_CHECK_SECONDS:
+                return
+            self._checked_at = time.monotonic()
+            signature = self._file_signature()
+            if signature == self._signature:
+                return
+            states = dict(self._states)
+            conn = connect_readonly(self.db_path)
+            try:
+                for corpus, sources in CORPUS_SOURCES.items():
+                    for lang, table, key, column in sources:
+                        state = states.get((corpus, lang)) or _SourceState()
+                        try:
+                            states[(corpus, lang)] = self._refresh_source(conn, state, table, key, column)
+                        except Exception:
+                            states[(corpus, lang)] = _SourceState()  # table absente dans cette base
+            finally:
+                conn.close()
+            matrices: Dict[str, Dict[str, _Matrix]] = {}
+            for (corpus, lang), state in states.items():
+                matrices.setdefault(corpus, {})[lang] = state.matrix
+            with self._lock:
+                self._states = states
+                self._matrices = matrices
+                self._signature = signature
+        finally:
+            self._refresh_lock.release()
+
+    def search(
+        self,
+        corpus: str,
+        query_vector,
+        limit: int,
+        lang: str = "fr",
+        allowed: Optional[set] = None,
+    ) -> List[Tuple[int, float]]:
+        """Top-k cosinus ; `lang='both'` garde le meilleur score AR/FR de chaque élément."""
+        query = np.asarray(query_vector, dtype=np.float32).reshape(-1)
+        norm = float(np.linalg.norm(query))
+        if norm == 0.0:
+            return []
+        query = query / norm
+        self._refresh()
+        with self._lock:
+            matrices = self._matrices.get(corpus, {})
+        langs = list(matrices) if lang == "both" else [lang if lang in matrices else "fr"]
+        best: Dict[int, float] = {}
+        for current in langs:
+            matrix = matrices.get(current)
+            if matrix is None:
+                continue
+            for item_id, score in matrix.search(query, limit, allowed):
+                if score > best.get(item_id, float("-inf")):
+                    best[item_id] = score
+        return sorted(best.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    def size(self, corpus: str) -> Dict[str, int]:
+        self._refresh()
+        with self._lock:
+            return {lang: len(matrix.ids) for lang, matrix in self._matrices.get(corpus, {}).items()}
+
+
+_INDEXES: Dict[str, ReadOnlyVectorIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_vector_index(db_path: Path) -> ReadOnlyVectorIndex:
+    key = str(db_path.resolve())
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = ReadOnlyVectorIndex(db_path)
+            _INDEXES[key] = index
+        return index
+
+
+def vector_search_available() -> Tuple[bool, Optional[str]]:
+    if not NUMPY_AVAILABLE:
+        return False, "numpy n'est pas installé"
+    if get_embedding_model() is None:
+        return False, "sentence-transformers n'est pas installé"
+    return True, None
+
+
+def encode_query(text: str) -> Any:
+    return get_embedding_model().encode(text, convert_to_numpy=True)
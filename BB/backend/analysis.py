@@ -5,6 +5,9 @@ from contextlib import contextmanager
 from pathlib import Path
 from dotenv import load_dotenv
 
+from shared.embedding_store import embedding_summary, save_document_embedding
+from shared.passages import embed_document_text, save_document_passages
+
 load_dotenv()
 
 try:
@@ -263,19 +266,12 @@ def process_single_document(doc_id, api_key, stop_event=None):
             embedding_model = get_embedding_model()
             if embedding_model and not (stop_event and stop_event.is_set()):
                 try:
-                    vector = embedding_model.encode(
-                        text,
-                        convert_to_numpy=True,
-                        normalize_embeddings=True,
-                    )
-                    if hasattr(vector, 'tolist'):
-                        vector = vector.tolist()
-                    metadata_obj['embedding'] = {
-                        'model': EMBEDDING_MODEL_NAME,
-                        'dimension': len(vector),
-                        'generated_at': datetime.now().isoformat(),
-                        'vector': [float(v) for v in vector],
-                    }
+                    passages, passage_vectors, vector = embed_document_text(embedding_model, text)
+                    if vector is None:
+                        raise ValueError("texte vide, aucun passage à encoder")
+                    save_document_passages(conn, doc_id, passages, passage_vectors, EMBEDDING_MODEL_NAME)
+                    stored = save_document_embedding(conn, doc_id, vector, EMBEDDING_MODEL_NAME)
+                    metadata_obj['embedding'] = embedding_summary(EMBEDDING_MODEL_NAME, stored.shape[0])
                     metadata_updated = True
                 except Exception as exc:
                     print(f"   ⚠️  Embedding non généré : {exc}")
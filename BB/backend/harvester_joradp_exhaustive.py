@@ -2,40 +2,91 @@
 Moissonneur exhaustif JORADP (1962-2025)
 Collecte TOUTES les métadonnées sans télécharger les PDFs
 """
+import os
+import sqlite3
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import datetime
-import time
+from itertools import islice
+from requests.adapters import HTTPAdapter
 from models import get_db_connection
+from shared.http_validators import (
+    conditional_headers,
+    ensure_validators_table,
+    load_validators,
+    record_validators,
+    validators_comparable,
+    validators_match,
+)
+from shared.jo_issue import ensure_issue_columns, parse_issue_url
+from shared.rate_limit import get_host_bucket
 
 R2_PREFIX = "Textes_juridiques_DZ/joradp.dz"
 
+# Sondes HEAD simultanées et politesse envers joradp.dz (requêtes / seconde)
+PROBE_CONCURRENCY = int(os.getenv('JORADP_PROBE_CONCURRENCY', '8'))
+PROBE_RATE = float(os.getenv('JORADP_PROBE_RATE', '10'))
+# Documents trouvés écrits par lots
+WRITE_BATCH_SIZE = 50
+# Arrêt d'une année après N × 404 consécutifs
+MAX_CONSECUTIVE_404 = 5
+
 class JORADPExhaustiveHarvester:
     """Moissonne tous les JO depuis 1962 en récupérant les métadonnées"""
     
     BASE_URL = "https://www.joradp.dz/FTP/JO-FRANCAIS"
     
-    def __init__(self, session_id):
+    def __init__(self, session_id, base_url=None, concurrency=None, rate=None):
         self.session_id = session_id
+        # base_url permet de viser un serveur local de test
+        self.base_url = (base_url or self.BASE_URL).rstrip('/')
+        self.concurrency = max(1, concurrency or PROBE_CONCURRENCY)
+        self.rate_limiter = get_host_bucket(self.base_url, rate or PROBE_RATE, burst=self.concurrency)
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.http.mount("http://", adapter)
+        self.http.mount("https://", adapter)
+        self.pending_documents = []
+        with get_db_connection() as conn:
+            ensure_issue_columns(conn)
+            ensure_validators_table(conn)
         self.stats = {
             'total_found': 0,
             'total_404': 0,
-            'years_processed': 0
+            'years_processed': 0,
+            'probes': 0,
+            'unchanged': 0,
+            'changed': 0,
+            'unknown': 0
         }
     
     def build_url(self, year, num):
         """Construit l'URL d'un document"""
-        return f"{self.BASE_URL}/{year}/F{year}{str(num).zfill(3)}.pdf"
+        return f"{self.base_url}/{year}/F{year}{str(num).zfill(3)}.pdf"
     
-    def get_metadata(self, url):
-        """Récupère les métadonnées via requête HEAD"""
+    def get_metadata(self, url, validators=None):
+        """
+        Récupère les métadonnées via requête HEAD (débit limité par hôte).
+
+        Avec `validators` (etag, last_modified) la requête est conditionnelle :
+        un 304 donne {'exists': True, 'not_modified': True}.
+        """
         try:
-            response = requests.head(url, timeout=10, allow_redirects=True)
+            self.rate_limiter.acquire()
+            response = self.http.head(url, timeout=10, allow_redirects=True,
+                                      headers=conditional_headers(validators))
+            
+            if response.status_code == 304:
+                return {'exists': True, 'not_modified': True}
             
             if response.status_code == 200:
                 metadata = {
                     'exists': True,
                     'size_bytes': int(response.headers.get('content-length', 0)),
                     'last_modified': response.headers.get('last-modified'),
+                    'etag': response.headers.get('etag'),
                     'content_type': response.headers.get('content-type', 'application/pdf')
                 }
                 
@@ -61,82 +112,323 @@ class JORADPExhaustiveHarvester:
         except Exception as e:
             return {'exists': False, 'error': str(e)}
     
+    def _probe_in_order(self, year, numbers, validators=None):
+        """
+        (numéro, métadonnées) dans l'ordre de `numbers`.
+
+        Jusqu'à `concurrency` sondes HEAD sont en vol ; à la fermeture du
+        générateur (arrêt du consommateur), les sondes non démarrées sont
+        annulées. `validators` ({numéro: (etag, last_modified)}) rend les
+        sondes conditionnelles.
+        """
+        numbers = iter(numbers)
+        validators = validators or {}
+        in_flight = deque()
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        
+        def submit(num):
+            future = executor.submit(self.get_metadata, self.build_url(year, num), validators.get(num))
+            in_flight.append((num, future))
+        
+        try:
+            for num in islice(numbers, self.concurrency):
+                submit(num)
+            while in_flight:
+                num, future = in_flight.popleft()
+                following = next(numbers, None)
+                if following is not None:
+                    submit(following)
+                self.stats['probes'] += 1
+                yield num, future.result()
+        finally:
+            for _, future in in_flight:
+                future.cancel()
+            executor.shutdown(wait=True)
+    
+    def _record_probe(self, year, num, metadata):
+        """Traite le résultat d'une sonde ; retourne 'found', '404' ou 'error'"""
+        if metadata.get('exists'):
+            # Document existe !
+            self.stats['total_found'] += 1
+            
+            size_kb = metadata['size_bytes'] / 1024
+            date_str = metadata.get('publication_date', 'inconnue')
+            
+            print(f"   ✅ [{num:03d}] {size_kb:.1f} KB - {date_str}")
+            
+            # Sauvegarder dans la BD (par lots)
+            self.queue_document(self.build_url(year, num), year, num, metadata)
+            return 'found'
+        
+        if metadata.get('404'):
+            self.stats['total_404'] += 1
+            return '404'
+        
+        # Erreur réseau
+        print(f"   ⚠️  [{num:03d}] Erreur: {metadata.get('error')}")
+        return 'error'
+    
     def harvest_year(self, year, start_num=1, max_num=999):
-        """Moissonne une année complète"""
+        """
+        Moissonne une année complète (parcours linéaire).
+
+        Les réponses sont traitées dans l'ordre des numéros : la règle
+        d'arrêt après 5 × 404 consécutifs donne le même résultat qu'un
+        parcours séquentiel (les sondes déjà lancées au-delà du point
+        d'arrêt sont ignorées).
+        """
         print(f"\n📅 Année {year}")
         print(f"   Numéros: {start_num} à {max_num}")
         
         found_count = 0
         consecutive_404 = 0
         
-        for num in range(start_num, max_num + 1):
-            url = self.build_url(year, num)
-            
-            # Récupérer métadonnées
-            metadata = self.get_metadata(url)
-            
-            if metadata.get('exists'):
-                # Document existe !
-                consecutive_404 = 0
-                found_count += 1
-                self.stats['total_found'] += 1
-                
-                size_kb = metadata['size_bytes'] / 1024
-                date_str = metadata.get('publication_date', 'inconnue')
-                
-                print(f"   ✅ [{num:03d}] {size_kb:.1f} KB - {date_str}")
-                
-                # Sauvegarder dans la BD
-                self.save_document(url, year, num, metadata)
-                
-            elif metadata.get('404'):
-                consecutive_404 += 1
-                self.stats['total_404'] += 1
-                
-                # Arrêt après 5 × 404 consécutifs
-                if consecutive_404 >= 5:
-                    print(f"   ⏹️  5 documents absents consécutifs - fin de {year}")
-                    break
-            
-            else:
-                # Erreur réseau
-                print(f"   ⚠️  [{num:03d}] Erreur: {metadata.get('error')}")
-            
-            # Pause pour ne pas surcharger le serveur
-            time.sleep(0.1)
+        try:
+            with closing(self._probe_in_order(year, range(start_num, max_num + 1))) as probes:
+                for num, metadata in probes:
+                    outcome = self._record_probe(year, num, metadata)
+                    if outcome == 'found':
+                        consecutive_404 = 0
+                        found_count += 1
+                    elif outcome == '404':
+                        consecutive_404 += 1
+                        # Arrêt après 5 × 404 consécutifs
+                        if consecutive_404 >= MAX_CONSECUTIVE_404:
+                            print(f"   ⏹️  {MAX_CONSECUTIVE_404} documents absents consécutifs - fin de {year}")
+                            break
+        finally:
+            # Documents déjà trouvés écrits même si la sonde échoue en cours d'année
+            self.flush_documents()
         
         self.stats['years_processed'] += 1
         print(f"   📊 {found_count} documents trouvés pour {year}")
         
         return found_count
     
+    def known_issue_numbers(self, year):
+        """
+        Numéros déjà connus pour `year` : (numéros de la session, plus grand numéro connu).
+
+        Le plus grand numéro connu combine tous les documents JORADP et
+        `joradp_archive` (numéros vus disponibles) ; il sert de point de
+        départ à la découverte.
+        """
+        with get_db_connection() as conn:
+            session_numbers = {
+                row[0] for row in conn.execute(
+                    "SELECT jo_number FROM documents "
+                    "WHERE session_id = ? AND jo_year = ? AND jo_language = 'fr' AND jo_number IS NOT NULL",
+                    (self.session_id, year)
+                )
+            }
+            known_last = conn.execute(
+                "SELECT MAX(jo_number) FROM documents WHERE jo_year = ? AND jo_language = 'fr'",
+                (year,)
+            ).fetchone()[0] or 0
+            try:
+                archived_last = conn.execute(
+                    "SELECT MAX(number) FROM joradp_archive "
+                    "WHERE year = ? AND language = 'jo-francais' AND status IN ('available', 'downloaded')",
+                    (year,)
+                ).fetchone()[0] or 0
+            except sqlite3.OperationalError:
+                # Table d'archive absente de cette base
+                archived_last = 0
+        return session_numbers, max(known_last, archived_last)
+    
+    def discover_last_number(self, year, known_last=0, max_num=999, probed=None):
+        """
+        Dernier numéro publié de `year`, en O(log n) requêtes.
+
+        À partir du plus grand numéro connu, sondage exponentiel
+        (+1, +2, +4, ...) puis dichotomie. Un numéro « continue » la série
+        s'il existe ou si l'un des 4 suivants existe : même tolérance aux
+        trous que la règle des 5 × 404 consécutifs. Les résultats des sondes
+        sont conservés dans `probed` (numéro -> métadonnées).
+        """
+        probed = {} if probed is None else probed
+        
+        def continues_at(num):
+            for candidate in range(num, min(num + MAX_CONSECUTIVE_404, max_num + 1)):
+                if candidate not in probed:
+                    self.stats['probes'] += 1
+                    probed[candidate] = self.get_metadata(self.build_url(year, candidate))
+                # Une erreur réseau n'est pas une absence : prudence
+                if not probed[candidate].get('404'):
+                    return True
+            return False
+        
+        # Invariant : la série continue en `low` (ou low = 0), pas en `high`
+        low = min(known_last, max_num)
+        step = 1
+        while True:
+            high = low + step
+            if high > max_num:
+                high = max_num + 1
+                break
+            if not continues_at(high):
+                break
+            low = high
+            step *= 2
+        while high - low > 1:
+            middle = (low + high) // 2
+            if continues_at(middle):
+                low = middle
+            else:
+                high = middle
+        return high - 1
+    
+    def discover_year(self, year, start_num=1, max_num=999):
+        """
+        Moissonne une année par découverte du dernier numéro.
+
+        Seuls les numéros absents de la session (à partir de `start_num`)
+        sont ensuite sondés ; les réponses déjà obtenues pendant la
+        découverte sont réutilisées.
+        """
+        print(f"\n📅 Année {year} (découverte)")
+        
+        session_numbers, known_last = self.known_issue_numbers(year)
+        probed = {}
+        last_num = self.discover_last_number(year, known_last, max_num, probed)
+        print(f"   Dernier numéro publié: {last_num} (connu: {known_last})")
+        
+        gaps = [num for num in range(start_num, last_num + 1) if num not in session_numbers]
+        found_count = 0
+        
+        try:
+            to_probe = [num for num in gaps if num not in probed]
+            for num in gaps:
+                if num in probed and self._record_probe(year, num, probed[num]) == 'found':
+                    found_count += 1
+            with closing(self._probe_in_order(year, to_probe)) as probes:
+                for num, metadata in probes:
+                    if self._record_probe(year, num, metadata) == 'found':
+                        found_count += 1
+        finally:
+            self.flush_documents()
+        
+        self.stats['years_processed'] += 1
+        print(f"   📊 {found_count} documents trouvés pour {year} ({len(gaps)} numéros manquants sondés)")
+        
+        return found_count
+    
+    def _document_row(self, url, year, num, metadata):
+        filename = f"F{year}{str(num).zfill(3)}.pdf"
+        file_path = f"{R2_PREFIX}/{year}/{filename}"
+        _, _, language = parse_issue_url(url)
+        return (
+            self.session_id,
+            url,
+            file_path,
+            '.pdf',
+            metadata.get('publication_date'),
+            metadata.get('size_bytes'),
+            int(year),
+            int(num),
+            language or 'fr'
+        )
+    
+    def queue_document(self, url, year, num, metadata):
+        """Met le document en attente d'écriture ; écrit le lot quand il est plein"""
+        self.pending_documents.append((self._document_row(url, year, num, metadata), metadata))
+        if len(self.pending_documents) >= WRITE_BATCH_SIZE:
+            self.flush_documents()
+    
+    def flush_documents(self):
+        """Écrit les documents en attente (une transaction par lot)"""
+        if not self.pending_documents:
+            return
+        rows, self.pending_documents = self.pending_documents, []
+        self._insert_documents(rows)
+    
     def save_document(self, url, year, num, metadata):
         """Sauvegarde les métadonnées du document dans la BD"""
+        self._insert_documents([(self._document_row(url, year, num, metadata), metadata)])
+    
+    def _insert_documents(self, entries):
+        """Insère les documents et, pour les nouveaux, les validateurs HTTP de la sonde"""
         with get_db_connection() as conn:
             cursor = conn.cursor()
             
-            filename = f"F{year}{str(num).zfill(3)}.pdf"
-            file_path = f"{R2_PREFIX}/{year}/{filename}"
+            for row, metadata in entries:
+                cursor.execute("""
+                    INSERT OR IGNORE INTO documents 
+                    (session_id, url, file_path, file_extension, 
+                     publication_date, file_size_bytes, 
+                     jo_year, jo_number, jo_language,
+                     metadata_collection_status, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'success', CURRENT_TIMESTAMP)
+                """, row)
+                if cursor.rowcount:
+                    record_validators(conn, row[1], metadata.get('etag'), metadata.get('last_modified'))
+            
+            conn.commit()
+    
+    def revalidate_year(self, year):
+        """
+        Revalide les numéros déjà collectés de `year` par HEAD conditionnels.
+
+        Un 304 (ou des validateurs identiques) confirme la version traitée :
+        le document garde ses statuts et les routes de téléchargement,
+        d'extraction et d'analyse le laissent de côté. Un document modifié
+        repasse en 'pending' pour ces étapes ; ses nouveaux validateurs
+        sont enregistrés par la route de téléchargement, une fois le PDF
+        récupéré. Sans validateur comparable (rien d'enregistré, ou serveur
+        sans ETag ni Last-Modified), l'état est inconnu : rien n'est modifié.
+        """
+        print(f"\n🔁 Année {year} (revalidation)")
+        
+        with get_db_connection() as conn:
+            documents = conn.execute("""
+                SELECT id, jo_number, url FROM documents
+                WHERE session_id = ? AND jo_year = ? AND jo_language = 'fr' AND jo_number IS NOT NULL
+                ORDER BY jo_number
+            """, (self.session_id, year)).fetchall()
+            by_number = {row['jo_number']: row for row in documents}
+            stored = load_validators(conn, [row['url'] for row in documents])
+            validators = {num: stored.get(row['url']) for num, row in by_number.items()}
             
-            cursor.execute("""
-                INSERT OR IGNORE INTO documents 
-                (session_id, url, file_path, file_extension, 
-                 publication_date, file_size_bytes, 
-                 metadata_collection_status, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, 'success', CURRENT_TIMESTAMP)
-            """, (
-                self.session_id,
-                url,
-                file_path,
-                '.pdf',
-                metadata.get('publication_date'),
-                metadata.get('size_bytes')
-            ))
+            changed_count = 0
+            with closing(self._probe_in_order(year, sorted(by_number), validators)) as probes:
+                for num, metadata in probes:
+                    document = by_number[num]
+                    if metadata.get('not_modified') or (
+                        metadata.get('exists')
+                        and validators_match(validators[num], metadata.get('etag'), metadata.get('last_modified'))
+                    ):
+                        self.stats['unchanged'] += 1
+                        record_validators(conn, document['url'], None, None, changed=False)
+                        continue
+                    if not metadata.get('exists'):
+                        print(f"   ⚠️  [{num:03d}] Revalidation impossible: {metadata.get('error') or '404'}")
+                        continue
+                    if not validators_comparable(validators[num], metadata.get('etag'), metadata.get('last_modified')):
+                        self.stats['unknown'] += 1
+                        continue
+                    
+                    # Nouvelle version : à re-télécharger, ré-extraire et ré-analyser
+                    conn.execute("""
+                        UPDATE documents
+                        SET publication_date = COALESCE(?, publication_date),
+                            file_size_bytes = ?,
+                            download_status = 'pending',
+                            text_extraction_status = 'pending',
+                            ai_analysis_status = 'pending',
+                            embedding_status = 'pending'
+                        WHERE id = ?
+                    """, (metadata.get('publication_date'), metadata.get('size_bytes'), document['id']))
+                    changed_count += 1
+                    self.stats['changed'] += 1
+                    print(f"   🔄 [{num:03d}] modifié depuis la dernière passe")
             
             conn.commit()
+        
+        print(f"   📊 {len(documents)} numéros revalidés, {changed_count} modifiés")
+        return changed_count
     
-    def harvest_all(self, start_year=1962, end_year=None):
-        """Moissonne toutes les années depuis 1962"""
+    def harvest_all(self, start_year=1962, end_year=None, discover=False):
+        """Moissonne toutes les années depuis 1962 (discover=True : découverte + trous seulement)"""
         if end_year is None:
             end_year = datetime.now().year
         
@@ -146,13 +438,17 @@ class JORADPExhaustiveHarvester:
         print("=" * 60)
         
         for year in range(start_year, end_year + 1):
-            self.harvest_year(year)
+            if discover:
+                self.discover_year(year)
+            else:
+                self.harvest_year(year)
         
         print("\n" + "=" * 60)
         print(f"✅ Moissonnage terminé !")
         print(f"   📚 {self.stats['total_found']} documents trouvés")
         print(f"   📅 {self.stats['years_processed']} années traitées")
         print(f"   ⊗ {self.stats['total_404']} erreurs 404")
+        print(f"   🔎 {self.stats['probes']} requêtes HEAD")
 
 
 def test_exhaustive():
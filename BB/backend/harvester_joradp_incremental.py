@@ -17,10 +17,10 @@ class JORADPIncrementalHarvester(JORADPExhaustiveHarvester):
         with get_db_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("""
-                SELECT url, publication_date 
+                SELECT url, publication_date, jo_year, jo_number
                 FROM documents 
-                WHERE session_id = ?
-                ORDER BY publication_date DESC, url DESC
+                WHERE session_id = ? AND jo_year IS NOT NULL
+                ORDER BY jo_year DESC, jo_number DESC
                 LIMIT 1
             """, (self.session_id,))
             
@@ -37,27 +37,25 @@ class JORADPIncrementalHarvester(JORADPExhaustiveHarvester):
             'date': last_doc['publication_date']
         }
         
-        # Extraire année et numéro
-        last_url = last_doc['url']
-        # Format: https://www.joradp.dz/FTP/JO-FRANCAIS/2024/F2024088.pdf
-        parts = last_url.split('/')
-        filename = parts[-1]  # F2024088.pdf
-        year = int(filename[1:5])  # 2024
-        num = int(filename[5:8])   # 088
+        # Année et numéro du dernier JO collecté
+        filename = last_doc['url'].split('/')[-1]  # F2024088.pdf
+        year = last_doc['jo_year']
+        num = last_doc['jo_number']
         
         print(f"   Dernier doc: {filename} ({last_doc['publication_date']})")
         print(f"   Reprise depuis: année {year}, numéro {num + 1}")
         
-        # Continuer depuis ce point
+        # Continuer depuis ce point : découverte du dernier numéro publié
+        # (quelques requêtes) puis sondage des seuls numéros manquants
         current_year = datetime.now().year
         
         # Finir l'année en cours
         if num < 999:
-            self.harvest_year(year, start_num=num + 1)
+            self.discover_year(year, start_num=num + 1)
         
         # Puis années suivantes
         if year < current_year:
-            self.harvest_all(start_year=year + 1, end_year=current_year)
+            self.harvest_all(start_year=year + 1, end_year=current_year, discover=True)
     
     def harvest_entre_dates(self, date_debut, date_fin):
         """Moissonne/remoissonne entre deux dates"""
@@ -69,8 +67,13 @@ class JORADPIncrementalHarvester(JORADPExhaustiveHarvester):
         
         print(f"   Années à traiter: {year_debut} à {year_fin}")
         
-        # Moissonner toutes les années concernées
-        self.harvest_all(start_year=year_debut, end_year=year_fin)
+        # Moissonner toutes les années concernées (numéros déjà collectés ignorés)
+        self.harvest_all(start_year=year_debut, end_year=year_fin, discover=True)
+        
+        # Puis revalider les numéros déjà collectés (HEAD conditionnels) :
+        # seuls les PDF modifiés repassent en attente de téléchargement
+        for year in range(year_debut, year_fin + 1):
+            self.revalidate_year(year)
     
     def harvest_depuis_numero(self, year, start_num, max_docs=100):
         """Moissonne X documents depuis un numéro dans une année"""
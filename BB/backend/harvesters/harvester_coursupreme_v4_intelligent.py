@@ -8,8 +8,17 @@ import sqlite3
 from datetime import datetime
 import time
 import re
+import sys
+from pathlib import Path
 from urllib.parse import urljoin
 
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.append(str(BACKEND_DIR))
+from shared.decision_dates import ensure_decision_date_column, normalize_decision_date_value
+from shared.http_validators import ensure_validators_table, record_validators, response_validators, revalidate
+from shared.posting_bitmaps import get_posting_cache
+
 class HarvesterCourSupremeV4Intelligent:
     def __init__(self, db_path='harvester.db'):
         self.db_path = db_path
@@ -18,6 +27,14 @@ class HarvesterCourSupremeV4Intelligent:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
+        # Migrations une fois par moissonneur, pas à chaque connexion
+        conn = sqlite3.connect(self.db_path)
+        try:
+            ensure_decision_date_column(conn)
+            ensure_validators_table(conn)
+            conn.commit()
+        finally:
+            conn.close()
     
     def get_conn(self):
         return sqlite3.connect(self.db_path)
@@ -138,15 +155,21 @@ class HarvesterCourSupremeV4Intelligent:
                 print(f"📄 Page {page_num}: {url}")
             
             try:
-                response = self.session.get(url, timeout=30)
+                # Requête conditionnelle : 304 si la page n'a pas changé depuis la dernière passe
+                response, changed = revalidate(self.session, conn, url, timeout=30)
                 
                 if response.status_code == 404:
                     break
                 
-                response.raise_for_status()
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                accordions = soup.find_all('div', class_='accordion-header')
+                if changed:
+                    response.raise_for_status()
+                    soup = BeautifulSoup(response.content, 'html.parser')
+                    accordions = soup.find_all('div', class_='accordion-header')
+                else:
+                    # Page inchangée : aucune nouvelle décision, rien à analyser
+                    if chamber_id == 1:
+                        print(f"   ⏭️  Page inchangée")
+                    accordions = []
                 
                 page_themes = 0
                 page_decisions = 0
@@ -203,9 +226,9 @@ class HarvesterCourSupremeV4Intelligent:
                             # Insérer décision (unique)
                             cursor.execute("""
                                 INSERT OR IGNORE INTO supreme_court_decisions
-                                (decision_number, decision_date, url, download_status)
-                                VALUES (?, ?, ?, 'pending')
-                            """, (decision_number, decision_date, decision_url))
+                                (decision_number, decision_date, decision_date_iso, url, download_status)
+                                VALUES (?, ?, ?, ?, 'pending')
+                            """, (decision_number, decision_date, normalize_decision_date_value(decision_date), decision_url))
                             
                             # Récupérer decision_id
                             cursor.execute("""
@@ -230,6 +253,14 @@ class HarvesterCourSupremeV4Intelligent:
                 if chamber_id == 1:  # Affichage détaillé Section 1
                     print(f"   ✅ {page_themes} thèmes, {page_decisions} décisions")
                 
+                # Validateurs enregistrés avec les décisions de la page
+                # (y compris la page qui déclenche l'arrêt)
+                record_validators(conn, url, *response_validators(response), changed=changed)
+                conn.commit()
+                if page_decisions:
+                    # Bitmaps chambre/thème de la recherche avancée (même processus via /collect)
+                    get_posting_cache(self.db_path).invalidate('classification')
+                
                 # Détecter pages vides
                 if page_decisions == 0:
                     empty_pages += 1
@@ -245,7 +276,6 @@ class HarvesterCourSupremeV4Intelligent:
                 total_themes += page_themes
                 total_decisions += page_decisions
                 
-                conn.commit()
                 page_num += 1
                 time.sleep(1)
                 
@@ -8,8 +8,16 @@ import sqlite3
 from datetime import datetime
 import time
 import re
+import sys
+from pathlib import Path
 from urllib.parse import urljoin, unquote
 
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.append(str(BACKEND_DIR))
+from shared.decision_dates import ensure_decision_date_column, normalize_decision_date_value
+from shared.posting_bitmaps import get_posting_cache
+
 class HarvesterCourSupremeV5:
     def __init__(self, db_path='../../harvester.db'):
         self.db_path = db_path
@@ -18,6 +26,12 @@ class HarvesterCourSupremeV5:
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
+        # Migration une fois par moissonneur, pas à chaque connexion
+        conn = sqlite3.connect(self.db_path)
+        try:
+            ensure_decision_date_column(conn)
+        finally:
+            conn.close()
     
     def get_conn(self):
         return sqlite3.connect(self.db_path)
@@ -259,9 +273,9 @@ class HarvesterCourSupremeV5:
                             # Insérer décision
                             cursor.execute("""
                                 INSERT OR IGNORE INTO supreme_court_decisions
-                                (decision_number, decision_date, url, download_status)
-                                VALUES (?, ?, ?, 'pending')
-                            """, (decision_number, decision_date, decision_url))
+                                (decision_number, decision_date, decision_date_iso, url, download_status)
+                                VALUES (?, ?, ?, ?, 'pending')
+                            """, (decision_number, decision_date, normalize_decision_date_value(decision_date), decision_url))
                             
                             # Récupérer ID
                             cursor.execute("""
@@ -295,6 +309,8 @@ class HarvesterCourSupremeV5:
                 
                 total_decisions += page_decisions
                 conn.commit()
+                if page_decisions:
+                    get_posting_cache(self.db_path).invalidate('classification')
                 page_num += 1
                 time.sleep(1)
                 
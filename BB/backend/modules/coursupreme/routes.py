@@ -10,8 +10,10 @@ from datetime import datetime
 import numpy as np
 import os
 import io
+import json
 import zipfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from html import unescape
 from dotenv import load_dotenv
 
@@ -31,12 +33,22 @@ from shared.r2_storage import (
     normalize_key,
     R2ConfigurationError,
 )
-
-NORMALIZED_DECISION_DATE = (
-    "CASE WHEN length(decision_date)=10 AND substr(decision_date,3,1)='-' AND substr(decision_date,6,1)='-' "
-    "THEN substr(decision_date,7,4)||'-'||substr(decision_date,4,2)||'-'||substr(decision_date,1,2) "
-    "ELSE decision_date END"
+from shared.vector_index import get_decision_index
+from shared.decision_fts import rebuild_decision_fts, search_decision_ids
+from shared.arabic_text import light_stem_arabic, normalize_arabic
+from shared.posting_bitmaps import Bitmap, get_posting_cache, sorted_id_chunks
+from shared.query_embeddings import encode_query, get_query_embedding_cache
+from shared.result_cursor import decode_cursor, encode_cursor, get_ranked_result_cache
+from shared.decision_dates import DATE_ISO_COLUMN, ensure_decision_date_column, normalize_decision_date_value
+from shared.facet_counts import FACET_COUNTS_TABLE, ensure_facet_counts, rebuild_facet_counts
+from shared.decision_status import (
+    STATUS_COLUMNS,
+    STATUS_TABLE,
+    STATUS_VALUES,
+    ensure_decision_status,
+    rebuild_decision_status,
 )
+from shared.stats_counters import read_stats_counters, rebuild_stats_counters
 
 
 def normalize_term(value):
@@ -91,29 +103,6 @@ def parse_fuzzy_date(value, is_end=False):
     return '9999-12-31' if is_end else '1900-01-01'
 
 
-def normalize_decision_date_value(value: str | None) -> str | None:
-    """Normalise une date trouvée dans le texte vers YYYY-MM-DD si possible."""
-    if not value:
-        return None
-    raw = value.strip()
-    candidates = ['%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d', '%Y/%m/%d']
-    for fmt in candidates:
-        try:
-            dt = datetime.strptime(raw, fmt)
-            return dt.strftime('%Y-%m-%d')
-        except ValueError:
-            continue
-    # Gestion des jours à 0 (ex: 2021/04/0) -> on force le jour à 01
-    m = re.match(r'(\d{4})[/-](\d{2})[/-]0$', raw)
-    if m:
-        try:
-            dt = datetime.strptime(f"{m.group(1)}-{m.group(2)}-01", "%Y-%m-%d")
-            return dt.strftime('%Y-%m-%d')
-        except ValueError:
-            return None
-    return None
-
-
 def format_display_date(value: str | None) -> str:
     """Retourne une date au format JJ-MM-AAAA pour l'affichage."""
     if not value:
@@ -147,6 +136,13 @@ FRENCH_INDEX_TABLE = 'french_keyword_index'
 FRENCH_INDEX_FIELDS = ['object_fr', 'summary_fr', 'title_fr']
 TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
 
+ARABIC_INDEX_TABLE = 'arabic_keyword_index'
+ARABIC_INDEX_FIELDS = ['object_ar', 'summary_ar', 'title_ar']
+ARABIC_TOKEN_PATTERN = re.compile(r'[\u0621-\u063a\u0641-\u064a]+')
+# Racinisation légère des jetons arabes (index et requêtes) ; reconstruire l'index si modifié
+ARABIC_LIGHT_STEMMING = os.getenv("COURSUPREME_ARABIC_STEMMING", "1") == "1"
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
 EMBEDDING_MODEL = None
 
 
@@ -157,84 +153,274 @@ def extract_french_tokens(value: str) -> list:
     return TOKEN_PATTERN.findall(normalized)
 
 
-def ensure_french_index(conn: sqlite3.Connection) -> None:
+def extract_arabic_tokens(value: str) -> list:
+    if not value:
+        return []
+    tokens = ARABIC_TOKEN_PATTERN.findall(normalize_arabic(value))
+    if ARABIC_LIGHT_STEMMING:
+        tokens = [light_stem_arabic(token) for token in tokens]
+    return tokens
+
+
+# Index inversés mots-clés : langue -> (table, champs source, tokenizer)
+KEYWORD_INDEXES = {
+    'fr': (FRENCH_INDEX_TABLE, FRENCH_INDEX_FIELDS, extract_french_tokens),
+    'ar': (ARABIC_INDEX_TABLE, ARABIC_INDEX_FIELDS, extract_arabic_tokens),
+}
+KEYWORD_INDEX_QUEUE_TABLE = 'keyword_index_queue'
+_KEYWORD_INDEX_READY: set = set()
+
+
+def _ensure_keyword_index_table(conn: sqlite3.Connection, table: str) -> bool:
+    """Crée une table d'index (avec unicité token/décision). Retourne True si elle vient d'être créée."""
+    existing = {
+        row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (?, ?)",
+            (table, f"idx_{table}_token_decision")
+        )
+    }
     conn.execute(f"""
-        CREATE TABLE IF NOT EXISTS {FRENCH_INDEX_TABLE} (
+        CREATE TABLE IF NOT EXISTS {table} (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             token TEXT NOT NULL,
             decision_id INTEGER NOT NULL
         )
     """)
-    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{FRENCH_INDEX_TABLE}_token ON {FRENCH_INDEX_TABLE}(token)")
-    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{FRENCH_INDEX_TABLE}_decision ON {FRENCH_INDEX_TABLE}(decision_id)")
+    if f"idx_{table}_token_decision" not in existing:
+        # Anciennes bases : supprimer les doublons avant de poser la contrainte d'unicité
+        conn.execute(f"""
+            DELETE FROM {table}
+            WHERE id NOT IN (SELECT MIN(id) FROM {table} GROUP BY token, decision_id)
+        """)
+        conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{table}_token_decision ON {table}(token, decision_id)")
+        conn.execute(f"DROP INDEX IF EXISTS idx_{table}_token")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_decision ON {table}(decision_id)")
+    return table not in existing
 
 
-def rebuild_french_index_entries(conn: sqlite3.Connection) -> int:
-    ensure_french_index(conn)
-    cursor = conn.cursor()
-    cursor.execute(f"DELETE FROM {FRENCH_INDEX_TABLE}")
-    cursor.execute(f"""
-        SELECT id, {', '.join(FRENCH_INDEX_FIELDS)}
-        FROM supreme_court_decisions
+def _ensure_keyword_index_queue(conn: sqlite3.Connection) -> None:
+    """File des décisions à réindexer, alimentée par triggers sur les champs indexés."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {KEYWORD_INDEX_QUEUE_TABLE} (
+            decision_id INTEGER PRIMARY KEY,
+            queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    fields = ', '.join(field for _, indexed_fields, _ in KEYWORD_INDEXES.values() for field in indexed_fields)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {KEYWORD_INDEX_QUEUE_TABLE}_ai AFTER INSERT ON supreme_court_decisions BEGIN
+            INSERT OR IGNORE INTO {KEYWORD_INDEX_QUEUE_TABLE}(decision_id) VALUES (new.id);
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {KEYWORD_INDEX_QUEUE_TABLE}_au AFTER UPDATE OF {fields} ON supreme_court_decisions BEGIN
+            INSERT OR IGNORE INTO {KEYWORD_INDEX_QUEUE_TABLE}(decision_id) VALUES (new.id);
+        END
     """)
-    rows = cursor.fetchall()
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {KEYWORD_INDEX_QUEUE_TABLE}_ad AFTER DELETE ON supreme_court_decisions BEGIN
+            INSERT OR IGNORE INTO {KEYWORD_INDEX_QUEUE_TABLE}(decision_id) VALUES (old.id);
+        END
+    """)
+
+
+def ensure_keyword_indexes(conn: sqlite3.Connection) -> None:
+    """Prépare les index FR/AR, la file de réindexation et ses triggers (une fois par processus)."""
+    key = str(Path(DB_PATH).resolve())
+    if key in _KEYWORD_INDEX_READY:
+        return
+    _ensure_keyword_index_queue(conn)
+    for lang, (table, _, _) in KEYWORD_INDEXES.items():
+        if _ensure_keyword_index_table(conn, table):
+            _rebuild_keyword_index(conn, lang)
+    conn.commit()
+    _KEYWORD_INDEX_READY.add(key)
+
+
+def _decision_keyword_entries(rows, lang: str) -> list:
+    _, fields, tokenizer = KEYWORD_INDEXES[lang]
     entries = []
     for row in rows:
         decision_id = row[0]
         tokens = set()
-        for idx, field in enumerate(FRENCH_INDEX_FIELDS, start=1):
-            tokens.update(extract_french_tokens(row[idx]))
-        for token in tokens:
-            entries.append((token, decision_id))
+        for idx, field in enumerate(fields, start=1):
+            tokens.update(tokenizer(row[idx]))
+        entries.extend((token, decision_id) for token in tokens)
+    return entries
+
+
+def _rebuild_keyword_index(conn: sqlite3.Connection, lang: str) -> int:
+    table, fields, _ = KEYWORD_INDEXES[lang]
+    cursor = conn.cursor()
+    cursor.execute(f"DELETE FROM {table}")
+    cursor.execute(f"""
+        SELECT id, {', '.join(fields)}
+        FROM supreme_court_decisions
+    """)
+    entries = _decision_keyword_entries(cursor.fetchall(), lang)
     if entries:
         cursor.executemany(f"""
-            INSERT INTO {FRENCH_INDEX_TABLE}(token, decision_id)
+            INSERT OR IGNORE INTO {table}(token, decision_id)
             VALUES (?, ?)
         """, entries)
-    conn.commit()
+    get_posting_cache(DB_PATH).invalidate('token')
     return len(entries)
 
 
+def rebuild_french_index_entries(conn: sqlite3.Connection) -> int:
+    ensure_keyword_indexes(conn)
+    inserted = _rebuild_keyword_index(conn, 'fr')
+    conn.commit()
+    return inserted
+
+
+def rebuild_arabic_index_entries(conn: sqlite3.Connection) -> int:
+    ensure_keyword_indexes(conn)
+    inserted = _rebuild_keyword_index(conn, 'ar')
+    conn.commit()
+    return inserted
+
+
+def reindex_decisions(conn: sqlite3.Connection, decision_ids: list[int]) -> int:
+    """Réindexe quelques décisions (FR + AR) ; les décisions supprimées sont retirées."""
+    if not decision_ids:
+        return 0
+    inserted = 0
+    cursor = conn.cursor()
+    for start in range(0, len(decision_ids), 500):
+        chunk = decision_ids[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        for lang, (table, fields, _) in KEYWORD_INDEXES.items():
+            cursor.execute(f"DELETE FROM {table} WHERE decision_id IN ({placeholders})", chunk)
+            cursor.execute(f"""
+                SELECT id, {', '.join(fields)}
+                FROM supreme_court_decisions
+                WHERE id IN ({placeholders})
+            """, chunk)
+            entries = _decision_keyword_entries(cursor.fetchall(), lang)
+            if entries:
+                cursor.executemany(f"INSERT OR IGNORE INTO {table}(token, decision_id) VALUES (?, ?)", entries)
+                inserted += len(entries)
+    get_posting_cache(DB_PATH).invalidate('token')
+    return inserted
+
+
+def process_keyword_index_queue(conn: sqlite3.Connection) -> int:
+    """Vide la file de réindexation. Retourne le nombre de décisions traitées."""
+    ensure_keyword_indexes(conn)
+    decision_ids = [
+        row[0] for row in conn.execute(f"SELECT decision_id FROM {KEYWORD_INDEX_QUEUE_TABLE} ORDER BY decision_id")
+    ]
+    if not decision_ids:
+        return 0
+    reindex_decisions(conn, decision_ids)
+    for start in range(0, len(decision_ids), 500):
+        chunk = decision_ids[start:start + 500]
+        conn.execute(
+            f"DELETE FROM {KEYWORD_INDEX_QUEUE_TABLE} WHERE decision_id IN ({','.join('?' * len(chunk))})",
+            chunk
+        )
+    conn.commit()
+    # Insertions/suppressions de décisions passent aussi par la file
+    get_posting_cache(DB_PATH).invalidate('all')
+    return len(decision_ids)
+
+
+def drain_keyword_index_queue() -> int:
+    """Vide la file après une écriture (collecte, suppression) sur une connexion dédiée."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return process_keyword_index_queue(conn)
+    finally:
+        conn.close()
+
+
+def _ensure_search_schema():
+    """Date ISO, index mots-clés et projections : migrations faites une fois à l'import, pas dans les lectures."""
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        backfilled = ensure_decision_date_column(conn)
+        if backfilled:
+            print(f"✅ {backfilled} décisions : date ISO renseignée")
+        ensure_keyword_indexes(conn)
+        ensure_decision_status(conn)
+        ensure_facet_counts(conn)
+    except sqlite3.Error as exc:
+        print(f"⚠️  Schéma de recherche Cour suprême indisponible: {exc}")
+    finally:
+        conn.close()
+
+
+def check_keyword_indexes(conn: sqlite3.Connection) -> dict:
+    """
+    Contrôle de cohérence peu coûteux (recherches par index, aucune re-tokenisation) :
+    décisions avec texte mais sans entrée, entrées orphelines, file en attente.
+    """
+    ensure_keyword_indexes(conn)
+    report = {
+        'queued': conn.execute(f"SELECT COUNT(*) FROM {KEYWORD_INDEX_QUEUE_TABLE}").fetchone()[0],
+        'indexes': {},
+    }
+    for lang, (table, fields, _) in KEYWORD_INDEXES.items():
+        has_text = ' OR '.join(f"COALESCE({field}, '') != ''" for field in fields)
+        missing = [row[0] for row in conn.execute(f"""
+            SELECT d.id FROM supreme_court_decisions d
+            WHERE ({has_text})
+              AND NOT EXISTS (SELECT 1 FROM {table} k WHERE k.decision_id = d.id)
+              AND NOT EXISTS (SELECT 1 FROM {KEYWORD_INDEX_QUEUE_TABLE} q WHERE q.decision_id = d.id)
+        """)]
+        orphans = [row[0] for row in conn.execute(f"""
+            SELECT DISTINCT k.decision_id FROM {table} k
+            LEFT JOIN supreme_court_decisions d ON d.id = k.decision_id
+            WHERE d.id IS NULL
+        """)]
+        report['indexes'][lang] = {
+            'table': table,
+            'entries': conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0],
+            'missing_decisions': missing,
+            'orphan_decisions': orphans,
+        }
+    return report
+
+
 def tokenize_query_param(value: str) -> list:
+    """Jetons d'un paramètre de recherche : ('fr', jeton) ou ('ar', jeton)."""
     tokens = []
     for part in value.split(','):
-        tokens.extend(extract_french_tokens(part))
-    return [token for token in tokens if token]
+        tokens.extend(('fr', token) for token in extract_french_tokens(part))
+        tokens.extend(('ar', token) for token in extract_arabic_tokens(part))
+    return [(lang, token) for lang, token in tokens if token]
 
 
-def get_decision_ids_for_token(cursor: sqlite3.Cursor, token: str) -> set:
-    cursor.execute(f"SELECT decision_id FROM {FRENCH_INDEX_TABLE} WHERE token = ?", (token,))
+def get_decision_ids_for_token(cursor: sqlite3.Cursor, token, language_scope: str = 'both') -> set:
+    """Décisions contenant le jeton, via l'index de sa langue (vide hors périmètre)."""
+    lang, value = token if isinstance(token, tuple) else ('fr', token)
+    if language_scope not in (lang, 'both'):
+        return set()
+    table = KEYWORD_INDEXES[lang][0]
+    cursor.execute(f"SELECT decision_id FROM {table} WHERE token = ?", (value,))
     return {row[0] for row in cursor.fetchall()}
 
 
-def get_decision_ids_for_classification(
-    cursor: sqlite3.Cursor,
-    column: str,
-    ids: list[int],
-    require_all: bool = False,
-) -> set:
-    """Récupère les décisions qui matchent un ensemble de chambres/thèmes.
-    require_all=True => l'entrée doit contenir TOUTES les valeurs fournies (AND via HAVING).
-    require_all=False => au moins une correspondance (IN).
-    """
-    if not ids:
-        return set()
-    placeholders = ','.join('?' for _ in ids)
-    if require_all:
-        cursor.execute(f"""
-            SELECT decision_id
-            FROM supreme_court_decision_classifications
-            WHERE {column} IN ({placeholders})
-            GROUP BY decision_id
-            HAVING COUNT(DISTINCT {column}) >= ?
-        """, (*ids, len(ids)))
-    else:
+def get_token_bitmap(cursor: sqlite3.Cursor, token: tuple):
+    """Posting list d'un jeton ('fr'|'ar', valeur) sous forme de bitmap mis en cache."""
+    lang, value = token
+    return get_posting_cache(DB_PATH).get(
+        ('token', lang, value),
+        lambda: get_decision_ids_for_token(cursor, token)
+    )
+
+
+def get_classification_bitmap(cursor: sqlite3.Cursor, column: str, value: int):
+    """Décisions d'une chambre (`chamber_id`) ou d'un thème (`theme_id`), en bitmap mis en cache."""
+    def load():
         cursor.execute(f"""
             SELECT DISTINCT decision_id
             FROM supreme_court_decision_classifications
-            WHERE {column} IN ({placeholders})
-        """, ids)
-    return {row[0] for row in cursor.fetchall()}
+            WHERE {column} = ?
+        """, (value,))
+        return [row[0] for row in cursor.fetchall()]
+    return get_posting_cache(DB_PATH).get(('classification', column, value), load)
 
 
 def get_embedding_model():
@@ -242,44 +428,19 @@ def get_embedding_model():
     if EMBEDDING_MODEL is not None:
         return EMBEDDING_MODEL
     if not USE_SEMANTIC_SEARCH:
-        fallback_results, fallback_count = run_text_fallback(limit)
-        return jsonify({
-            'results': fallback_results,
-            'count': fallback_count,
-            'max_score': None,
-            'min_score': None,
-            'score_threshold': score_threshold,
-            'limit': limit,
-            'error': 'semantic search disabled, fallback applied'
-        })
+        return None
 
     try:
         from sentence_transformers import SentenceTransformer
     except Exception:
         return None
-    EMBEDDING_MODEL = SentenceTransformer('all-MiniLM-L6-v2')
+    EMBEDDING_MODEL = SentenceTransformer(EMBEDDING_MODEL_NAME)
     return EMBEDDING_MODEL
 
 
-def decode_embedding(blob):
-    if not blob:
-        return None
-    if isinstance(blob, memoryview):
-        blob = blob.tobytes()
-    return np.frombuffer(blob, dtype=np.float32)
-
-
-def cosine_similarity(query_vec, target_vec):
-    if query_vec is None or target_vec is None:
-        return None
-    numerator = float(np.dot(query_vec, target_vec))
-    denominator = np.linalg.norm(query_vec) * np.linalg.norm(target_vec)
-    if denominator == 0:
-        return None
-    return numerator / denominator
-
 coursupreme_bp = Blueprint('coursupreme', __name__)
 DB_PATH = 'harvester.db'
+_ensure_search_schema()
 
 HARVESTERS_DIR = Path(__file__).resolve().parents[2] / 'harvesters'
 if str(HARVESTERS_DIR) not in sys.path:
@@ -330,15 +491,14 @@ def get_chambers():
         conn.create_function("normalize_text", 1, lambda value: normalize_term(value))
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
-        cursor.execute("""
+        ensure_facet_counts(conn)
+        cursor.execute(f"""
             SELECT c.id, c.name_ar, c.name_fr,
-                   COUNT(DISTINCT sct.id) as theme_count,
-                   COUNT(DISTINCT scd.id) as decision_count
+                   (SELECT COUNT(*) FROM supreme_court_themes sct WHERE sct.chamber_id = c.id) as theme_count,
+                   COALESCE(fc.decision_count, 0) as decision_count
             FROM supreme_court_chambers c
-            LEFT JOIN supreme_court_themes sct ON c.id = sct.chamber_id
-            LEFT JOIN supreme_court_decision_classifications scdc ON sct.id = scdc.theme_id
-            LEFT JOIN supreme_court_decisions scd ON scdc.decision_id = scd.id
-            GROUP BY c.id
+            LEFT JOIN {FACET_COUNTS_TABLE} fc ON fc.facet = 'chamber' AND fc.facet_id = c.id
+            ORDER BY c.id
         """)
         chambers = [dict(row) for row in cursor.fetchall()]
         conn.close()
@@ -361,6 +521,7 @@ def collect_decisions():
 
         if chamber_id:
             result = harvester.harvest_section(chamber_id)
+            drain_keyword_index_queue()
             return jsonify({
                 'success': True,
                 'mode': 'section',
@@ -369,6 +530,7 @@ def collect_decisions():
             })
 
         stats = harvester.harvest_incremental()
+        drain_keyword_index_queue()
         return jsonify({
             'success': True,
             'mode': 'incremental',
@@ -384,13 +546,14 @@ def get_themes(chamber_id):
         conn = sqlite3.connect(DB_PATH)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
-        cursor.execute("""
+        ensure_facet_counts(conn)
+        cursor.execute(f"""
             SELECT t.id, t.name_ar, t.name_fr,
-                   COUNT(DISTINCT scdc.decision_id) as decision_count
+                   COALESCE(fc.decision_count, 0) as decision_count
             FROM supreme_court_themes t
-            LEFT JOIN supreme_court_decision_classifications scdc ON t.id = scdc.theme_id
+            LEFT JOIN {FACET_COUNTS_TABLE} fc ON fc.facet = 'theme' AND fc.facet_id = t.id
             WHERE t.chamber_id = ?
-            GROUP BY t.id
+            ORDER BY t.id
         """, (chamber_id,))
         themes = [dict(row) for row in cursor.fetchall()]
         conn.close()
@@ -494,21 +657,53 @@ def get_metadata(decision_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def _fetch_decisions_in_order(cursor: sqlite3.Cursor, ids: list[int], columns: str) -> list[dict]:
+    """Charge les décisions `ids` en conservant l'ordre fourni (rang FTS, score...)."""
+    if not ids:
+        return []
+    placeholders = ','.join('?' * len(ids))
+    cursor.execute(f"""
+        SELECT {columns}
+        FROM supreme_court_decisions
+        WHERE id IN ({placeholders})
+    """, ids)
+    rows = {row['id']: dict(row) for row in cursor.fetchall()}
+    return [rows[decision_id] for decision_id in ids if decision_id in rows]
+
+
 @coursupreme_bp.route('/search', methods=['GET'])
 def search():
     from flask import request
-    query = request.args.get('q', '')
+    query = request.args.get('q', '').strip()
     try:
         conn = sqlite3.connect(DB_PATH)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
+        ranked = search_decision_ids(conn, query, limit=50) if query else []
+        if ranked is None:
+            # SQLite sans FTS5 : ancien parcours LIKE
+            cursor.execute("""
+                SELECT id, decision_number, decision_date, object_ar
+                FROM supreme_court_decisions
+                WHERE decision_number LIKE ? OR decision_date LIKE ? OR object_ar LIKE ?
+                LIMIT 50
+            """, (f'%{query}%', f'%{query}%', f'%{query}%'))
+            results = [dict(row) for row in cursor.fetchall()]
+            conn.close()
+            return jsonify({'results': results})
+
+        # Numéro / date exacts d'abord, puis les correspondances plein texte par pertinence
         cursor.execute("""
-            SELECT id, decision_number, decision_date, object_ar
-            FROM supreme_court_decisions
-            WHERE decision_number LIKE ? OR decision_date LIKE ? OR object_ar LIKE ?
+            SELECT id FROM supreme_court_decisions
+            WHERE decision_number = ? OR decision_date = ?
             LIMIT 50
-        """, (f'%{query}%', f'%{query}%', f'%{query}%'))
-        results = [dict(row) for row in cursor.fetchall()]
+        """, (query, query))
+        ordered_ids = [row['id'] for row in cursor.fetchall()]
+        seen = set(ordered_ids)
+        ordered_ids.extend(decision_id for decision_id, _ in ranked if decision_id not in seen)
+        results = _fetch_decisions_in_order(
+            cursor, ordered_ids[:50], "id, decision_number, decision_date, object_ar"
+        )
         conn.close()
         return jsonify({'results': results})
     except Exception as e:
@@ -535,7 +730,10 @@ def delete_decision(decision_id):
         # Supprimer de la BD
         cursor.execute("DELETE FROM supreme_court_decisions WHERE id = ?", (decision_id,))
         conn.commit()
+        process_keyword_index_queue(conn)
         conn.close()
+        get_decision_index(DB_PATH).remove(decision_id)
+        get_posting_cache(DB_PATH).invalidate()
         
         # Supprimer les objets R2
         deleted_files = []
@@ -559,129 +757,89 @@ def delete_decision(decision_id):
 
 @coursupreme_bp.route('/decisions/status', methods=['GET'])
 def get_decisions_status():
-    """Récupérer toutes les décisions avec leur statut de complétion détaillé"""
+    """
+    Décisions avec leur statut de complétion, lues depuis la projection `decision_status`.
+
+    Filtres optionnels : downloaded / translated / analyzed / embeddings
+    (listes de statuts séparés par des virgules), chambers, themes (ids),
+    decision_number (préfixe). Pagination avec limit / offset ; sans
+    `limit`, toutes les décisions sont renvoyées (comportement historique).
+    """
     try:
+        conditions = []
+        params = []
+        for column in STATUS_COLUMNS:
+            values = [v for v in request.args.get(column, '').split(',') if v in STATUS_VALUES]
+            if values:
+                conditions.append(f"s.{column} IN ({','.join('?' * len(values))})")
+                params.extend(values)
+        for column, arg in (('chamber_id', 'chambers'), ('theme_id', 'themes')):
+            ids = _parse_id_list(request.args.get(arg, ''))
+            if ids:
+                conditions.append(
+                    f"s.decision_id IN (SELECT decision_id FROM supreme_court_decision_classifications "
+                    f"WHERE {column} IN ({','.join('?' * len(ids))}))"
+                )
+                params.extend(ids)
+        decision_number = request.args.get('decision_number', '').strip()
+        if decision_number:
+            conditions.append("s.decision_number LIKE ?")
+            params.append(f"{decision_number}%")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        limit = request.args.get('limit', type=int)
+        if limit is not None:
+            limit = max(1, min(limit, 1000))
+        offset = max(0, request.args.get('offset', 0, type=int))
+        page = 'LIMIT ? OFFSET ?' if limit is not None else ''
+
         conn = sqlite3.connect(DB_PATH)
         conn.row_factory = sqlite3.Row
+        ensure_decision_status(conn)
         cursor = conn.cursor()
 
-        # Récupérer toutes les décisions avec leurs statuts
-        cursor.execute("""
-            SELECT
-                d.id,
-                d.decision_number,
-                d.decision_date,
-                d.url,
-                d.file_path_ar,
-                d.file_path_fr,
-                d.html_content_ar,
-                d.html_content_fr,
-                d.title_ar,
-                d.title_fr,
-            d.summary_ar,
-            d.summary_fr,
-            d.object_ar,
-            d.object_fr,
-                d.keywords_ar,
-                d.keywords_fr,
-                d.entities_ar,
-                d.entities_fr,
-                d.embedding_ar,
-                d.embedding_fr
-            FROM supreme_court_decisions d
-            ORDER BY d.decision_date DESC, d.decision_number DESC
-        """)
-
-        decisions_raw = cursor.fetchall()
-        decisions = []
-
-        for row in decisions_raw:
-            dec = dict(row)
-
-            has_file_ar = bool(dec['file_path_ar'])
-            has_html_ar = bool(dec['html_content_ar'])
-            has_file_fr = bool(dec['file_path_fr'])
-            has_html_fr = bool(dec['html_content_fr'])
-
-            downloaded_status = 'complete' if (has_file_ar or has_html_ar) else 'missing'
-            translated_status = 'complete' if (has_file_fr or has_html_fr) else 'missing'
-
-            # Calcul du statut "analyzed"
-            has_title_ar = bool(dec['title_ar'])
-            has_title_fr = bool(dec['title_fr'])
-            has_summary_ar = bool(dec['summary_ar'])
-            has_summary_fr = bool(dec['summary_fr'])
-            has_keywords_ar = bool(dec['keywords_ar'])
-            has_keywords_fr = bool(dec['keywords_fr'])
-            has_entities_ar = bool(dec['entities_ar'])
-            has_entities_fr = bool(dec['entities_fr'])
-
-            analyzed_ar = has_title_ar and has_summary_ar and has_keywords_ar and has_entities_ar
-            analyzed_fr = has_title_fr and has_summary_fr and has_keywords_fr and has_entities_fr
-
-            if analyzed_ar and analyzed_fr:
-                analyzed_status = 'complete'
-            elif analyzed_ar or analyzed_fr or has_title_ar or has_title_fr:
-                analyzed_status = 'partial'
-            else:
-                analyzed_status = 'missing'
-
-            # Calcul du statut "embeddings"
-            has_embedding_ar = bool(dec['embedding_ar'])
-            has_embedding_fr = bool(dec['embedding_fr'])
-
-            if has_embedding_ar and has_embedding_fr:
-                embeddings_status = 'complete'
-            elif has_embedding_ar or has_embedding_fr:
-                embeddings_status = 'partial'
-            else:
-                embeddings_status = 'missing'
-
-            # Récupérer les chambres et thèmes
-            cursor.execute("""
-                SELECT DISTINCT c.name_fr, c.name_ar
-                FROM supreme_court_chambers c
-                JOIN supreme_court_decision_classifications dc ON c.id = dc.chamber_id
-                WHERE dc.decision_id = ?
-            """, (dec['id'],))
-            chambers_raw = cursor.fetchall()
-            chambers = [{'name_fr': c['name_fr'], 'name_ar': c['name_ar']} for c in chambers_raw]
-
-            cursor.execute("""
-                SELECT DISTINCT t.name_fr, t.name_ar
-                FROM supreme_court_themes t
-                JOIN supreme_court_decision_classifications dc ON t.id = dc.theme_id
-                WHERE dc.decision_id = ?
-            """, (dec['id'],))
-            themes_raw = cursor.fetchall()
-            themes = [{'name_fr': t['name_fr'], 'name_ar': t['name_ar']} for t in themes_raw]
-
-            # Construire l'objet décision
-            decisions.append({
-                'id': dec['id'],
-                'decision_number': dec['decision_number'],
-                'decision_date': dec['decision_date'],
-                'url': dec['url'],
-                'status': {
-                    'downloaded': downloaded_status,
-                    'translated': translated_status,
-                    'analyzed': analyzed_status,
-                    'embeddings': embeddings_status
-                },
-                'chambers': chambers,
-                'themes': themes,
-                'summary_ar': dec['summary_ar'],
-                'summary_fr': dec['summary_fr'],
-                'object_ar': dec['object_ar'],
-                'object_fr': dec['object_fr']
-            })
+        total = None
+        if limit is not None:
+            cursor.execute(f"SELECT COUNT(*) FROM {STATUS_TABLE} s {where}", params)
+            total = cursor.fetchone()[0]
 
+        cursor.execute(f"""
+            SELECT s.*, d.summary_ar, d.summary_fr, d.object_ar, d.object_fr
+            FROM (
+                SELECT * FROM {STATUS_TABLE} s
+                {where}
+                ORDER BY s.decision_date_iso DESC, s.decision_number DESC
+                {page}
+            ) s
+            JOIN supreme_court_decisions d ON d.id = s.decision_id
+            ORDER BY s.decision_date_iso DESC, s.decision_number DESC
+        """, params + ([limit, offset] if limit is not None else []))
+
+        decisions = [
+            {
+                'id': row['decision_id'],
+                'decision_number': row['decision_number'],
+                'decision_date': row['decision_date'],
+                'url': row['url'],
+                'status': {column: row[column] for column in STATUS_COLUMNS},
+                'chambers': json.loads(row['chambers']),
+                'themes': json.loads(row['themes']),
+                'summary_ar': row['summary_ar'],
+                'summary_fr': row['summary_fr'],
+                'object_ar': row['object_ar'],
+                'object_fr': row['object_fr']
+            }
+            for row in cursor.fetchall()
+        ]
         conn.close()
 
-        return jsonify({
+        response = {
             'decisions': decisions,
             'count': len(decisions)
-        })
+        }
+        if limit is not None:
+            response.update({'total': total, 'limit': limit, 'offset': offset})
+        return jsonify(response)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -954,6 +1112,7 @@ def batch_translate():
                 results['failed'].append(dec['number'])
         
         conn.commit()
+        process_keyword_index_queue(conn)
         conn.close()
         
         return jsonify({
@@ -1144,6 +1303,7 @@ Réponds UNIQUEMENT avec le JSON, sans texte avant ou après."""}
                 cursor.execute("""
                     UPDATE supreme_court_decisions
                     SET decision_date = COALESCE(?, decision_date),
+                        decision_date_iso = COALESCE(?, decision_date_iso),
                         summary_ar = ?,
                         summary_fr = ?,
                         title_ar = ?,
@@ -1155,6 +1315,7 @@ Réponds UNIQUEMENT avec le JSON, sans texte avant ou après."""}
                         updated_at = CURRENT_TIMESTAMP
                     WHERE id = ?
                 """, (
+                    chosen_date,
                     chosen_date,
                     ar_json.get('summary'),
                     fr_json.get('summary'),
@@ -1175,6 +1336,7 @@ Réponds UNIQUEMENT avec le JSON, sans texte avant ou après."""}
                 results['failed'].append(dec['number'])
         
         conn.commit()
+        process_keyword_index_queue(conn)
         conn.close()
         
         return jsonify({
@@ -1286,6 +1448,7 @@ def batch_embed():
             'failed': [],
             'skipped': already_embedded
         }
+        embedded_vectors = []
         
         for dec in to_embed:
             try:
@@ -1325,6 +1488,7 @@ def batch_embed():
                         updated_at = CURRENT_TIMESTAMP
                     WHERE id = ?
                 """, (embedding_bytes_fr, embedding_bytes_ar, dec['id']))
+                embedded_vectors.append((dec['id'], embedding_vector_ar, embedding_vector_fr))
                 
                 results['success'].append(dec['number'])
                 print(f"   ✅ {dec['number']} embeddings générés (FR: {len(embedding_bytes_fr)} bytes, AR: {len(embedding_bytes_ar)} bytes)")
@@ -1335,6 +1499,11 @@ def batch_embed():
         
         conn.commit()
         conn.close()
+
+        # Rafraîchir l'index résident avec les nouveaux vecteurs
+        decision_index = get_decision_index(DB_PATH)
+        for decision_id, vector_ar, vector_fr in embedded_vectors:
+            decision_index.upsert(decision_id, embedding_ar=vector_ar, embedding_fr=vector_fr)
         
         return jsonify({
             'success_count': len(results['success']),
@@ -1495,6 +1664,96 @@ def rebuild_french_index():
         return jsonify({'error': str(e)}), 500
 
 
+@coursupreme_bp.route('/index/arabic/rebuild', methods=['POST'])
+def rebuild_arabic_index():
+    """Regénérer l’index inversé arabe."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        inserted = rebuild_arabic_index_entries(conn)
+        conn.close()
+        return jsonify({'inserted': inserted, 'stemming': ARABIC_LIGHT_STEMMING})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@coursupreme_bp.route('/index/keywords/check', methods=['GET'])
+def check_keyword_index():
+    """Vérifier la cohérence des index mots-clés (repair=1 pour réindexer les écarts)."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        report = check_keyword_indexes(conn)
+        if request.args.get('repair') in ('1', 'true'):
+            to_fix = set()
+            for details in report['indexes'].values():
+                to_fix.update(details['missing_decisions'])
+                to_fix.update(details['orphan_decisions'])
+            reindex_decisions(conn, sorted(to_fix))
+            conn.commit()
+            report['repaired'] = len(to_fix)
+            report['processed_queue'] = process_keyword_index_queue(conn)
+        conn.close()
+        return jsonify(report)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@coursupreme_bp.route('/index/fts/rebuild', methods=['POST'])
+def rebuild_fts_index():
+    """Reconstruire l'index plein texte FTS5 (FR + AR)."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        indexed = rebuild_decision_fts(conn)
+        conn.close()
+        return jsonify({'indexed': indexed})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@coursupreme_bp.route('/index/facets/rebuild', methods=['POST'])
+def rebuild_facet_index():
+    """Recalculer les compteurs chambres/thèmes de l'accordéon."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        facets = rebuild_facet_counts(conn)
+        conn.close()
+        return jsonify({'facets': facets})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@coursupreme_bp.route('/index/status/rebuild', methods=['POST'])
+def rebuild_status_index():
+    """Reconstruire la projection des statuts de complétion."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        decisions = rebuild_decision_status(conn)
+        conn.close()
+        return jsonify({'decisions': decisions})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@coursupreme_bp.route('/index/stats/rebuild', methods=['POST'])
+def rebuild_stats_index():
+    """Recalculer les compteurs de /stats en un seul parcours des décisions."""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        stats = rebuild_stats_counters(conn, 'coursupreme')
+        conn.close()
+        return jsonify({'stats': stats})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@coursupreme_bp.route('/search/embedding-cache', methods=['GET'])
+def query_embedding_cache_stats():
+    """Compteurs du cache d'embeddings de requêtes (?clear=1 pour vider la mémoire)."""
+    cache = get_query_embedding_cache()
+    if request.args.get('clear') == '1':
+        cache.clear()
+    return jsonify(cache.stats())
+
+
 @coursupreme_bp.route('/search/advanced', methods=['GET'])
 def advanced_search():
     """Recherche avancée avec keywords inclusifs/exclusifs et dates"""
@@ -1511,13 +1770,20 @@ def advanced_search():
     themes_inc = _parse_id_list(request.args.get('themes_inc', ''))
     themes_or = _parse_id_list(request.args.get('themes_or', ''))
 
-    keywords_inc_tokens = tokenize_query_param(keywords_inc)
-    keywords_or_tokens = tokenize_query_param(keywords_or)
-    keywords_exc_tokens = tokenize_query_param(keywords_exc)
+    if language_scope not in ('ar', 'fr', 'both'):
+        language_scope = 'both'
+
+    def scoped_tokens(value: str) -> list:
+        # Les jetons d'une autre langue que le périmètre choisi sont ignorés
+        return [token for token in tokenize_query_param(value) if language_scope in (token[0], 'both')]
+
+    keywords_inc_tokens = scoped_tokens(keywords_inc)
+    keywords_or_tokens = scoped_tokens(keywords_or)
+    keywords_exc_tokens = scoped_tokens(keywords_exc)
 
     try:
+        # Lecture seule : schéma préparé à l'import, file vidée par les routes d'écriture
         conn = sqlite3.connect(DB_PATH)
-        ensure_french_index(conn)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
@@ -1533,106 +1799,102 @@ def advanced_search():
             order_params.append(f"{decision_number}%")
 
         if date_from:
-            where_clauses.append(f"{NORMALIZED_DECISION_DATE} >= ?")
+            where_clauses.append(f"{DATE_ISO_COLUMN} >= ?")
             params.append(parse_fuzzy_date(date_from))
         if date_to:
-            where_clauses.append(f"{NORMALIZED_DECISION_DATE} <= ?")
+            where_clauses.append(f"{DATE_ISO_COLUMN} <= ?")
             params.append(parse_fuzzy_date(date_to, is_end=True))
 
-        order_parts.append("decision_date DESC")
+        order_parts.append(f"{DATE_ISO_COLUMN} DESC")
         order_parts.append("decision_number ASC")
 
-        candidate_ids = None
-        def intersect_ids(new_ids: set):
-            nonlocal candidate_ids
-            if new_ids is None:
-                return
-            if candidate_ids is None:
-                candidate_ids = set(new_ids)
-            else:
-                candidate_ids &= set(new_ids)
-            return candidate_ids
-
-        if keywords_inc_tokens:
-            for token in keywords_inc_tokens:
-                ids = get_decision_ids_for_token(cursor, token)
-                intersect_ids(ids)
-                if candidate_ids is not None and not candidate_ids:
-                    cursor.close()
-                    conn.close()
-                    return jsonify({'results': [], 'count': 0})
+        cache = get_posting_cache(DB_PATH)
+        candidate = None
 
-        if keywords_or_tokens:
-            or_ids = set()
-            for token in keywords_or_tokens:
-                or_ids |= get_decision_ids_for_token(cursor, token)
-            intersect_ids(or_ids if or_ids else set())
-            if candidate_ids is not None and not candidate_ids:
-                cursor.close()
-                conn.close()
-                return jsonify({'results': [], 'count': 0})
-
-        if chambers_inc:
-            ids = get_decision_ids_for_classification(cursor, "chamber_id", chambers_inc, require_all=True)
-            intersect_ids(ids)
-            if candidate_ids is not None and not candidate_ids:
-                cursor.close()
-                conn.close()
-                return jsonify({'results': [], 'count': 0})
-
-        if themes_inc:
-            ids = get_decision_ids_for_classification(cursor, "theme_id", themes_inc, require_all=True)
-            intersect_ids(ids)
-            if candidate_ids is not None and not candidate_ids:
-                cursor.close()
-                conn.close()
-                return jsonify({'results': [], 'count': 0})
-
-        if candidate_ids is not None:
-            where_clauses.append(f"id IN ({','.join('?' for _ in candidate_ids)})")
-            params.extend(sorted(candidate_ids))
+        def restrict(bitmap):
+            nonlocal candidate
+            candidate = bitmap if candidate is None else candidate & bitmap
 
-        if chambers_or:
-            where_clauses.append(f"id IN (SELECT decision_id FROM supreme_court_decision_classifications WHERE chamber_id IN ({','.join('?' for _ in chambers_or)}))")
-            params.extend(chambers_or)
+        def union(bitmaps):
+            result = Bitmap()
+            for bitmap in bitmaps:
+                result = result | bitmap
+            return result
+
+        def empty_response():
+            conn.close()
+            return jsonify({'results': [], 'count': 0})
 
+        for token in keywords_inc_tokens:
+            restrict(get_token_bitmap(cursor, token))
+            if not candidate:
+                return empty_response()
+
+        if keywords_or_tokens:
+            restrict(union(get_token_bitmap(cursor, token) for token in keywords_or_tokens))
+            if not candidate:
+                return empty_response()
+
+        for chamber_id in chambers_inc:
+            restrict(get_classification_bitmap(cursor, 'chamber_id', chamber_id))
+        for theme_id in themes_inc:
+            restrict(get_classification_bitmap(cursor, 'theme_id', theme_id))
+        if chambers_or:
+            restrict(union(get_classification_bitmap(cursor, 'chamber_id', cid) for cid in chambers_or))
         if themes_or:
-            where_clauses.append(f"id IN (SELECT decision_id FROM supreme_court_decision_classifications WHERE theme_id IN ({','.join('?' for _ in themes_or)}))")
-            params.extend(themes_or)
+            restrict(union(get_classification_bitmap(cursor, 'theme_id', tid) for tid in themes_or))
 
         if keywords_exc_tokens:
-            exc_ids = set()
-            for token in keywords_exc_tokens:
-                exc_ids |= get_decision_ids_for_token(cursor, token)
-            if exc_ids:
-                where_clauses.append(f"id NOT IN ({','.join('?' for _ in exc_ids)})")
-                params.extend(sorted(exc_ids))
+            excluded = union(get_token_bitmap(cursor, token) for token in keywords_exc_tokens)
+            if excluded:
+                if candidate is None:
+                    candidate = cache.get(('all',), lambda: [
+                        row[0] for row in cursor.execute("SELECT id FROM supreme_court_decisions")
+                    ])
+                candidate = candidate - excluded
 
-        where_sql = ' AND '.join(where_clauses) if where_clauses else '1=1'
-        order_parts_processed = [
-            part.replace('decision_date', NORMALIZED_DECISION_DATE)
-            if 'decision_date' in part else part
-            for part in order_parts
-        ]
-        order_sql = f"ORDER BY {', '.join(order_parts_processed)}" if order_parts_processed else f"ORDER BY {NORMALIZED_DECISION_DATE} DESC"
+        if candidate is not None and not candidate:
+            return empty_response()
 
-        query = f"""
-            SELECT id,
+        where_sql = ' AND '.join(where_clauses) if where_clauses else '1=1'
+        columns = """id,
                    decision_number,
                    decision_date,
                    object_ar,
                    object_fr,
-                   url
-            FROM supreme_court_decisions
-            WHERE {where_sql}
-            {order_sql}
-            LIMIT 100
-        """
+                   url"""
+
+        if candidate is None:
+            order_sql = f"ORDER BY {', '.join(order_parts)}"
+            cursor.execute(f"""
+                SELECT {columns}
+                FROM supreme_court_decisions
+                WHERE {where_sql}
+                {order_sql}
+                LIMIT 100
+            """, params + order_params)
+            rows = [dict(row) for row in cursor.fetchall()]
+        else:
+            # Candidats parcourus par blocs d'ids triés : clés de tri seulement, puis détail de la page
+            sort_rows = []
+            for chunk in sorted_id_chunks(candidate):
+                cursor.execute(f"""
+                    SELECT id, decision_number, {DATE_ISO_COLUMN} AS sort_date
+                    FROM supreme_court_decisions
+                    WHERE id IN ({','.join('?' * len(chunk))}) AND {where_sql}
+                """, chunk + params)
+                sort_rows.extend(cursor.fetchall())
+            # Tris stables successifs = ORDER BY [numéro préfixe,] date DESC, numéro ASC
+            sort_rows.sort(key=lambda row: row['decision_number'] or '')
+            sort_rows.sort(key=lambda row: row['sort_date'] or '', reverse=True)
+            if decision_number:
+                prefix = decision_number.lower()
+                sort_rows.sort(key=lambda row: 0 if (row['decision_number'] or '').lower().startswith(prefix) else 1)
+            page_ids = [row['id'] for row in sort_rows[:100]]
+            rows = _fetch_decisions_in_order(cursor, page_ids, columns)
 
-        cursor.execute(query, params + order_params)
         candidates = []
-        for row in cursor.fetchall():
-            entry = dict(row)
+        for entry in rows:
             entry['decision_date'] = format_display_date(entry.get('decision_date'))
             candidates.append(entry)
         conn.close()
@@ -1642,9 +1904,33 @@ def advanced_search():
         return jsonify({'error': str(e)}), 500
 
 
+SEMANTIC_RESULT_DEPTH = 1000
+SEMANTIC_FUSIONS = ('max', 'weighted')
+
+
+def _semantic_scope_params():
+    """Langue(s) scorée(s) et fusion AR/FR demandées (`language_scope`, `fusion`, `weight_ar`)."""
+    language_scope = request.args.get('language_scope', 'both')
+    if language_scope not in ('ar', 'fr', 'both'):
+        language_scope = 'both'
+    fusion = request.args.get('fusion', 'max')
+    if fusion not in SEMANTIC_FUSIONS:
+        fusion = 'max'
+    try:
+        weight_ar = max(0.0, min(float(request.args.get('weight_ar', 0.5)), 1.0))
+    except ValueError:
+        weight_ar = 0.5
+    return language_scope, fusion, {'ar': weight_ar, 'fr': 1.0 - weight_ar}
+
+
 @coursupreme_bp.route('/search/semantic', methods=['GET'])
 def semantic_search():
-    """Recherche sémantique par embedding (FR/AR/both)."""
+    """
+    Recherche sémantique par embedding (FR/AR/both).
+
+    Le classement (scores >= seuil) est calculé une fois puis mis en cache ;
+    `next_cursor` permet de lire les pages suivantes sans recalcul.
+    """
     query = request.args.get('q', '').strip()
     if not query:
         return jsonify({'error': 'Paramètre q requis'}), 400
@@ -1662,13 +1948,61 @@ def semantic_search():
         score_threshold = 0.35
     score_threshold = max(0.0, min(score_threshold, 1.0))
 
-    language_scope = request.args.get('language_scope', 'both')
+    language_scope, fusion, weights = _semantic_scope_params()
+    signature = {
+        'q': query,
+        'language_scope': language_scope,
+        'fusion': fusion,
+        'weights': weights,
+        'score_threshold': score_threshold,
+    }
+    result_cache = get_ranked_result_cache()
+
+    def semantic_page(token, ranked, offset):
+        page = ranked[offset:offset + limit]
+        scores = dict(page)
+        with sqlite3.connect(DB_PATH) as page_conn:
+            page_conn.row_factory = sqlite3.Row
+            rows = _fetch_decisions_in_order(
+                page_conn.cursor(),
+                [decision_id for decision_id, _ in page],
+                "id, decision_number, decision_date, object_ar, object_fr, summary_ar, summary_fr"
+            )
+        next_offset = offset + limit
+        return jsonify({
+            'results': [{**row, 'score': scores[row['id']]} for row in rows],
+            'count': len(ranked),
+            'offset': offset,
+            'next_cursor': encode_cursor(token, next_offset) if next_offset < len(ranked) else None,
+            'max_score': ranked[0][1] if ranked else None,
+            'min_score': ranked[-1][1] if ranked else None,
+            'score_threshold': score_threshold,
+            'limit': limit,
+            'mode': 'semantic'
+        })
+
+    # Page suivante : simple lecture d'ids dans le classement mis en cache
+    token, offset = decode_cursor(request.args.get('cursor'))
+    cached = result_cache.load(token, signature)
+    if cached is not None:
+        return semantic_page(token, cached, offset)
 
     def run_text_fallback(limit_count):
-        like_param = f"%{query}%"
         with sqlite3.connect(DB_PATH) as fallback_conn:
             fallback_conn.row_factory = sqlite3.Row
             fallback_cursor = fallback_conn.cursor()
+            ranked = search_decision_ids(
+                fallback_conn, query, limit=limit_count, language_scope=language_scope
+            )
+            if ranked is not None:
+                fallback_rows = _fetch_decisions_in_order(
+                    fallback_cursor,
+                    [decision_id for decision_id, _ in ranked],
+                    "id, decision_number, decision_date, object_ar, object_fr, summary_ar, summary_fr"
+                )
+                return fallback_rows, len(fallback_rows)
+
+            like_param = f"%{query}%"
             fallback_cursor.execute("""
                 SELECT
                     id, decision_number, decision_date,
@@ -1691,7 +2025,6 @@ def semantic_search():
         fallback_results, fallback_count = run_text_fallback(limit)
         return jsonify({
             'results': fallback_results[:limit],
-            'all_results': fallback_results,
             'count': fallback_count,
             'max_score': None,
             'min_score': None,
@@ -1704,7 +2037,6 @@ def semantic_search():
         fallback_results, fallback_count = run_text_fallback(limit)
         return jsonify({
             'results': fallback_results,
-            'all_results': fallback_results,
             'count': fallback_count,
             'max_score': None,
             'min_score': None,
@@ -1714,62 +2046,31 @@ def semantic_search():
         })
 
     try:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, decision_number, decision_date,
-                   object_ar, object_fr,
-                   summary_ar, summary_fr,
-                   embedding_ar, embedding_fr
-            FROM supreme_court_decisions
-            WHERE (embedding_fr IS NOT NULL AND embedding_fr != '')
-               OR (embedding_ar IS NOT NULL AND embedding_ar != '')
-        """)
-        rows = cursor.fetchall()
-        conn.close()
-
         model = get_embedding_model()
         if model is None:
             raise RuntimeError("embedding model unavailable")
-        query_vec = model.encode(query, convert_to_numpy=True)
+        query_vec = encode_query(model, EMBEDDING_MODEL_NAME, query)
 
-        scored = []  # Scores calculés sur embeddings FR uniquement
-        for row in rows:
-            emb_fr = decode_embedding(row['embedding_fr'])
-            score = cosine_similarity(query_vec, emb_fr)
-            if score is not None:
-                scored.append({
-                    'id': row['id'],
-                    'decision_number': row['decision_number'],
-                    'decision_date': row['decision_date'],
-                    'object_ar': row['object_ar'],
-                    'object_fr': row['object_fr'],
-                    'summary_ar': row['summary_ar'],
-                    'summary_fr': row['summary_fr'],
-                    'score': round(score, 4)
-                })
+        # Scores AR et/ou FR selon language_scope, fusionnés par décision en un seul passage vectorisé
+        ranked_ids, ranked_scores = get_decision_index(DB_PATH).search(
+            query_vec, lang=language_scope, fusion=fusion, weights=weights, limit=SEMANTIC_RESULT_DEPTH
+        )
 
-        scored.sort(key=lambda entry: entry['score'], reverse=True)
-        filtered = [entry for entry in scored if entry['score'] >= score_threshold]
-        returned = filtered[:limit] if filtered else []
-
-        if scored:
-            return jsonify({
-                'results': returned,
-                'all_results': scored,
-                'count': len(scored),
-                'max_score': scored[0]['score'],
-                'min_score': scored[-1]['score'],
-                'score_threshold': score_threshold,
-                'limit': limit,
-                'mode': 'semantic'
-            })
+        if len(ranked_ids):
+            # Top-k côté serveur : seuls les scores au-dessus du seuil sont conservés
+            ranked = []
+            for decision_id, score in zip(ranked_ids, ranked_scores):
+                score = round(float(score), 4)
+                if score < score_threshold or len(ranked) >= SEMANTIC_RESULT_DEPTH:
+                    break
+                ranked.append((int(decision_id), score))
+            token = result_cache.store(ranked, signature)
+            # Curseur expiré ou d'un autre processus : même position dans le classement recalculé
+            return semantic_page(token, ranked, offset)
 
         fallback_results, fallback_count = run_text_fallback(limit)
         return jsonify({
             'results': fallback_results,
-            'all_results': fallback_results,
             'count': fallback_count,
             'max_score': None,
             'min_score': None,
@@ -1781,7 +2082,6 @@ def semantic_search():
         fallback_results, fallback_count = run_text_fallback(limit)
         return jsonify({
             'results': fallback_results,
-            'all_results': fallback_results,
             'count': fallback_count,
             'max_score': None,
             'min_score': None,
@@ -1791,65 +2091,180 @@ def semantic_search():
         })
 
 
-@coursupreme_bp.route('/stats', methods=['GET'])
-def get_global_stats():
-    """Récupérer les statistiques globales pour Cour Suprême"""
+RRF_K = 60
+HYBRID_DEPTH = 200
+
+
+def reciprocal_rank_fusion(rankings: list[list[int]], k: int = RRF_K) -> list[tuple[int, float]]:
+    """Fusionne des classements d'ids : score = somme de 1 / (k + rang)."""
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, decision_id in enumerate(ranking, start=1):
+            scores[decision_id] = scores.get(decision_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def _build_filter_bitmap(cursor, chambers_inc, chambers_or, themes_inc, themes_or, date_from, date_to):
+    """Bitmap des décisions autorisées par les filtres chambre/thème/date (None si aucun filtre)."""
+    allowed = None
+
+    def restrict(bitmap):
+        nonlocal allowed
+        allowed = bitmap if allowed is None else allowed & bitmap
+
+    def union(bitmaps):
+        result = Bitmap()
+        for bitmap in bitmaps:
+            result = result | bitmap
+        return result
+
+    for chamber_id in chambers_inc:
+        restrict(get_classification_bitmap(cursor, 'chamber_id', chamber_id))
+    for theme_id in themes_inc:
+        restrict(get_classification_bitmap(cursor, 'theme_id', theme_id))
+    if chambers_or:
+        restrict(union(get_classification_bitmap(cursor, 'chamber_id', cid) for cid in chambers_or))
+    if themes_or:
+        restrict(union(get_classification_bitmap(cursor, 'theme_id', tid) for tid in themes_or))
+
+    if date_from or date_to:
+        clauses, params = [], []
+        if date_from:
+            clauses.append(f"{DATE_ISO_COLUMN} >= ?")
+            params.append(parse_fuzzy_date(date_from))
+        if date_to:
+            clauses.append(f"{DATE_ISO_COLUMN} <= ?")
+            params.append(parse_fuzzy_date(date_to, is_end=True))
+        cursor.execute(f"SELECT id FROM supreme_court_decisions WHERE {' AND '.join(clauses)}", params)
+        restrict(Bitmap(row[0] for row in cursor.fetchall()))
+
+    return allowed
+
+
+@coursupreme_bp.route('/search/hybrid', methods=['GET'])
+def hybrid_search():
+    """Recherche hybride : plein texte (BM25) + vecteurs, fusionnés par Reciprocal Rank Fusion."""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Paramètre q requis'}), 400
+
+    try:
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+        rrf_k = max(1, int(request.args.get('rrf_k', RRF_K)))
+    except ValueError:
+        return jsonify({'error': 'Paramètres limit/rrf_k invalides'}), 400
+
+    language_scope, fusion, weights = _semantic_scope_params()
+    chambers_inc = _parse_id_list(request.args.get('chambers_inc', ''))
+    chambers_or = _parse_id_list(request.args.get('chambers_or', ''))
+    themes_inc = _parse_id_list(request.args.get('themes_inc', ''))
+    themes_or = _parse_id_list(request.args.get('themes_or', ''))
+    date_from = request.args.get('date_from', '')
+    date_to = request.args.get('date_to', '')
+
     try:
         conn = sqlite3.connect(DB_PATH)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
+        allowed = _build_filter_bitmap(
+            cursor, chambers_inc, chambers_or, themes_inc, themes_or, date_from, date_to
+        )
+        if allowed is not None and not allowed:
+            conn.close()
+            return jsonify({'results': [], 'count': 0, 'mode': 'hybrid'})
 
-        # Total de décisions
-        cursor.execute("SELECT COUNT(*) as total FROM supreme_court_decisions")
-        total = cursor.fetchone()['total']
+        def is_allowed(decision_id):
+            return allowed is None or decision_id in allowed
 
-        # Décisions téléchargées (HTML arabe)
-        cursor.execute("""
-            SELECT COUNT(*) as downloaded
-            FROM supreme_court_decisions
-            WHERE download_status IN ('downloaded', 'completed')
-        """)
-        downloaded = cursor.fetchone()['downloaded']
+        def run_lexical():
+            lexical_conn = sqlite3.connect(DB_PATH)
+            try:
+                # Avec filtres, on prend toutes les correspondances pour ne pas perdre les décisions filtrées
+                ranked = search_decision_ids(
+                    lexical_conn, query,
+                    limit=None if allowed is not None else HYBRID_DEPTH,
+                    language_scope=language_scope
+                )
+            finally:
+                lexical_conn.close()
+            return [decision_id for decision_id, _ in (ranked or []) if is_allowed(decision_id)][:HYBRID_DEPTH]
+
+        def run_semantic():
+            model = get_embedding_model()
+            if model is None:
+                raise RuntimeError("embedding model unavailable")
+            query_vec = encode_query(model, EMBEDDING_MODEL_NAME, query)
+            # Filtres appliqués au vecteur de scores avant le top-k (pas de tri du corpus entier)
+            ids, scores = get_decision_index(DB_PATH).search(
+                query_vec, lang=language_scope, fusion=fusion, weights=weights,
+                limit=HYBRID_DEPTH, allowed=allowed
+            )
+            return [(int(decision_id), float(score)) for decision_id, score in zip(ids, scores)]
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            lexical_future = executor.submit(run_lexical)
+            semantic_future = executor.submit(run_semantic)
+            lexical_ids = lexical_future.result()
+            semantic_error = None
+            try:
+                semantic_ranked = semantic_future.result()
+            except Exception as exc:
+                semantic_ranked = []
+                semantic_error = str(exc)
+
+        semantic_ids = [decision_id for decision_id, _ in semantic_ranked]
+        fused = reciprocal_rank_fusion([lexical_ids, semantic_ids], k=rrf_k)
+        page = fused[:limit]
+
+        lexical_rank = {decision_id: rank for rank, decision_id in enumerate(lexical_ids, start=1)}
+        semantic_rank = {decision_id: rank for rank, decision_id in enumerate(semantic_ids, start=1)}
+        semantic_score = dict(semantic_ranked)
+
+        rows = _fetch_decisions_in_order(
+            cursor,
+            [decision_id for decision_id, _ in page],
+            "id, decision_number, decision_date, object_ar, object_fr, summary_ar, summary_fr"
+        )
+        conn.close()
 
-        # Décisions traduites (HTML français)
-        cursor.execute("""
-            SELECT COUNT(*) as translated
-            FROM supreme_court_decisions
-            WHERE (html_content_fr IS NOT NULL AND html_content_fr != '')
-               OR (file_path_fr IS NOT NULL AND file_path_fr != '')
-        """)
-        translated = cursor.fetchone()['translated']
+        fused_scores = dict(page)
+        results = []
+        for row in rows:
+            decision_id = row['id']
+            row['decision_date'] = format_display_date(row.get('decision_date'))
+            row['score'] = round(fused_scores[decision_id], 6)
+            row['lexical_rank'] = lexical_rank.get(decision_id)
+            row['semantic_rank'] = semantic_rank.get(decision_id)
+            if decision_id in semantic_score:
+                row['semantic_score'] = round(semantic_score[decision_id], 4)
+            results.append(row)
 
-        # Décisions analysées avec IA
-        cursor.execute("""
-            SELECT COUNT(*) as analyzed
-            FROM supreme_court_decisions
-            WHERE summary_fr IS NOT NULL
-            AND summary_fr != ''
-        """)
-        analyzed = cursor.fetchone()['analyzed']
+        return jsonify({
+            'results': results,
+            'count': len(fused),
+            'limit': limit,
+            'rrf_k': rrf_k,
+            'lexical_count': len(lexical_ids),
+            'semantic_count': len(semantic_ids),
+            'mode': 'hybrid' if semantic_ids else 'lexical',
+            'semantic_error': semantic_error
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-        # Décisions avec embeddings
-        cursor.execute("""
-            SELECT COUNT(*) as embedded
-            FROM supreme_court_decisions
-            WHERE embedding_fr IS NOT NULL
-               OR embedding_ar IS NOT NULL
-        """)
-        embedded = cursor.fetchone()['embedded']
 
+@coursupreme_bp.route('/stats', methods=['GET'])
+def get_global_stats():
+    """Récupérer les statistiques globales pour Cour Suprême (compteurs maintenus, ETag)"""
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        stats = read_stats_counters(conn, 'coursupreme')
         conn.close()
 
-        return jsonify({
-            'success': True,
-            'stats': {
-                'total': total,
-                'downloaded': downloaded,
-                'translated': translated,
-                'analyzed': analyzed,
-                'embedded': embedded
-            }
-        })
+        response = jsonify({'success': True, 'stats': stats})
+        response.headers['Cache-Control'] = 'no-cache'
+        response.add_etag()
+        return response.make_conditional(request)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
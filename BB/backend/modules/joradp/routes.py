@@ -16,6 +16,36 @@ from shared.r2_storage import (
     delete_object as delete_r2_object,
     normalize_key,
 )
+from shared.ann_index import get_session_ann_index
+from shared.embedding_store import embedding_summary, save_document_embedding, strip_embedding_vector
+from shared.query_embeddings import encode_query
+from shared.passages import (
+    embed_document_text,
+    ensure_passages_table,
+    fetch_passages,
+    get_passage_index,
+    remove_document_passages,
+    save_document_passages,
+)
+from shared.document_projection import ensure_document_projection, rebuild_document_projection
+from shared.http_validators import ensure_validators_table, record_validators, response_validators
+from shared.jo_issue import ensure_issue_columns
+from shared.stats_counters import read_stats_counters, rebuild_stats_counters
+from shared.keyset_pagination import (
+    decode_keyset_cursor,
+    ensure_session_order_index,
+    get_count_cache,
+    next_keyset_cursor,
+    seek_document_keys,
+)
+from shared.document_fts import (
+    PAGE_BREAK,
+    index_document_text,
+    index_document_text_safely,
+    pending_document_ids,
+    remove_document_text,
+    search_pages,
+)
 
 joradp_bp = Blueprint('joradp', __name__)
 DB_PATH = 'harvester.db'
@@ -153,7 +183,7 @@ def _ensure_text_content(doc_id: int, file_path: str | None, text_path: str | No
     reader = PyPDF2.PdfReader(io.BytesIO(pdf_bytes))
     extracted_text = ""
     for page in reader.pages:
-        extracted_text += (page.extract_text() or "") + "\n"
+        extracted_text += (page.extract_text() or "") + "\n" + PAGE_BREAK
 
     pdf_key = _derive_pdf_key(file_path, url)
     text_key = _build_text_key(pdf_key)
@@ -165,6 +195,7 @@ def _ensure_text_content(doc_id: int, file_path: str | None, text_path: str | No
     conn.commit()
     conn.close()
     _update_document_exists_flags(doc_id, text_exists=True)
+    index_document_text_safely(DB_PATH, doc_id, extracted_text, uploaded_text_url)
 
     return extracted_text, uploaded_text_url
 
@@ -208,7 +239,119 @@ def _update_document_exists_flags(doc_id, file_exists=None, text_exists=None):
         conn.close()
 
 
+def _encode_document(embedding_model, text):
+    """Encode le texte complet par passages (un seul appel) : ((passages, vecteurs), vecteur du document)."""
+    passages, vectors, document_vector = embed_document_text(embedding_model, text)
+    if document_vector is None:
+        raise ValueError("texte vide, aucun passage à encoder")
+    return (passages, vectors), document_vector
+
+
+def _store_document_embedding(cursor, doc_id, vector, model_name='all-MiniLM-L6-v2', passages=None):
+    """Écrit le vecteur dans `document_embeddings` (et ses passages) et son seul résumé dans `extra_metadata`."""
+    stored = save_document_embedding(cursor, doc_id, vector, model_name)
+    if passages is not None:
+        save_document_passages(cursor, doc_id, passages[0], passages[1], model_name)
+
+    cursor.execute("SELECT extra_metadata FROM documents WHERE id = ?", (doc_id,))
+    existing_extra = cursor.fetchone()
+    merged_extra = {}
+    if existing_extra and existing_extra['extra_metadata']:
+        try:
+            merged_extra = json.loads(existing_extra['extra_metadata'])
+        except json.JSONDecodeError:
+            merged_extra = {}
+
+    merged_extra['embedding'] = embedding_summary(model_name, stored.shape[0])
+    cursor.execute(
+        "UPDATE documents SET extra_metadata = ? WHERE id = ?",
+        (json.dumps(merged_extra), doc_id)
+    )
+    return stored
+
+
+def _index_document_vectors(entries):
+    """Pousse des vecteurs (document_id, session_id, vecteur) dans les index ANN de session."""
+    by_session = {}
+    for doc_id, session_id, vector in entries:
+        if session_id is None or vector is None:
+            continue
+        by_session.setdefault(session_id, []).append((doc_id, vector))
+    for session_id, items in by_session.items():
+        try:
+            index = get_session_ann_index(DB_PATH, session_id)
+            index.add(items)
+            index.save()
+        except Exception as exc:
+            print(f"⚠️  Index ANN session {session_id} non mis à jour: {exc}")
+
+
+
+def _ensure_documents_search_projection():
+    """Projection indexée lue par Mizane (année, numéro, mots-clés, FTS)."""
+    conn = get_db_connection()
+    try:
+        ensure_document_projection(conn)
+    except sqlite3.Error as exc:
+        print(f"⚠️  Projection de recherche des documents indisponible: {exc}")
+    finally:
+        conn.close()
+
+
+def _ensure_documents_issue_columns():
+    """Colonnes jo_year / jo_number / jo_language (rattrapage depuis l'URL au premier passage)."""
+    conn = get_db_connection()
+    try:
+        backfilled = ensure_issue_columns(conn)
+        if backfilled:
+            print(f"✅ {backfilled} documents : année/numéro du JO renseignés")
+    except sqlite3.Error as exc:
+        print(f"⚠️  Colonnes année/numéro du JO indisponibles: {exc}")
+    finally:
+        conn.close()
+
+
+def _ensure_session_order_index():
+    """Index (session, numéro du JO) des listes paginées par clé."""
+    conn = get_db_connection()
+    try:
+        ensure_session_order_index(conn)
+    except sqlite3.Error as exc:
+        print(f"⚠️  Index de pagination des sessions indisponible: {exc}")
+    finally:
+        conn.close()
+
+
+def _ensure_http_validators_table():
+    """Validateurs HTTP de la version téléchargée de chaque PDF (revalidation incrémentale)."""
+    conn = get_db_connection()
+    try:
+        ensure_validators_table(conn)
+        conn.commit()
+    except sqlite3.Error as exc:
+        print(f"⚠️  Table des validateurs HTTP indisponible: {exc}")
+    finally:
+        conn.close()
+
+
+def _ensure_passages_table():
+    """Table des passages (la recherche par passage ne fait que lire)."""
+    conn = get_db_connection()
+    try:
+        ensure_passages_table(conn)
+        conn.commit()
+    except sqlite3.Error as exc:
+        print(f"⚠️  Table des passages indisponible: {exc}")
+    finally:
+        conn.close()
+
+
 _ensure_documents_status_columns()
+_ensure_documents_issue_columns()
+_ensure_session_order_index()
+_ensure_documents_search_projection()
+_ensure_http_validators_table()
+_ensure_passages_table()
 
 VALID_STATUS_VALUES = {'pending', 'in_progress', 'success', 'failed'}
 
@@ -321,6 +464,8 @@ def get_document_metadata(doc_id):
             except json.JSONDecodeError:
                 extra_metadata = None
         if extra_metadata:
+            # Lignes non migrées : ne jamais renvoyer le vecteur brut au client
+            strip_embedding_vector(extra_metadata)
             doc['extra_metadata'] = extra_metadata
 
         analysis_metadata_raw = doc.pop('additional_metadata', None)
@@ -435,26 +580,28 @@ def get_document_metadata(doc_id):
             doc['text_preview'] = text_preview
             doc['text_preview_length'] = len(text_preview)
 
-        # Informations embedding
+        # Informations embedding (table `document_embeddings` en priorité)
         embedding_info = None
         extra_embedding = None
         if extra_metadata:
             extra_embedding = extra_metadata.get('embedding')
-        if extra_embedding:
-            embedding_info = {
-                'model': extra_embedding.get('model') or doc.get('embedding_model'),
-                'dimension': extra_embedding.get('dimension'),
-                'vector_length': len(extra_embedding.get('vector', [])) if isinstance(extra_embedding.get('vector'), list) else extra_embedding.get('dimension'),
-                'storage': 'extra_metadata'
-            }
-        elif doc.get('embedding_model'):
+        if doc.get('embedding_model'):
             embedding_info = {
                 'model': doc.get('embedding_model'),
                 'dimension': doc.get('embedding_dimension'),
+                'vector_length': doc.get('embedding_dimension'),
                 'bytes': doc.get('embedding_bytes'),
                 'created_at': doc.get('embedding_created_at'),
                 'storage': 'table'
             }
+        elif isinstance(extra_embedding, dict):
+            embedding_info = {
+                'model': extra_embedding.get('model'),
+                'dimension': extra_embedding.get('dimension'),
+                'vector_length': extra_embedding.get('dimension'),
+                'created_at': extra_embedding.get('generated_at'),
+                'storage': 'extra_metadata'
+            }
 
         # Nettoyer les champs temporaires
         doc.pop('embedding_model', None)
@@ -524,6 +671,7 @@ def download_single_document(doc_id):
                 file_size_bytes = ?
             WHERE id = ?
         """, (uploaded_url, len(response.content), doc_id))
+        record_validators(conn, url, *response_validators(response))
         _update_document_exists_flags(doc_id, file_exists=True)
 
         conn.commit()
@@ -617,6 +765,8 @@ def delete_document(doc_id):
             return jsonify({'error': 'Document non trouvé'}), 404
 
         cursor.execute('DELETE FROM documents WHERE id = ?', (doc_id,))
+        remove_document_text(conn, doc_id)
+        remove_document_passages(conn, doc_id)
         conn.commit()
         conn.close()
 
@@ -745,73 +895,82 @@ def get_session_documents(session_id):
         cursor = conn.cursor()
 
         # Construire la requête avec filtres
-        where_clauses = ['session_id = ?']
+        where_clauses = ['d.session_id = ?']
         params = [session_id]
 
         if year:
-            # Chercher l'année dans l'URL (ex: F1973xxx.pdf)
-            where_clauses.append("url LIKE ?")
-            params.append(f'%F{year}%')
+            # Année du numéro (colonne indexée jo_year, ex: F1973xxx.pdf -> 1973)
+            where_clauses.append("d.jo_year = ?")
+            params.append(int(year) if year.isdigit() else None)
 
         if date_debut:
-            where_clauses.append('publication_date >= ?')
+            where_clauses.append('d.publication_date >= ?')
             params.append(date_debut)
 
         if date_fin:
-            where_clauses.append('publication_date <= ?')
+            where_clauses.append('d.publication_date <= ?')
             params.append(date_fin)
 
         if status != 'all':
             if status == 'collected':
-                where_clauses.append("metadata_collection_status = 'success'")
+                where_clauses.append("d.metadata_collection_status = 'success'")
             elif status == 'downloaded':
-                where_clauses.append("download_status = 'success'")
+                where_clauses.append("d.download_status = 'success'")
             elif status == 'analyzed':
-                where_clauses.append("ai_analysis_status = 'success'")
+                where_clauses.append("d.ai_analysis_status = 'success'")
 
         if search_num:
-            where_clauses.append('url LIKE ?')
-            params.append(f'%{search_num}%')
+            if search_num.strip().isdigit():
+                where_clauses.append('d.jo_number = ?')
+                params.append(int(search_num))
+            else:
+                where_clauses.append('d.url LIKE ?')
+                params.append(f'%{search_num}%')
 
         where_sql = ' AND '.join(where_clauses)
 
-        # Compter le total
-        cursor.execute(f'SELECT COUNT(*) FROM documents WHERE {where_sql}', params)
-        total = cursor.fetchone()[0]
+        # Total mis en cache quelques secondes (COUNT(*) complet)
+        total, total_cached = get_count_cache().count(
+            cursor, f'SELECT COUNT(*) FROM documents d WHERE {where_sql}', params
+        )
 
-        # Récupérer la page
-        offset = (page - 1) * per_page
-        cursor.execute(f"""
-            SELECT
-                id,
-                url,
-                publication_date,
-                file_size_bytes,
-                metadata_collection_status,
-                download_status,
-                text_extraction_status,
-                ai_analysis_status,
-                embedding_status,
-                file_path,
-                text_path,
-                file_exists,
-                text_exists
-            FROM documents
-            WHERE {where_sql}
-            ORDER BY publication_date DESC, url DESC
-            LIMIT ? OFFSET ?
-        """, params + [per_page, offset])
+        # Clés de la page : seek après le curseur, sinon numéro de page
+        after = decode_keyset_cursor(request.args.get('cursor'))
+        keys = seek_document_keys(
+            cursor, 'documents d', where_sql, params, per_page,
+            after=after, offset=(page - 1) * per_page
+        )
+        page_ids = [key[0] for key in keys]
+        rows = []
+        if page_ids:
+            cursor.execute(f"""
+                SELECT
+                    id,
+                    url,
+                    publication_date,
+                    file_size_bytes,
+                    metadata_collection_status,
+                    download_status,
+                    text_extraction_status,
+                    ai_analysis_status,
+                    embedding_status,
+                    file_path,
+                    text_path,
+                    file_exists,
+                    text_exists,
+                    jo_year,
+                    jo_number
+                FROM documents
+                WHERE id IN ({','.join('?' * len(page_ids))})
+            """, page_ids)
+            position = {doc_id: index for index, doc_id in enumerate(page_ids)}
+            rows = sorted(cursor.fetchall(), key=lambda row: position[row['id']])
 
         documents = []
-        for row in cursor.fetchall():
-            # Extraire le numéro depuis l'URL
-            filename = row['url'].split('/')[-1]  # F2024001.pdf
-            num = filename[5:8] if len(filename) > 8 else '000'
-
-            # Extraire l'année de l'URL (ex: F1973001.pdf -> 1973)
-            import re
-            year_match = re.search(r'F(\d{4})\d{3}\.pdf', row['url'])
-            year_str = year_match.group(1) if year_match else None
+        for row in rows:
+            # Numéro et année du JO (colonnes jo_number / jo_year)
+            num = f"{row['jo_number']:03d}" if row['jo_number'] is not None else '000'
+            year_str = str(row['jo_year']) if row['jo_year'] is not None else None
 
             file_exists = bool(row['file_exists'])
             text_exists = bool(row['text_exists'])
@@ -845,7 +1004,9 @@ def get_session_documents(session_id):
                 'page': page,
                 'per_page': per_page,
                 'total': total,
-                'total_pages': (total + per_page - 1) // per_page
+                'total_pages': (total + per_page - 1) // per_page,
+                'total_cached': total_cached,
+                'next_cursor': next_keyset_cursor(keys, per_page)
             }
         })
 
@@ -949,6 +1110,7 @@ def download_documents_batch(session_id):
                         file_size_bytes = ?
                     WHERE id = ?
                 """, (uploaded_url, len(response.content), doc_id))
+                record_validators(conn, url, *response_validators(response))
                 conn.commit()
                 conn.close()
 
@@ -1105,23 +1267,12 @@ def analyze_documents_batch(session_id):
 
                 # 1.5. Générer l'embedding du texte
                 embedding_model = get_embedding_model()
-                embedding_data = None
+                embedding_vector = None
+                embedding_passages = None
 
                 if embedding_model:
                     try:
-                        vector = embedding_model.encode(
-                            text[:5000],  # Limiter pour l'embedding
-                            convert_to_numpy=True,
-                            normalize_embeddings=True
-                        )
-                        if hasattr(vector, 'tolist'):
-                            vector = vector.tolist()
-
-                        embedding_data = {
-                            'model': 'all-MiniLM-L6-v2',
-                            'dimension': len(vector),
-                            'vector': [float(v) for v in vector]
-                        }
+                        embedding_passages, embedding_vector = _encode_document(embedding_model, text)
                     except Exception as e:
                         print(f"   ⚠️  Embedding non généré: {e}")
 
@@ -1154,11 +1305,8 @@ Document :
                 cursor = conn.cursor()
 
                 # Sauvegarder l'embedding si généré
-                if embedding_data:
-                    cursor.execute(
-                        "UPDATE documents SET extra_metadata = ? WHERE id = ?",
-                        (json.dumps({'embedding': embedding_data}), doc_id)
-                    )
+                if embedding_vector is not None:
+                    _store_document_embedding(cursor, doc_id, embedding_vector, passages=embedding_passages)
 
                 # Mettre à jour le document
                 cursor.execute("""
@@ -1485,68 +1633,16 @@ def reextract_single_document(doc_id):
 
 @joradp_bp.route('/stats', methods=['GET'])
 def get_global_stats():
-    """Récupérer les statistiques globales pour JORADP"""
+    """Récupérer les statistiques globales pour JORADP (compteurs maintenus, ETag)"""
     try:
         conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # Total de documents
-        cursor.execute("SELECT COUNT(*) as total FROM documents")
-        total = cursor.fetchone()['total']
-
-        # Documents collectés (métadonnées)
-        cursor.execute("""
-            SELECT COUNT(*) as collected
-            FROM documents
-            WHERE metadata_collection_status = 'success'
-        """)
-        collected = cursor.fetchone()['collected']
-
-        # Documents téléchargés
-        cursor.execute("""
-            SELECT COUNT(*) as downloaded
-            FROM documents
-            WHERE download_status = 'success'
-        """)
-        downloaded = cursor.fetchone()['downloaded']
-
-        # Documents avec texte extrait
-        cursor.execute("""
-            SELECT COUNT(*) as extracted
-            FROM documents
-            WHERE text_extraction_status = 'success'
-        """)
-        extracted = cursor.fetchone()['extracted']
-
-        # Documents analysés avec IA
-        cursor.execute("""
-            SELECT COUNT(*) as analyzed
-            FROM documents
-            WHERE ai_analysis_status = 'success'
-        """)
-        analyzed = cursor.fetchone()['analyzed']
-
-        # Documents avec embeddings
-        cursor.execute("""
-            SELECT COUNT(*) as embedded
-            FROM documents
-            WHERE embedding_status = 'success'
-        """)
-        embedded = cursor.fetchone()['embedded']
-
+        stats = read_stats_counters(conn, 'joradp')
         conn.close()
 
-        return jsonify({
-            'success': True,
-            'stats': {
-                'total': total,
-                'collected': collected,
-                'downloaded': downloaded,
-                'extracted': extracted,
-                'analyzed': analyzed,
-                'embedded': embedded
-            }
-        })
+        response = jsonify({'success': True, 'stats': stats})
+        response.headers['Cache-Control'] = 'no-cache'
+        response.add_etag()
+        return response.make_conditional(request)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -1684,7 +1780,7 @@ def batch_analyze_documents():
             AND download_status = 'success'
         """, document_ids)
 
-        documents = cursor.fetchall()
+        documents = [dict(row) for row in cursor.fetchall()]
 
         # Filtrer les documents déjà analysés si force=False
         to_analyze = []
@@ -1767,26 +1863,15 @@ def batch_analyze_documents():
                     )
 
                 # Générer l'embedding si le modèle est disponible
-                embedding_data = None
+                embedding_vector = None
+                embedding_passages = None
                 embedding_status_value = None
                 embedding_error_message = None
 
                 if embedding_model:
                     embedding_status_value = 'failed'
                     try:
-                        vector = embedding_model.encode(
-                            text[:5000],
-                            convert_to_numpy=True,
-                            normalize_embeddings=True
-                        )
-                        if hasattr(vector, 'tolist'):
-                            vector = vector.tolist()
-
-                        embedding_data = {
-                            'model': 'all-MiniLM-L6-v2',
-                            'dimension': len(vector),
-                            'vector': [float(v) for v in vector]
-                        }
+                        embedding_passages, embedding_vector = _encode_document(embedding_model, text)
                         embedding_status_value = 'success'
                     except Exception as e:
                         embedding_error_message = f"Embedding non généré: {e}"
@@ -1824,27 +1909,9 @@ Document :
 
                 analysis_result = response.choices[0].message.content
 
-                # Sauvegarder l'embedding dans extra_metadata si disponible
-                if embedding_data:
-                    cursor.execute(
-                        "SELECT extra_metadata FROM documents WHERE id = ?",
-                        (doc_id,)
-                    )
-                    existing_extra = cursor.fetchone()
-                    merged_extra = {}
-
-                    if existing_extra and existing_extra['extra_metadata']:
-                        try:
-                            merged_extra = json.loads(existing_extra['extra_metadata'])
-                        except json.JSONDecodeError:
-                            merged_extra = {}
-
-                    merged_extra['embedding'] = embedding_data
-
-                    cursor.execute(
-                        "UPDATE documents SET extra_metadata = ? WHERE id = ?",
-                        (json.dumps(merged_extra), doc_id)
-                    )
+                # Sauvegarder l'embedding dans document_embeddings si disponible
+                if embedding_vector is not None:
+                    _store_document_embedding(cursor, doc_id, embedding_vector, passages=embedding_passages)
 
                 # Sauvegarder l'analyse et les statuts
                 status_assignments = [
@@ -1932,12 +1999,12 @@ def batch_generate_embeddings():
 
         placeholders = ','.join('?' * len(document_ids))
         cursor.execute(f"""
-            SELECT id, url, file_path, text_path, embedding_status
+            SELECT id, session_id, url, file_path, text_path, embedding_status
             FROM documents
             WHERE id IN ({placeholders})
         """, document_ids)
 
-        documents = cursor.fetchall()
+        documents = [dict(row) for row in cursor.fetchall()]
 
         to_embed = []
         already_done = []
@@ -1989,6 +2056,7 @@ def batch_generate_embeddings():
 
         success_count = 0
         failed_count = 0
+        indexed_vectors = []
 
         for doc in to_embed:
             doc_id = doc['id']
@@ -1999,46 +2067,21 @@ def batch_generate_embeddings():
                 if not text:
                     text, _ = _ensure_text_content(doc_id, doc['file_path'], doc['text_path'], doc['url'])
 
-                vector = embedding_model.encode(
-                    text[:5000],
-                    convert_to_numpy=True,
-                    normalize_embeddings=True
-                )
-                if hasattr(vector, 'tolist'):
-                    vector = vector.tolist()
-
-                embedding_data = {
-                    'model': 'all-MiniLM-L6-v2',
-                    'dimension': len(vector),
-                    'vector': [float(v) for v in vector]
-                }
-
-                cursor.execute(
-                    "SELECT extra_metadata FROM documents WHERE id = ?",
-                    (doc_id,)
-                )
-                existing_extra = cursor.fetchone()
-                merged_extra = {}
-                if existing_extra and existing_extra['extra_metadata']:
-                    try:
-                        merged_extra = json.loads(existing_extra['extra_metadata'])
-                    except json.JSONDecodeError:
-                        merged_extra = {}
-
-                merged_extra['embedding'] = embedding_data
+                passages, vector = _encode_document(embedding_model, text)
 
+                stored_vector = _store_document_embedding(cursor, doc_id, vector, passages=passages)
                 cursor.execute(
                     """
                     UPDATE documents
-                    SET extra_metadata = ?,
-                        embedding_status = 'success',
+                    SET embedding_status = 'success',
                         embedded_at = CURRENT_TIMESTAMP,
                         error_log = NULL
                     WHERE id = ?
                     """,
-                    (json.dumps(merged_extra), doc_id)
+                    (doc_id,)
                 )
                 conn.commit()
+                indexed_vectors.append((doc_id, doc['session_id'], stored_vector))
                 success_count += 1
                 print(f"✅ Embedding généré pour doc {doc_id} ({numero})")
 
@@ -2058,6 +2101,7 @@ def batch_generate_embeddings():
                 print(f"❌ Échec embedding doc {doc_id}: {e}")
 
         conn.close()
+        _index_document_vectors(indexed_vectors)
 
         return jsonify({
             'success': True,
@@ -2070,3 +2114,178 @@ def batch_generate_embeddings():
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+
+
+# ============================================================================
+# RECHERCHE PLEIN TEXTE (texte extrait des numéros)
+# ============================================================================
+
+@joradp_bp.route('/search/fulltext', methods=['GET'])
+def search_fulltext():
+    """Rechercher dans le texte intégral indexé localement (extraits + surlignages)"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Paramètre q requis'}), 400
+
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+        offset = max(0, int(request.args.get('offset', 0)))
+        session_id = request.args.get('session_id', type=int)
+
+        conn = get_db_connection()
+        hits = search_pages(conn, query, limit=limit, offset=offset, session_id=session_id)
+        if hits is None:
+            conn.close()
+            return jsonify({'error': 'FTS5 indisponible dans cette version de SQLite'}), 501
+
+        documents = {}
+        doc_ids = sorted({hit['document_id'] for hit in hits})
+        if doc_ids:
+            placeholders = ','.join('?' * len(doc_ids))
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT id, session_id, url, publication_date
+                FROM documents
+                WHERE id IN ({placeholders})
+            """, doc_ids)
+            documents = {row['id']: dict(row) for row in cursor.fetchall()}
+        conn.close()
+
+        results = []
+        for hit in hits:
+            doc = documents.get(hit['document_id'], {})
+            results.append({
+                **hit,
+                'session_id': doc.get('session_id'),
+                'url': doc.get('url'),
+                'numero': extract_num_from_url(doc.get('url') or ''),
+                'publication_date': doc.get('publication_date'),
+            })
+
+        return jsonify({
+            'success': True,
+            'query': query,
+            'results': results,
+            'limit': limit,
+            'offset': offset,
+            'has_more': len(hits) == limit
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@joradp_bp.route('/search/passages', methods=['GET'])
+def search_passages():
+    """Recherche sémantique par passage : documents classés par leur meilleur passage"""
+    try:
+        from analysis import EMBEDDING_MODEL_NAME, get_embedding_model
+
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'Paramètre q requis'}), 400
+
+        limit = max(1, min(int(request.args.get('limit', 20)), 100))
+        session_id = request.args.get('session_id', type=int)
+
+        embedding_model = get_embedding_model()
+        if not embedding_model:
+            return jsonify({'error': 'Aucun modèle d\'embedding disponible'}), 500
+        query_vector = encode_query(embedding_model, EMBEDDING_MODEL_NAME, query, normalize_embeddings=True)
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        allowed = None
+        if session_id is not None:
+            cursor.execute("SELECT id FROM documents WHERE session_id = ?", (session_id,))
+            allowed = {row['id'] for row in cursor.fetchall()}
+
+        hits = get_passage_index(DB_PATH, EMBEDDING_MODEL_NAME).search(query_vector, limit, allowed)
+        passages = fetch_passages(conn, [hit['passage_id'] for hit in hits])
+
+        documents = {}
+        doc_ids = [hit['document_id'] for hit in hits]
+        if doc_ids:
+            placeholders = ','.join('?' * len(doc_ids))
+            cursor.execute(f"""
+                SELECT id, session_id, url, publication_date
+                FROM documents
+                WHERE id IN ({placeholders})
+            """, doc_ids)
+            documents = {row['id']: dict(row) for row in cursor.fetchall()}
+        conn.close()
+
+        results = []
+        for hit in hits:
+            doc = documents.get(hit['document_id'], {})
+            results.append({
+                'document_id': hit['document_id'],
+                'score': round(hit['score'], 4),
+                'matching_passages': hit['matching_passages'],
+                'passage': passages.get(hit['passage_id']),
+                'session_id': doc.get('session_id'),
+                'url': doc.get('url'),
+                'numero': extract_num_from_url(doc.get('url') or ''),
+                'publication_date': doc.get('publication_date'),
+            })
+
+        return jsonify({'success': True, 'query': query, 'results': results, 'limit': limit})
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@joradp_bp.route('/index/projection/rebuild', methods=['POST'])
+def rebuild_search_projection():
+    """Reconstruire la projection de recherche des documents (filtres Mizane)"""
+    try:
+        conn = get_db_connection()
+        indexed = rebuild_document_projection(conn)
+        conn.close()
+        return jsonify({'success': True, 'indexed': indexed})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@joradp_bp.route('/index/stats/rebuild', methods=['POST'])
+def rebuild_stats_index():
+    """Recalculer les compteurs de /stats (un seul parcours des documents)"""
+    try:
+        conn = get_db_connection()
+        stats = rebuild_stats_counters(conn, 'joradp')
+        conn.close()
+        return jsonify({'success': True, 'stats': stats})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@joradp_bp.route('/index/fulltext/sync', methods=['POST'])
+def sync_fulltext_index():
+    """Indexer les documents extraits avec succès qui ne sont pas encore dans l'index"""
+    try:
+        data = request.json or {}
+        limit = max(1, min(int(data.get('limit', 100)), 1000))
+
+        conn = get_db_connection()
+        pending = pending_document_ids(conn, limit=limit)
+
+        indexed = 0
+        missing_text = []
+        for doc_id, text_path in pending:
+            text_content = _fetch_r2_text(text_path)
+            if not text_content:
+                missing_text.append(doc_id)
+                continue
+            index_document_text(conn, doc_id, text_content, text_path)
+            indexed += 1
+        conn.close()
+
+        return jsonify({
+            'success': True,
+            'indexed': indexed,
+            'missing_text': len(missing_text),
+            'has_more': len(pending) == limit
+        })
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
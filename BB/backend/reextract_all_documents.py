@@ -14,6 +14,7 @@ import sqlite3
 
 # Import des modules d'extraction et d'analyse
 from shared.intelligent_text_extractor import IntelligentTextExtractor
+from shared.passages import embed_document_text, save_document_passages
 from openai import OpenAI
 from sentence_transformers import SentenceTransformer
 import numpy as np
@@ -111,17 +112,13 @@ Réponds en JSON avec cette structure :
             return None
 
     def compute_embedding(self, text):
-        """Calculer l'embedding d'un texte"""
+        """Calculer l'embedding d'un texte complet (moyenne de ses passages) et les vecteurs de passages"""
         try:
-            # Limiter le texte pour l'embedding (500 mots)
-            words = text.split()[:500]
-            text_sample = " ".join(words)
-
-            embedding = self.embedding_model.encode(text_sample)
-            return embedding
+            passages, passage_vectors, embedding = embed_document_text(self.embedding_model, text)
+            return embedding, passages, passage_vectors
         except Exception as e:
             print(f"   ⚠️  Erreur embedding: {e}")
-            return None
+            return None, [], None
 
     def save_analysis_to_db(self, conn, document_id, analysis, char_count):
         """Sauvegarder l'analyse IA dans la base"""
@@ -262,11 +259,12 @@ Réponds en JSON avec cette structure :
 
             # Étape 3: Calcul des embeddings
             print(f"\n   🧮 ÉTAPE 3/4: Calcul des embeddings...")
-            embedding = self.compute_embedding(text)
+            embedding, passages, passage_vectors = self.compute_embedding(text)
 
             if embedding is not None:
-                print(f"   ✅ Embedding calculé (dimension: {len(embedding)})")
+                print(f"   ✅ Embedding calculé (dimension: {len(embedding)}, {len(passages)} passages)")
                 self.save_embedding_to_db(conn, doc_id, embedding)
+                save_document_passages(conn, doc_id, passages, passage_vectors, EMBEDDING_MODEL_NAME)
             else:
                 print(f"   ⚠️  Embedding échoué")
 
@@ -5,6 +5,9 @@ from flask import jsonify, request
 from . import api_bp
 import sqlite3
 
+from shared.facet_counts import FACET_COUNTS_TABLE, ensure_facet_counts
+from shared.posting_bitmaps import get_posting_cache
+
 DB_PATH = '../harvester.db'
 
 def get_db():
@@ -44,17 +47,17 @@ def get_chambers():
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    cursor.execute("""
+    ensure_facet_counts(conn)
+    cursor.execute(f"""
         SELECT 
             c.id,
             c.name_ar,
             c.name_fr,
-            COUNT(DISTINCT dc.theme_id) as theme_count,
-            COUNT(DISTINCT dc.decision_id) as decision_count
+            COALESCE(fc.theme_count, 0) as theme_count,
+            COALESCE(fc.decision_count, 0) as decision_count
         FROM supreme_court_chambers c
-        LEFT JOIN supreme_court_decision_classifications dc ON dc.chamber_id = c.id
+        LEFT JOIN {FACET_COUNTS_TABLE} fc ON fc.facet = 'chamber' AND fc.facet_id = c.id
         WHERE c.active = 1
-        GROUP BY c.id
         ORDER BY c.id
     """)
     
@@ -70,17 +73,16 @@ def get_chamber_themes(chamber_id):
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
     
-    cursor.execute("""
+    ensure_facet_counts(conn)
+    cursor.execute(f"""
         SELECT 
             t.id,
             t.name_ar,
-            COUNT(DISTINCT dc.decision_id) as decision_count
+            fc.decision_count as decision_count
         FROM supreme_court_themes t
-        LEFT JOIN supreme_court_decision_classifications dc ON dc.theme_id = t.id
-        WHERE t.chamber_id = ?
-        GROUP BY t.id
-        HAVING decision_count > 0
-        ORDER BY decision_count DESC
+        JOIN {FACET_COUNTS_TABLE} fc ON fc.facet = 'theme' AND fc.facet_id = t.id
+        WHERE t.chamber_id = ? AND fc.decision_count > 0
+        ORDER BY fc.decision_count DESC
     """, (chamber_id,))
     
     themes = [dict(row) for row in cursor.fetchall()]
@@ -349,6 +351,7 @@ def delete_decision(decision_id):
         
         conn.commit()
         conn.close()
+        get_posting_cache(DB_PATH).invalidate()
         
         return jsonify({'message': 'Décision supprimée', 'status': 'success'})
         
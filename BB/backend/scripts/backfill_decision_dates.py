@@ -13,6 +13,7 @@ import requests
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 from shared.r2_storage import generate_presigned_url, normalize_key, get_r2_client, get_bucket_name
+from shared.decision_dates import ensure_decision_date_column
 from dotenv import load_dotenv
 
 DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'harvester.db')
@@ -66,6 +67,7 @@ def extract_text_from_html(html_content: str | None) -> str:
 def backfill_dates():
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
+    ensure_decision_date_column(conn)
     cur = conn.cursor()
 
     cur.execute("""
@@ -150,8 +152,8 @@ def backfill_dates():
         extracted = extract_date_from_text(text)
         if extracted:
             cur.execute(
-                "UPDATE supreme_court_decisions SET decision_date = ? WHERE id = ?",
-                (extracted, row['id'])
+                "UPDATE supreme_court_decisions SET decision_date = ?, decision_date_iso = ? WHERE id = ?",
+                (extracted, extracted, row['id'])
             )
             updated += 1
             if updated % 50 == 0:
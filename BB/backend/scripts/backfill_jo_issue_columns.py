@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Migration : colonnes jo_year / jo_number / jo_language de `documents`.
+
+Ajoute les colonnes, leurs index et triggers puis les renseigne à partir de
+l'URL (`.../F<AAAA><NNN>.pdf`). `--all` recalcule aussi les lignes déjà
+renseignées.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from shared.jo_issue import backfill_issue_columns, ensure_issue_columns
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'harvester.db')
+
+
+def main(db_path: str, recompute_all: bool):
+    conn = sqlite3.connect(db_path)
+    try:
+        added = ensure_issue_columns(conn)
+        updated = backfill_issue_columns(conn, only_missing=not recompute_all)
+        conn.commit()
+        missing = conn.execute("SELECT COUNT(*) FROM documents WHERE jo_year IS NULL").fetchone()[0]
+        total = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+    finally:
+        conn.close()
+    print(f"✅ {added + updated} lignes renseignées")
+    print(f"📊 {total - missing}/{total} documents avec année/numéro ({missing} URL non reconnues)")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default=DB_PATH, help='Chemin de harvester.db')
+    parser.add_argument('--all', action='store_true', help='Recalculer toutes les lignes')
+    args = parser.parse_args()
+    main(args.db, args.all)
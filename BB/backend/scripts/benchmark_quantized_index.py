@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Compare l'index vectoriel des décisions en float32 et en int8 (+ re-classement).
+
+Mesure, pour chaque profondeur de re-classement demandée : mémoire résidente,
+latence moyenne du seul parcours de la matrice (premier passage), latence
+moyenne d'une recherche complète et rappel@k par rapport au classement exact
+float32. Les requêtes sont des embeddings stockés bruités (aucun modèle
+nécessaire). `--synthetic N` génère une base temporaire de N décisions.
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from shared.vector_index import DecisionEmbeddingIndex, decode_vector, normalize_vector
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'harvester.db')
+
+
+def build_synthetic_db(path: str, count: int, dimension: int, seed: int = 0):
+    """Décisions aux embeddings AR/FR regroupés en thèmes (proche d'un corpus réel)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(8, count // 200), dimension)).astype(np.float32)
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE supreme_court_decisions (id INTEGER PRIMARY KEY, embedding_ar BLOB, embedding_fr BLOB)")
+    rows = []
+    for decision_id in range(1, count + 1):
+        center = centers[rng.integers(len(centers))]
+        fr = center + 0.6 * rng.standard_normal(dimension).astype(np.float32)
+        ar = fr + 0.3 * rng.standard_normal(dimension).astype(np.float32)
+        rows.append((decision_id, ar.astype(np.float32).tobytes(), fr.astype(np.float32).tobytes()))
+    conn.executemany("INSERT INTO supreme_court_decisions VALUES (?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def sample_queries(db_path: str, count: int, noise: float, seed: int = 1) -> list:
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        "SELECT embedding_fr FROM supreme_court_decisions WHERE embedding_fr IS NOT NULL ORDER BY RANDOM() LIMIT ?",
+        (count,)
+    ).fetchall()
+    conn.close()
+    rng = np.random.default_rng(seed)
+    queries = []
+    for (blob,) in rows:
+        vector = decode_vector(blob)
+        if vector is None:
+            continue
+        vector = vector / np.linalg.norm(vector)
+        queries.append(vector + noise * rng.standard_normal(vector.shape[0]).astype(np.float32) / np.sqrt(vector.shape[0]))
+    return queries
+
+
+def run(index: DecisionEmbeddingIndex, queries: list, k: int, lang: str):
+    results = []
+    started = time.perf_counter()
+    for query in queries:
+        ids, _ = index.search(query, lang=lang, limit=k)
+        results.append(ids)
+    elapsed = (time.perf_counter() - started) / max(1, len(queries))
+    return results, elapsed
+
+
+def scan_latency(index: DecisionEmbeddingIndex, queries: list, lang: str) -> float:
+    """Durée moyenne du produit matrice-requête seul (sans fusion, top-k ni re-classement)."""
+    langs = ('ar', 'fr') if lang == 'both' else (lang,)
+    matrices = [index._matrices[name] for name in langs]
+    normalized = [normalize_vector(query) for query in queries]
+    started = time.perf_counter()
+    for query in normalized:
+        for matrix in matrices:
+            matrix.scores(query)
+    return (time.perf_counter() - started) / max(1, len(queries))
+
+
+def benchmark(db_path: str, queries_count: int, k: int, reranks: list, lang: str, noise: float):
+    queries = sample_queries(db_path, queries_count, noise)
+    if not queries:
+        print("❌ Aucun embedding FR dans la base")
+        return
+
+    exact = DecisionEmbeddingIndex(db_path, quantization='none')
+    loaded = exact.reload()
+    truth, exact_latency = run(exact, queries, k, lang)
+    exact_scan = scan_latency(exact, queries, lang)
+    print(f"📋 {loaded} décisions, {len(queries)} requêtes, k={k}, lang={lang}")
+    print(f"{'mode':<22}{'mémoire (Mo)':>14}{'parcours (ms)':>15}{'latence (ms)':>14}{'rappel@k':>10}")
+    print(
+        f"{'float32':<22}{exact.memory_bytes() / 1e6:>14.2f}{exact_scan * 1000:>15.2f}"
+        f"{exact_latency * 1000:>14.2f}{1.0:>10.3f}"
+    )
+
+    for rerank in reranks:
+        quantized = DecisionEmbeddingIndex(db_path, quantization='int8', rerank=rerank)
+        quantized.reload()
+        found, latency = run(quantized, queries, k, lang)
+        scan = scan_latency(quantized, queries, lang)
+        recall = np.mean([
+            len(set(map(int, got)) & set(map(int, expected))) / max(1, len(expected))
+            for got, expected in zip(found, truth)
+        ])
+        label = f"int8 + rerank {rerank}"
+        print(
+            f"{label:<22}{quantized.memory_bytes() / 1e6:>14.2f}{scan * 1000:>15.2f}"
+            f"{latency * 1000:>14.2f}{recall:>10.3f}"
+        )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default=DB_PATH, help='Chemin de harvester.db')
+    parser.add_argument('--synthetic', type=int, default=0, help='Nombre de décisions synthétiques (base temporaire)')
+    parser.add_argument('--dimension', type=int, default=384, help='Dimension des vecteurs synthétiques')
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--k', type=int, default=10)
+    parser.add_argument('--rerank', type=int, nargs='+', default=[10, 100, 300])
+    parser.add_argument('--lang', choices=['ar', 'fr', 'both'], default='fr')
+    parser.add_argument('--noise', type=float, default=0.5, help='Bruit ajouté aux requêtes')
+    args = parser.parse_args()
+
+    if args.synthetic:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'benchmark.db')
+            build_synthetic_db(path, args.synthetic, args.dimension)
+            benchmark(path, args.queries, args.k, args.rerank, args.lang, args.noise)
+    else:
+        benchmark(args.db, args.queries, args.k, args.rerank, args.lang, args.noise)
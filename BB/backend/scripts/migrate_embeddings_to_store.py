@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Déplace les vecteurs stockés dans `documents.extra_metadata` vers la table
+`document_embeddings` (BLOB float32) et les retire du JSON.
+
+Si la table contient déjà un embedding pour le document, il est conservé ;
+le vecteur JSON est simplement supprimé. Utiliser --dry-run pour un aperçu.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from shared.embedding_store import DEFAULT_MODEL_NAME, save_document_embedding, strip_embedding_vector
+
+DB_PATH = os.path.join(os.path.dirname(__file__), '..', 'harvester.db')
+BATCH_SIZE = 500
+
+
+def migrate(db_path: str, dry_run: bool = False):
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    cur = conn.cursor()
+
+    cur.execute("""
+        SELECT d.id, d.extra_metadata, e.document_id AS has_embedding
+        FROM documents d
+        LEFT JOIN document_embeddings e ON e.document_id = d.id
+        WHERE d.extra_metadata LIKE '%"vector"%'
+    """)
+    rows = cur.fetchall()
+    print(f"📋 {len(rows)} documents avec un vecteur dans extra_metadata")
+
+    moved = 0
+    stripped = 0
+    for row in rows:
+        try:
+            metadata = json.loads(row['extra_metadata'])
+        except (TypeError, json.JSONDecodeError):
+            continue
+        model_name = (metadata.get('embedding') or {}).get('model') or DEFAULT_MODEL_NAME
+        vector = strip_embedding_vector(metadata)
+        if vector is None:
+            continue
+
+        if not row['has_embedding']:
+            if not dry_run:
+                save_document_embedding(cur, row['id'], vector, model_name)
+            moved += 1
+        if not dry_run:
+            cur.execute(
+                "UPDATE documents SET extra_metadata = ? WHERE id = ?",
+                (json.dumps(metadata), row['id'])
+            )
+        stripped += 1
+
+        if not dry_run and stripped % BATCH_SIZE == 0:
+            conn.commit()
+            print(f"   … {stripped} documents traités")
+
+    if not dry_run:
+        conn.commit()
+        # Récupérer l'espace libéré par les JSON allégés
+        conn.execute("VACUUM")
+    conn.close()
+
+    prefix = "[dry-run] " if dry_run else ""
+    print(f"✅ {prefix}{moved} vecteurs copiés dans document_embeddings, {stripped} JSON allégés")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--db', default=DB_PATH, help='Chemin de harvester.db')
+    parser.add_argument('--dry-run', action='store_true', help="N'écrit rien, affiche seulement le bilan")
+    args = parser.parse_args()
+    migrate(args.db, dry_run=args.dry_run)
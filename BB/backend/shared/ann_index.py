@@ -0,0 +1,331 @@
+"""
+Index ANN (HNSW) persistant sur `document_embeddings`, partitionné par session.
+
+Chaque session JORADP possède son propre index, stocké à côté de
+`harvester.db` dans `ann_index/`. L'index est construit à la première
+requête, complété de façon incrémentale (nouveaux vecteurs produits par
+`/batch/embeddings` ou lignes ajoutées dans `document_embeddings` depuis
+la dernière synchronisation) et interrogé en quelques millisecondes. Les
+documents dont l'embedding a disparu sont marqués supprimés dans l'index.
+
+Une recherche peut être restreinte à un ensemble d'ids (filtres SQL de la
+liste) : petit ensemble -> score exact de ses seuls vecteurs, sinon filtre
+appliqué pendant le parcours du graphe HNSW.
+
+Le paramètre `ef` règle le compromis rappel/latence : plus il est grand,
+plus la recherche est exhaustive (et lente). Si `hnswlib` n'est pas
+installé, on retombe sur un scan exact numpy, avec la même interface.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from shared.vector_index import decode_vector, normalize_vector, top_k
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+
+ANN_DIR_NAME = 'ann_index'
+DEFAULT_EF_SEARCH = int(os.getenv('JORADP_ANN_EF_SEARCH', '64'))
+EF_CONSTRUCTION = int(os.getenv('JORADP_ANN_EF_CONSTRUCTION', '200'))
+HNSW_M = int(os.getenv('JORADP_ANN_M', '16'))
+MIN_CAPACITY = 1024
+# En deçà, une recherche filtrée score exactement les vecteurs autorisés
+EXACT_FILTER_LIMIT = int(os.getenv('JORADP_ANN_EXACT_FILTER_LIMIT', '2000'))
+
+
+def get_index_dir(db_path: str) -> Path:
+    return Path(db_path).resolve().parent / ANN_DIR_NAME
+
+
+class SessionAnnIndex:
+    """Index ANN d'une session de moissonnage JORADP."""
+
+    def __init__(self, db_path: str, session_id: int):
+        self.db_path = db_path
+        self.session_id = int(session_id)
+        base = get_index_dir(db_path) / f"joradp_session_{self.session_id}"
+        self.index_path = base.with_suffix('.bin')
+        self.meta_path = base.with_suffix('.json')
+        self._lock = threading.RLock()
+        self._index = None
+        self._labels: set[int] = set()
+        self._dimension: int | None = None
+        self._last_row_id = 0
+        self._dirty = False
+        self._loaded = False
+        # Repli exact si hnswlib est absent
+        self._ids = np.empty(0, dtype=np.int64)
+        self._matrix = None
+
+    # ------------------------------------------------------------------
+    # Persistance
+    # ------------------------------------------------------------------
+
+    def _ensure_loaded(self) -> None:
+        """Charge l'index persisté une seule fois, avant toute écriture ou recherche."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if self._index is None and self._matrix is None:
+            self._load()
+
+    def _load(self) -> None:
+        if not HNSWLIB_AVAILABLE or not self.index_path.exists() or not self.meta_path.exists():
+            return
+        try:
+            meta = json.loads(self.meta_path.read_text())
+            index = hnswlib.Index(space='cosine', dim=int(meta['dimension']))
+            index.load_index(str(self.index_path), max_elements=int(meta.get('capacity') or 0))
+        except Exception as exc:
+            print(f"⚠️  Index ANN session {self.session_id} illisible, reconstruction ({exc})")
+            return
+        self._index = index
+        self._dimension = int(meta['dimension'])
+        self._last_row_id = int(meta.get('last_row_id') or 0)
+        self._labels = set(int(label) for label in index.get_ids_list())
+
+    def save(self) -> None:
+        """Écrit l'index sur disque (écriture atomique via fichier temporaire)."""
+        with self._lock:
+            # Sans chargement préalable, on écraserait l'index persisté (last_row_id = 0)
+            self._ensure_loaded()
+            if not HNSWLIB_AVAILABLE or self._index is None or not self._dirty:
+                return
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_index = self.index_path.with_suffix('.bin.tmp')
+            tmp_meta = self.meta_path.with_suffix('.json.tmp')
+            self._index.save_index(str(tmp_index))
+            tmp_meta.write_text(json.dumps({
+                'session_id': self.session_id,
+                'dimension': self._dimension,
+                'capacity': self._index.get_max_elements(),
+                'count': len(self._labels),
+                'last_row_id': self._last_row_id,
+            }))
+            os.replace(tmp_index, self.index_path)
+            os.replace(tmp_meta, self.meta_path)
+            self._dirty = False
+
+    # ------------------------------------------------------------------
+    # Alimentation
+    # ------------------------------------------------------------------
+
+    def _init_index(self, dimension: int, capacity: int) -> None:
+        index = hnswlib.Index(space='cosine', dim=dimension)
+        index.init_index(max_elements=max(capacity, MIN_CAPACITY), ef_construction=EF_CONSTRUCTION, M=HNSW_M)
+        index.set_ef(DEFAULT_EF_SEARCH)
+        self._index = index
+        self._dimension = dimension
+
+    def add(self, items) -> int:
+        """Ajoute ou remplace des vecteurs : itérable de (document_id, vecteur)."""
+        with self._lock:
+            # Complète l'index persisté au lieu d'en créer un nouveau
+            self.ensure_ready()
+            return self._add_items(items)
+
+    def _add_items(self, items) -> int:
+        with self._lock:
+            ids = []
+            vectors = []
+            for document_id, vector in items:
+                vector = normalize_vector(vector)
+                if vector is None:
+                    continue
+                if self._dimension is None:
+                    self._dimension = vector.shape[0]
+                if vector.shape[0] != self._dimension:
+                    continue
+                ids.append(int(document_id))
+                vectors.append(vector)
+            if not ids:
+                return 0
+
+            data = np.vstack(vectors)
+            labels = np.asarray(ids, dtype=np.int64)
+            if not HNSWLIB_AVAILABLE:
+                self._add_exact(labels, data)
+                return len(ids)
+            if self._index is None:
+                self._init_index(self._dimension, len(ids) * 2)
+            needed = len(self._labels | set(ids))
+            capacity = self._index.get_max_elements()
+            if needed > capacity:
+                self._index.resize_index(max(needed, capacity * 2))
+            self._index.add_items(data, labels)
+            self._labels.update(ids)
+            self._dirty = True
+            return len(ids)
+
+    def _add_exact(self, labels: np.ndarray, data: np.ndarray) -> None:
+        if self._matrix is None:
+            self._ids, self._matrix = labels, data
+        else:
+            keep = ~np.isin(self._ids, labels)
+            self._ids = np.concatenate([self._ids[keep], labels])
+            self._matrix = np.vstack([self._matrix[keep], data])
+        self._labels.update(int(label) for label in labels)
+
+    def _remove_labels(self, labels: set[int]) -> None:
+        if not HNSWLIB_AVAILABLE:
+            keep = ~np.isin(self._ids, np.fromiter(labels, dtype=np.int64))
+            self._ids, self._matrix = self._ids[keep], self._matrix[keep]
+        else:
+            for label in labels:
+                try:
+                    self._index.mark_deleted(label)
+                except RuntimeError:
+                    # Déjà marqué dans l'index persisté
+                    pass
+        self._labels -= labels
+        self._dirty = True
+
+    def sync(self) -> int:
+        """
+        Intègre les lignes de `document_embeddings` ajoutées depuis la dernière synchro
+        et retire les documents (ou embeddings) supprimés depuis.
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            current = {
+                row[0] for row in conn.execute("""
+                    SELECT e.document_id
+                    FROM document_embeddings e
+                    JOIN documents d ON d.id = e.document_id
+                    WHERE d.session_id = ? AND e.embedding IS NOT NULL
+                """, (self.session_id,))
+            }
+            rows = conn.execute("""
+                SELECT e.id, e.document_id, e.embedding, e.dimension
+                FROM document_embeddings e
+                JOIN documents d ON d.id = e.document_id
+                WHERE d.session_id = ? AND e.id > ? AND e.embedding IS NOT NULL
+                ORDER BY e.id
+            """, (self.session_id, self._last_row_id)).fetchall()
+        finally:
+            conn.close()
+        changed = 0
+        with self._lock:
+            removed = self._labels - current
+            if removed:
+                self._remove_labels(removed)
+                changed += len(removed)
+        if not rows:
+            return changed
+
+        items = []
+        for row_id, document_id, blob, dimension in rows:
+            vector = decode_vector(blob)
+            if vector is None:
+                continue
+            if dimension and vector.shape[0] >= dimension:
+                vector = vector[:dimension]
+            items.append((document_id, vector))
+        with self._lock:
+            added = self._add_items(items)
+            self._last_row_id = max(self._last_row_id, int(rows[-1][0]))
+            self._dirty = True
+        return changed + added
+
+    def ensure_ready(self) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            if self.sync():
+                self.save()
+
+    # ------------------------------------------------------------------
+    # Recherche
+    # ------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self._labels)
+
+    def count(self, allowed=None) -> int:
+        """Documents indexés (parmi `allowed` si fourni)."""
+        self.ensure_ready()
+        with self._lock:
+            return len(self._labels) if allowed is None else len(self._labels.intersection(allowed))
+
+    def _exact_search(self, query: np.ndarray, labels: list[int] | None, k: int) -> list[tuple[int, float]]:
+        """Score exact des vecteurs de `labels` (tous si None, repli sans hnswlib)."""
+        if not HNSWLIB_AVAILABLE:
+            ids, matrix = self._ids, self._matrix
+            if labels is not None:
+                keep = np.isin(ids, np.asarray(labels, dtype=np.int64))
+                ids, matrix = ids[keep], matrix[keep]
+        else:
+            ids = np.asarray(labels, dtype=np.int64)
+            matrix = np.asarray(self._index.get_items(labels), dtype=np.float32)
+            # Vecteurs normalisés à l'insertion (espace cosinus)
+            norms = np.linalg.norm(matrix, axis=1)
+            matrix = matrix / np.where(norms > 0, norms, 1.0)[:, None]
+        scores = matrix @ query
+        order = top_k(scores, k)
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    def search(self, query_vec, k: int, ef: int | None = None, allowed=None) -> list[tuple[int, float]]:
+        """
+        Top-k (document_id, similarité cosinus) pour un vecteur requête.
+
+        `allowed` (ensemble d'ids) restreint la recherche : les k meilleurs
+        documents autorisés sont renvoyés, pas un top-k global filtré après coup.
+        """
+        self.ensure_ready()
+        query = normalize_vector(query_vec)
+        with self._lock:
+            if query is None or self._dimension is None or query.shape[0] != self._dimension:
+                return []
+            candidates = None
+            if allowed is not None:
+                candidates = self._labels.intersection(allowed)
+                if len(candidates) == len(self._labels):
+                    candidates = None
+            pool = len(self._labels) if candidates is None else len(candidates)
+            k = min(int(k), pool)
+            if k <= 0:
+                return []
+
+            if not HNSWLIB_AVAILABLE:
+                return self._exact_search(query, sorted(candidates) if candidates is not None else None, k)
+            if candidates is not None and len(candidates) <= max(k, EXACT_FILTER_LIMIT):
+                return self._exact_search(query, sorted(candidates), k)
+
+            # hnswlib exige ef >= k pour renvoyer k voisins
+            self._index.set_ef(max(int(ef or DEFAULT_EF_SEARCH), k))
+            try:
+                labels, distances = self._index.knn_query(
+                    query, k=k, filter=(candidates.__contains__ if candidates is not None else None)
+                )
+            except RuntimeError:
+                # Filtre trop sélectif pour le graphe : moins de k voisins atteints
+                return self._exact_search(query, sorted(candidates), k)
+            return [
+                (int(label), float(1.0 - distance))
+                for label, distance in zip(labels[0], distances[0])
+            ]
+
+
+_SESSION_INDEXES: dict[tuple[str, int], SessionAnnIndex] = {}
+_SESSION_INDEXES_LOCK = threading.Lock()
+
+
+def get_session_ann_index(db_path: str, session_id: int) -> SessionAnnIndex:
+    """Retourne l'index ANN partagé d'une session (créé à la demande)."""
+    key = (str(Path(db_path).resolve()), int(session_id))
+    with _SESSION_INDEXES_LOCK:
+        index = _SESSION_INDEXES.get(key)
+        if index is None:
+            index = SessionAnnIndex(key[0], key[1])
+            _SESSION_INDEXES[key] = index
+        return index
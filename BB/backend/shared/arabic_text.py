@@ -0,0 +1,78 @@
+"""
+Normalisation orthographique de l'arabe pour l'indexation plein texte.
+
+Les textes juridiques mélangent formes vocalisées et non vocalisées,
+variantes d'alef/hamza, ta marbuta et tatweel. On ramène tout à une
+forme canonique avant indexation et avant interrogation, de sorte qu'une
+requête « المحكمة » retrouve « المحكمـة » ou « المَحْكَمَة ».
+"""
+
+from __future__ import annotations
+
+# Diacritiques (tashkeel), alef suscrit et tatweel : supprimés
+ARABIC_STRIP_CHARS = (
+    '\u064b', '\u064c', '\u064d', '\u064e', '\u064f',  # tanwin, fatha, damma
+    '\u0650', '\u0651', '\u0652',                    # kasra, shadda, sukun
+    '\u0670',                                        # alef suscrit
+    '\u0640',                                        # tatweel
+)
+
+# Variantes ramenées à une lettre de base
+ARABIC_LETTER_FOLDS = (
+    ('\u0622', '\u0627'),  # آ -> ا
+    ('\u0623', '\u0627'),  # أ -> ا
+    ('\u0625', '\u0627'),  # إ -> ا
+    ('\u0671', '\u0627'),  # ٱ -> ا
+    ('\u0649', '\u064a'),  # ى -> ي
+    ('\u0629', '\u0647'),  # ة -> ه
+)
+
+_TRANSLATION = str.maketrans(
+    {**{ch: None for ch in ARABIC_STRIP_CHARS}, **dict(ARABIC_LETTER_FOLDS)}
+)
+
+
+def normalize_arabic(value: str | None) -> str:
+    """Supprime diacritiques/tatweel et unifie alef, hamza, ya et ta marbuta."""
+    if not value:
+        return ''
+    return str(value).translate(_TRANSLATION)
+
+
+def arabic_fold_sql(expression: str) -> str:
+    """
+    Équivalent SQL de `normalize_arabic` (REPLACE imbriqués).
+
+    Utilisable dans des triggers : aucune fonction Python n'a besoin d'être
+    enregistrée sur la connexion qui écrit dans la table.
+    """
+    sql = f"COALESCE({expression}, '')"
+    for ch in ARABIC_STRIP_CHARS:
+        sql = f"REPLACE({sql}, '{ch}', '')"
+    for source, target in ARABIC_LETTER_FOLDS:
+        sql = f"REPLACE({sql}, '{source}', '{target}')"
+    return sql
+
+
+# Racinisation légère (type « light10 ») : préfixes/suffixes grammaticaux
+# les plus fréquents, appliquée après normalisation.
+ARABIC_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال', 'و')
+ARABIC_SUFFIXES = ('ها', 'ان', 'ات', 'ون', 'ين', 'يه', 'ه', 'ي')
+ARABIC_STEM_MIN_LENGTH = 3
+
+
+def light_stem_arabic(token: str) -> str:
+    """Retire au plus un préfixe et les suffixes courants en gardant au moins 3 lettres."""
+    for prefix in ARABIC_PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= ARABIC_STEM_MIN_LENGTH:
+            token = token[len(prefix):]
+            break
+    changed = True
+    while changed:
+        changed = False
+        for suffix in ARABIC_SUFFIXES:
+            if token.endswith(suffix) and len(token) - len(suffix) >= ARABIC_STEM_MIN_LENGTH:
+                token = token[:-len(suffix)]
+                changed = True
+                break
+    return token
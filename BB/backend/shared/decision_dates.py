@@ -0,0 +1,107 @@
+"""
+Date canonique (ISO) des décisions de la Cour suprême.
+
+`decision_date` mélange `JJ-MM-AAAA` (titres moissonnés) et `AAAA-MM-JJ`
+(dates corrigées par l'analyse) : filtrer ou trier exigeait une expression
+CASE/substr qui empêche toute utilisation d'index. La colonne
+`decision_date_iso` (AAAA-MM-JJ ou NULL) est indexée avec le numéro, dans
+l'ordre de tri des listes (date décroissante, numéro croissant) :
+
+- les moissonneurs, `backfill_decision_dates.py` et l'analyse batch la
+  renseignent via `normalize_decision_date_value` ;
+- un trigger la déduit en SQL des formats usuels quand un écrivain modifie
+  `decision_date` sans la renseigner ;
+- `ensure_decision_date_column` ajoute la colonne et complète les lignes
+  existantes.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+from datetime import datetime
+
+DECISIONS_TABLE = 'supreme_court_decisions'
+DATE_ISO_COLUMN = 'decision_date_iso'
+DATE_ISO_INDEX = 'idx_sc_decisions_date_iso'
+
+_DATE_FORMATS = ['%d/%m/%Y', '%d-%m-%Y', '%Y-%m-%d', '%Y/%m/%d']
+
+
+def normalize_decision_date_value(value: str | None) -> str | None:
+    """Normalise une date trouvée dans le texte vers YYYY-MM-DD si possible."""
+    if not value:
+        return None
+    raw = value.strip()
+    for fmt in _DATE_FORMATS:
+        try:
+            dt = datetime.strptime(raw, fmt)
+            return dt.strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    # Gestion des jours à 0 (ex: 2021/04/0) -> on force le jour à 01
+    m = re.match(r'(\d{4})[/-](\d{2})[/-]0$', raw)
+    if m:
+        try:
+            dt = datetime.strptime(f"{m.group(1)}-{m.group(2)}-01", "%Y-%m-%d")
+            return dt.strftime('%Y-%m-%d')
+        except ValueError:
+            return None
+    return None
+
+
+def _iso_expression(row: str) -> str:
+    """Équivalent SQL de `normalize_decision_date_value` pour JJ-MM-AAAA, JJ/MM/AAAA, AAAA-MM-JJ, AAAA/MM/JJ."""
+    value = f"trim({row}.decision_date)"
+    return (
+        f"CASE WHEN {value} GLOB '[0-9][0-9][/-][0-9][0-9][/-][0-9][0-9][0-9][0-9]' "
+        f"THEN substr({value}, 7, 4) || '-' || substr({value}, 4, 2) || '-' || substr({value}, 1, 2) "
+        f"WHEN {value} GLOB '[0-9][0-9][0-9][0-9][/-][0-9][0-9][/-][0-9][0-9]' "
+        f"THEN substr({value}, 1, 4) || '-' || substr({value}, 6, 2) || '-' || substr({value}, 9, 2) END"
+    )
+
+
+def ensure_decision_date_column(conn: sqlite3.Connection) -> int:
+    """
+    Ajoute `decision_date_iso`, son index et ses triggers si besoin.
+
+    Quand la colonne vient d'être créée, les lignes existantes sont
+    complétées ; retourne le nombre de lignes renseignées.
+    """
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({DECISIONS_TABLE})").fetchall()}
+    added = DATE_ISO_COLUMN not in columns
+    if added:
+        conn.execute(f"ALTER TABLE {DECISIONS_TABLE} ADD COLUMN {DATE_ISO_COLUMN} TEXT")
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS {DATE_ISO_INDEX} "
+        f"ON {DECISIONS_TABLE}({DATE_ISO_COLUMN} DESC, decision_number ASC)"
+    )
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {DECISIONS_TABLE}_date_iso_ai AFTER INSERT ON {DECISIONS_TABLE}
+        WHEN new.{DATE_ISO_COLUMN} IS NULL AND new.decision_date IS NOT NULL BEGIN
+            UPDATE {DECISIONS_TABLE} SET {DATE_ISO_COLUMN} = {_iso_expression('new')} WHERE id = new.id;
+        END
+    """)
+    # Seulement si l'écrivain n'a pas renseigné lui-même la date ISO
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS {DECISIONS_TABLE}_date_iso_au AFTER UPDATE OF decision_date ON {DECISIONS_TABLE}
+        WHEN new.{DATE_ISO_COLUMN} IS old.{DATE_ISO_COLUMN} AND new.decision_date IS NOT old.decision_date BEGIN
+            UPDATE {DECISIONS_TABLE} SET {DATE_ISO_COLUMN} = {_iso_expression('new')} WHERE id = new.id;
+        END
+    """)
+    backfilled = backfill_decision_date_iso(conn) if added else 0
+    conn.commit()
+    return backfilled
+
+
+def backfill_decision_date_iso(conn: sqlite3.Connection, only_missing: bool = True) -> int:
+    """Renseigne `decision_date_iso` via `normalize_decision_date_value` (sans commit)."""
+    where = f"WHERE {DATE_ISO_COLUMN} IS NULL AND decision_date IS NOT NULL" if only_missing else ""
+    rows = conn.execute(f"SELECT id, decision_date FROM {DECISIONS_TABLE} {where}").fetchall()
+    updates = []
+    for decision_id, decision_date in rows:
+        iso = normalize_decision_date_value(decision_date)
+        if iso is not None or not only_missing:
+            updates.append((iso, decision_id))
+    conn.executemany(f"UPDATE {DECISIONS_TABLE} SET {DATE_ISO_COLUMN} = ? WHERE id = ?", updates)
+    return len(updates)
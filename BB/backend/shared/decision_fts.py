@@ -0,0 +1,176 @@
+"""
+Index plein texte FTS5 des décisions de la Cour Suprême.
+
+Deux tables virtuelles sans contenu (`content=''`) indexent titre, objet et
+résumé : l'une pour le français (accents neutralisés par `unicode61`),
+l'autre pour l'arabe (texte replié par `arabic_fold_sql` : diacritiques,
+tatweel, alef/hamza, ya et ta marbuta). Des triggers sur
+`supreme_court_decisions` les tiennent à jour ; les requêtes sont classées
+par BM25 au lieu de parcourir la table avec `LIKE '%q%'`.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+
+from shared.arabic_text import arabic_fold_sql, normalize_arabic
+
+DECISIONS_TABLE = 'supreme_court_decisions'
+FTS_FR_TABLE = 'supreme_court_decisions_fts_fr'
+FTS_AR_TABLE = 'supreme_court_decisions_fts_ar'
+
+# (table FTS, colonnes source, tokenizer, repli SQL appliqué avant indexation)
+FTS_CONFIG = {
+    'fr': (
+        FTS_FR_TABLE,
+        ('title_fr', 'object_fr', 'summary_fr'),
+        "unicode61 remove_diacritics 2",
+        lambda expr: f"COALESCE({expr}, '')",
+    ),
+    'ar': (
+        FTS_AR_TABLE,
+        ('title_ar', 'object_ar', 'summary_ar'),
+        # Mn : les marques combinantes résiduelles restent dans le mot au lieu de le couper
+        "unicode61 remove_diacritics 2 categories 'L* N* Co Mn'",
+        arabic_fold_sql,
+    ),
+}
+
+# Poids BM25 des colonnes (titre, objet, résumé)
+FIELD_WEIGHTS = (3.0, 2.0, 1.0)
+
+QUERY_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+
+def _create_statements(lang: str) -> list[str]:
+    table, fields, tokenizer, fold = FTS_CONFIG[lang]
+    columns = ', '.join(fields)
+    new_values = ', '.join(fold(f'new.{field}') for field in fields)
+    old_values = ', '.join(fold(f'old.{field}') for field in fields)
+    tokenize = tokenizer.replace('"', '""')
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {table}
+        USING fts5({columns}, content='', prefix='2 3', tokenize="{tokenize}")
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ai AFTER INSERT ON {DECISIONS_TABLE} BEGIN
+            INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_ad AFTER DELETE ON {DECISIONS_TABLE} BEGIN
+            INSERT INTO {table}({table}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_au AFTER UPDATE OF {columns} ON {DECISIONS_TABLE} BEGIN
+            INSERT INTO {table}({table}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {table}(rowid, {columns}) VALUES (new.id, {new_values});
+        END
+        """,
+    ]
+
+
+def _populate(conn: sqlite3.Connection, lang: str) -> None:
+    table, fields, _, fold = FTS_CONFIG[lang]
+    conn.execute(f"""
+        INSERT INTO {table}(rowid, {', '.join(fields)})
+        SELECT id, {', '.join(fold(field) for field in fields)}
+        FROM {DECISIONS_TABLE}
+    """)
+
+
+def ensure_decision_fts(conn: sqlite3.Connection) -> bool:
+    """
+    Crée les tables FTS et leurs triggers au besoin (remplissage initial inclus).
+
+    Retourne False si SQLite a été compilé sans FTS5 : les appelants
+    conservent alors leur recherche `LIKE`.
+    """
+    try:
+        existing = {
+            row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name IN (?, ?)",
+                (FTS_FR_TABLE, FTS_AR_TABLE)
+            )
+        }
+        if len(existing) == len(FTS_CONFIG):
+            return True
+        for lang, (table, *_rest) in FTS_CONFIG.items():
+            if table in existing:
+                continue
+            for statement in _create_statements(lang):
+                conn.execute(statement)
+            _populate(conn, lang)
+        conn.commit()
+        return True
+    except sqlite3.OperationalError as exc:
+        if 'fts5' in str(exc).lower():
+            return False
+        raise
+
+
+def rebuild_decision_fts(conn: sqlite3.Connection) -> int:
+    """Vide et reconstruit les deux index à partir de la table des décisions."""
+    if not ensure_decision_fts(conn):
+        return 0
+    for lang, (table, *_rest) in FTS_CONFIG.items():
+        conn.execute(f"INSERT INTO {table}({table}) VALUES ('delete-all')")
+        _populate(conn, lang)
+    conn.commit()
+    return conn.execute(f"SELECT COUNT(*) FROM {DECISIONS_TABLE}").fetchone()[0]
+
+
+def build_match_query(text: str | None) -> str | None:
+    """Transforme une saisie libre en requête FTS5 (tous les termes, en préfixe)."""
+    tokens = QUERY_TOKEN_PATTERN.findall(normalize_arabic(text or '').lower())
+    if not tokens:
+        return None
+    return ' AND '.join(f'"{token}"*' for token in tokens)
+
+
+def search_decision_ids(
+    conn: sqlite3.Connection,
+    text: str,
+    limit: int | None = 50,
+    language_scope: str = 'both',
+) -> list[tuple[int, float]] | None:
+    """
+    Décisions correspondant à `text`, classées par BM25.
+
+    Retourne [(decision_id, score)] avec un score croissant avec la pertinence,
+    ou None si FTS5 n'est pas disponible.
+    """
+    if not ensure_decision_fts(conn):
+        return None
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    langs = [lang for lang in FTS_CONFIG if language_scope in (lang, 'both')] or list(FTS_CONFIG)
+    weights = ', '.join(str(weight) for weight in FIELD_WEIGHTS)
+    subqueries = []
+    params: list = []
+    for lang in langs:
+        table = FTS_CONFIG[lang][0]
+        subqueries.append(
+            f"SELECT rowid AS id, bm25({table}, {weights}) AS rank FROM {table} WHERE {table} MATCH ?"
+        )
+        params.append(match)
+
+    if len(subqueries) == 1:
+        # Sous-requête unique : SQLite l'aplatirait dans l'agrégat, où bm25() est interdit
+        sql = f"{subqueries[0]} ORDER BY rank"
+    else:
+        sql = f"""
+            SELECT id, MIN(rank) AS rank
+            FROM ({' UNION ALL '.join(subqueries)})
+            GROUP BY id
+            ORDER BY rank
+        """
+    if limit:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+    return [(int(row[0]), -float(row[1])) for row in conn.execute(sql, params)]
@@ -0,0 +1,199 @@
+"""
+Projection `decision_status` : statut de complétion de chaque décision.
+
+`/decisions/status` lisait toutes les décisions, HTML AR/FR compris, pour
+tester leur présence, puis exécutait deux requêtes par décision pour ses
+chambres et ses thèmes. La projection stocke, par décision :
+
+- les statuts `downloaded` / `translated` ('complete' | 'missing') et
+  `analyzed` / `embeddings` ('complete' | 'partial' | 'missing'), calculés
+  comme auparavant à partir de la présence des colonnes ;
+- les listes JSON des chambres et des thèmes (noms FR/AR), déjà jointes ;
+- la date ISO (`decision_date_iso`), qui porte l'index de tri de la liste.
+
+Des triggers sur les décisions, les classifications et les noms de
+chambres/thèmes la tiennent à jour ; les routes batch (téléchargement,
+traduction, analyse, embeddings) n'ont donc rien à faire de plus.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+from shared.decision_dates import DATE_ISO_COLUMN, ensure_decision_date_column
+
+DECISIONS_TABLE = 'supreme_court_decisions'
+CLASSIFICATIONS_TABLE = 'supreme_court_decision_classifications'
+STATUS_TABLE = 'decision_status'
+
+STATUS_COLUMNS = ('downloaded', 'translated', 'analyzed', 'embeddings')
+STATUS_VALUES = ('complete', 'partial', 'missing')
+
+# Colonnes de supreme_court_decisions dont dépend la projection
+SOURCE_COLUMNS = (
+    'decision_number', 'decision_date', DATE_ISO_COLUMN, 'url',
+    'file_path_ar', 'file_path_fr', 'html_content_ar', 'html_content_fr',
+    'title_ar', 'title_fr', 'summary_ar', 'summary_fr',
+    'keywords_ar', 'keywords_fr', 'entities_ar', 'entities_fr',
+    'embedding_ar', 'embedding_fr',
+)
+
+
+def _present(row: str, column: str) -> str:
+    # Même test que bool() en Python : ni NULL, ni chaîne/blob vide
+    return f"(COALESCE(length({row}.{column}), 0) > 0)"
+
+
+def _analyzed(row: str, lang: str) -> str:
+    return '(' + ' AND '.join(
+        _present(row, f"{field}_{lang}") for field in ('title', 'summary', 'keywords', 'entities')
+    ) + ')'
+
+
+def _names_json(table: str, column: str, decision_id: str) -> str:
+    return f"""(
+        SELECT COALESCE(json_group_array(json_object('name_fr', x.name_fr, 'name_ar', x.name_ar)), '[]')
+        FROM {table} x
+        WHERE x.id IN (SELECT {column} FROM {CLASSIFICATIONS_TABLE} WHERE decision_id = {decision_id})
+    )"""
+
+
+def _status_values(row: str) -> str:
+    """Expressions SQL des colonnes de la projection pour une ligne de décision."""
+    return ', '.join([
+        f"{row}.id",
+        f"{row}.decision_number",
+        f"{row}.decision_date",
+        f"{row}.{DATE_ISO_COLUMN}",
+        f"{row}.url",
+        f"CASE WHEN {_present(row, 'file_path_ar')} OR {_present(row, 'html_content_ar')} "
+        f"THEN 'complete' ELSE 'missing' END",
+        f"CASE WHEN {_present(row, 'file_path_fr')} OR {_present(row, 'html_content_fr')} "
+        f"THEN 'complete' ELSE 'missing' END",
+        f"CASE WHEN {_analyzed(row, 'ar')} AND {_analyzed(row, 'fr')} THEN 'complete' "
+        f"WHEN {_analyzed(row, 'ar')} OR {_analyzed(row, 'fr')} "
+        f"OR {_present(row, 'title_ar')} OR {_present(row, 'title_fr')} THEN 'partial' "
+        f"ELSE 'missing' END",
+        f"CASE WHEN {_present(row, 'embedding_ar')} AND {_present(row, 'embedding_fr')} THEN 'complete' "
+        f"WHEN {_present(row, 'embedding_ar')} OR {_present(row, 'embedding_fr')} THEN 'partial' "
+        f"ELSE 'missing' END",
+        _names_json('supreme_court_chambers', 'chamber_id', f"{row}.id"),
+        _names_json('supreme_court_themes', 'theme_id', f"{row}.id"),
+    ])
+
+
+PROJECTION_COLUMNS = (
+    f'decision_id, decision_number, decision_date, {DATE_ISO_COLUMN}, url, '
+    'downloaded, translated, analyzed, embeddings, chambers, themes'
+)
+
+
+def _refresh_names(decision_id: str) -> str:
+    return f"""
+        UPDATE {STATUS_TABLE}
+        SET chambers = {_names_json('supreme_court_chambers', 'chamber_id', decision_id)},
+            themes = {_names_json('supreme_court_themes', 'theme_id', decision_id)}
+        WHERE decision_id = {decision_id};
+    """
+
+
+def _create_statements() -> list[str]:
+    statements = [
+        f"""
+        CREATE TABLE IF NOT EXISTS {STATUS_TABLE} (
+            decision_id INTEGER PRIMARY KEY,
+            decision_number TEXT,
+            decision_date TEXT,
+            {DATE_ISO_COLUMN} TEXT,
+            url TEXT,
+            downloaded TEXT NOT NULL,
+            translated TEXT NOT NULL,
+            analyzed TEXT NOT NULL,
+            embeddings TEXT NOT NULL,
+            chambers TEXT NOT NULL DEFAULT '[]',
+            themes TEXT NOT NULL DEFAULT '[]'
+        )
+        """,
+        f"CREATE INDEX IF NOT EXISTS idx_{STATUS_TABLE}_order_iso "
+        f"ON {STATUS_TABLE}({DATE_ISO_COLUMN} DESC, decision_number DESC)",
+        f"CREATE INDEX IF NOT EXISTS idx_classifications_decision ON {CLASSIFICATIONS_TABLE}(decision_id)",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {STATUS_TABLE}_ai AFTER INSERT ON {DECISIONS_TABLE} BEGIN
+            INSERT OR REPLACE INTO {STATUS_TABLE}({PROJECTION_COLUMNS}) VALUES ({_status_values('new')});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {STATUS_TABLE}_au
+        AFTER UPDATE OF {', '.join(SOURCE_COLUMNS)} ON {DECISIONS_TABLE} BEGIN
+            INSERT OR REPLACE INTO {STATUS_TABLE}({PROJECTION_COLUMNS}) VALUES ({_status_values('new')});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {STATUS_TABLE}_ad AFTER DELETE ON {DECISIONS_TABLE} BEGIN
+            DELETE FROM {STATUS_TABLE} WHERE decision_id = old.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {STATUS_TABLE}_classification_ai AFTER INSERT ON {CLASSIFICATIONS_TABLE} BEGIN
+            {_refresh_names('new.decision_id')}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {STATUS_TABLE}_classification_ad AFTER DELETE ON {CLASSIFICATIONS_TABLE} BEGIN
+            {_refresh_names('old.decision_id')}
+        END
+        """,
+    ]
+    # Renommage d'une chambre / d'un thème (ex. traduction des thèmes)
+    for table, column in (('supreme_court_chambers', 'chamber_id'), ('supreme_court_themes', 'theme_id')):
+        statements.append(f"""
+        CREATE TRIGGER IF NOT EXISTS {STATUS_TABLE}_{table}_au AFTER UPDATE OF name_fr, name_ar ON {table} BEGIN
+            UPDATE {STATUS_TABLE}
+            SET chambers = {_names_json('supreme_court_chambers', 'chamber_id', f'{STATUS_TABLE}.decision_id')},
+                themes = {_names_json('supreme_court_themes', 'theme_id', f'{STATUS_TABLE}.decision_id')}
+            WHERE decision_id IN (SELECT decision_id FROM {CLASSIFICATIONS_TABLE} WHERE {column} = new.id);
+        END
+        """)
+    return statements
+
+
+def _populate(conn: sqlite3.Connection) -> None:
+    conn.execute(f"""
+        INSERT OR REPLACE INTO {STATUS_TABLE}({PROJECTION_COLUMNS})
+        SELECT {_status_values(DECISIONS_TABLE)} FROM {DECISIONS_TABLE}
+    """)
+
+
+def _drop_projection(conn: sqlite3.Connection) -> None:
+    triggers = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE ? ESCAPE '\\'",
+        (STATUS_TABLE.replace('_', '\\_') + '\\_%',)
+    ).fetchall()
+    for (name,) in triggers:
+        conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+    conn.execute(f"DROP TABLE IF EXISTS {STATUS_TABLE}")
+
+
+def ensure_decision_status(conn: sqlite3.Connection) -> None:
+    """Crée la projection et ses triggers (remplissage initial inclus)."""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({STATUS_TABLE})").fetchall()}
+    if DATE_ISO_COLUMN in columns:
+        return
+    # La projection lit la date ISO des décisions
+    ensure_decision_date_column(conn)
+    if columns:
+        # Projection antérieure à la date ISO : reconstruite avec ses triggers
+        _drop_projection(conn)
+    for statement in _create_statements():
+        conn.execute(statement)
+    _populate(conn)
+    conn.commit()
+
+
+def rebuild_decision_status(conn: sqlite3.Connection) -> int:
+    """Vide et reconstruit la projection à partir des décisions."""
+    ensure_decision_status(conn)
+    conn.execute(f"DELETE FROM {STATUS_TABLE}")
+    _populate(conn)
+    conn.commit()
+    return conn.execute(f"SELECT COUNT(*) FROM {STATUS_TABLE}").fetchone()[0]
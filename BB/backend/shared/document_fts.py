@@ -0,0 +1,243 @@
+"""
+Index plein texte local (FTS5) du texte extrait des numéros du JORADP.
+
+Le texte intégral n'existe que sur R2 (`documents.text_path`). À chaque
+extraction réussie, il est découpé par page (séparateur `\\f` posé par les
+extracteurs) et ingéré ici :
+
+- `joradp_document_pages` conserve le texte brut de chaque page et son
+  décalage (en caractères) dans le fichier texte complet ;
+- `joradp_document_pages_fts` (FTS5 sans contenu) indexe ces pages après
+  repli orthographique de l'arabe ;
+- `joradp_fulltext_documents` trace les documents déjà indexés.
+
+Les extraits et surlignages sont calculés en Python sur le texte brut,
+pour afficher l'orthographe d'origine (hamza, ta marbuta...).
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import unicodedata
+from html import escape
+
+from shared.arabic_text import normalize_arabic
+
+PAGES_TABLE = 'joradp_document_pages'
+PAGES_FTS_TABLE = 'joradp_document_pages_fts'
+STATE_TABLE = 'joradp_fulltext_documents'
+
+PAGE_BREAK = '\f'
+SNIPPET_CHARS = 240
+# Les marques combinantes (harakat, accents décomposés) font partie du mot
+WORD_PATTERN = re.compile(r'[\w\u0300-\u036f\u064b-\u065f\u0670]+', re.UNICODE)
+
+
+def fold_text(value: str | None) -> str:
+    """Forme utilisée pour l'index : arabe replié, accents latins retirés, minuscules."""
+    folded = normalize_arabic(value or '')
+    folded = unicodedata.normalize('NFD', folded)
+    folded = ''.join(ch for ch in folded if not unicodedata.combining(ch))
+    return unicodedata.normalize('NFC', folded).lower()
+
+
+def ensure_document_fts(conn: sqlite3.Connection) -> bool:
+    """Crée les tables de l'index ; False si SQLite n'a pas FTS5."""
+    try:
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {PAGES_TABLE} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                document_id INTEGER NOT NULL,
+                page INTEGER NOT NULL,
+                char_offset INTEGER NOT NULL,
+                content TEXT NOT NULL,
+                UNIQUE(document_id, page)
+            )
+        """)
+        conn.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS {PAGES_FTS_TABLE}
+            USING fts5(content, content='', tokenize="unicode61 remove_diacritics 2 categories 'L* N* Co Mn'")
+        """)
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+                document_id INTEGER PRIMARY KEY,
+                text_path TEXT,
+                page_count INTEGER NOT NULL DEFAULT 0,
+                char_count INTEGER NOT NULL DEFAULT 0,
+                indexed_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        return True
+    except sqlite3.OperationalError as exc:
+        if 'fts5' in str(exc).lower():
+            return False
+        raise
+
+
+def split_pages(text: str) -> list[tuple[int, int, str]]:
+    """Découpe un texte en (numéro de page, décalage, contenu)."""
+    pages = []
+    offset = 0
+    for number, chunk in enumerate(text.split(PAGE_BREAK), start=1):
+        if chunk.strip():
+            pages.append((number, offset, chunk))
+        offset += len(chunk) + len(PAGE_BREAK)
+    return pages
+
+
+def remove_document_text(conn: sqlite3.Connection, document_id: int) -> None:
+    """Retire un document de l'index (sans commit)."""
+    if not ensure_document_fts(conn):
+        return
+    rows = conn.execute(
+        f"SELECT id, content FROM {PAGES_TABLE} WHERE document_id = ?",
+        (document_id,)
+    ).fetchall()
+    for page_id, content in rows:
+        # Table sans contenu : la suppression exige les valeurs indexées d'origine
+        conn.execute(
+            f"INSERT INTO {PAGES_FTS_TABLE}({PAGES_FTS_TABLE}, rowid, content) VALUES ('delete', ?, ?)",
+            (page_id, fold_text(content))
+        )
+    conn.execute(f"DELETE FROM {PAGES_TABLE} WHERE document_id = ?", (document_id,))
+    conn.execute(f"DELETE FROM {STATE_TABLE} WHERE document_id = ?", (document_id,))
+
+
+def index_document_text(conn: sqlite3.Connection, document_id: int, text: str | None, text_path: str | None = None) -> int:
+    """(Ré)indexe le texte d'un document page par page. Retourne le nombre de pages."""
+    if not ensure_document_fts(conn):
+        return 0
+    remove_document_text(conn, document_id)
+    pages = split_pages(text or '')
+    for number, offset, content in pages:
+        cursor = conn.execute(
+            f"INSERT INTO {PAGES_TABLE}(document_id, page, char_offset, content) VALUES (?, ?, ?, ?)",
+            (document_id, number, offset, content)
+        )
+        conn.execute(
+            f"INSERT INTO {PAGES_FTS_TABLE}(rowid, content) VALUES (?, ?)",
+            (cursor.lastrowid, fold_text(content))
+        )
+    conn.execute(
+        f"INSERT OR REPLACE INTO {STATE_TABLE}(document_id, text_path, page_count, char_count) VALUES (?, ?, ?, ?)",
+        (document_id, text_path, len(pages), len(text or ''))
+    )
+    conn.commit()
+    return len(pages)
+
+
+def index_document_text_safely(db_path: str, document_id: int, text: str | None, text_path: str | None = None) -> int:
+    """Variante autonome (connexion propre) qui n'interrompt jamais l'appelant."""
+    try:
+        conn = sqlite3.connect(db_path)
+        try:
+            return index_document_text(conn, document_id, text, text_path)
+        finally:
+            conn.close()
+    except Exception as exc:
+        print(f"⚠️  Indexation plein texte doc {document_id} impossible: {exc}")
+        return 0
+
+
+def pending_document_ids(conn: sqlite3.Connection, limit: int = 100) -> list[tuple[int, str]]:
+    """Documents extraits avec succès mais absents de l'index (ou dont le texte a changé)."""
+    if not ensure_document_fts(conn):
+        return []
+    rows = conn.execute(f"""
+        SELECT d.id, d.text_path
+        FROM documents d
+        LEFT JOIN {STATE_TABLE} s ON s.document_id = d.id
+        WHERE d.text_extraction_status = 'success'
+          AND d.text_path IS NOT NULL
+          AND (s.document_id IS NULL OR COALESCE(s.text_path, '') != d.text_path)
+        ORDER BY d.id
+        LIMIT ?
+    """, (limit,)).fetchall()
+    return [(row[0], row[1]) for row in rows]
+
+
+def build_match_query(text: str | None) -> tuple[str | None, list[str]]:
+    """Requête FTS5 (tous les termes, en préfixe) et termes repliés pour le surlignage."""
+    terms = WORD_PATTERN.findall(fold_text(text))
+    if not terms:
+        return None, []
+    return ' AND '.join(f'"{term}"*' for term in terms), terms
+
+
+def highlight_spans(content: str, terms: list[str]) -> list[tuple[int, int]]:
+    """Positions (début, fin) des mots de `content` commençant par un des termes."""
+    spans = []
+    for match in WORD_PATTERN.finditer(content):
+        folded = fold_text(match.group(0))
+        if any(folded.startswith(term) for term in terms):
+            spans.append(match.span())
+    return spans
+
+
+def make_snippet(content: str, spans: list[tuple[int, int]], width: int = SNIPPET_CHARS) -> str:
+    """Extrait HTML autour de la première occurrence, occurrences entourées de <mark>."""
+    if not spans:
+        excerpt = content[:width]
+        return escape(excerpt) + ('…' if len(content) > width else '')
+    start = max(0, spans[0][0] - width // 3)
+    end = min(len(content), start + width)
+    parts = ['…' if start > 0 else '']
+    cursor = start
+    for span_start, span_end in spans:
+        if span_start < start or span_end > end:
+            continue
+        parts.append(escape(content[cursor:span_start]))
+        parts.append(f"<mark>{escape(content[span_start:span_end])}</mark>")
+        cursor = span_end
+    parts.append(escape(content[cursor:end]))
+    if end < len(content):
+        parts.append('…')
+    return ''.join(parts).strip()
+
+
+def search_pages(
+    conn: sqlite3.Connection,
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    session_id: int | None = None,
+) -> list[dict] | None:
+    """
+    Pages correspondant à `query`, classées par BM25, avec extrait et surlignages.
+
+    Retourne None si FTS5 est indisponible.
+    """
+    if not ensure_document_fts(conn):
+        return None
+    match, terms = build_match_query(query)
+    if not match:
+        return []
+
+    sql = f"""
+        SELECT p.document_id, p.page, p.char_offset, p.content,
+               bm25({PAGES_FTS_TABLE}) AS rank
+        FROM {PAGES_FTS_TABLE}
+        JOIN {PAGES_TABLE} p ON p.id = {PAGES_FTS_TABLE}.rowid
+    """
+    params: list = [match]
+    where = [f"{PAGES_FTS_TABLE} MATCH ?"]
+    if session_id is not None:
+        sql += " JOIN documents d ON d.id = p.document_id"
+        where.append("d.session_id = ?")
+        params.append(session_id)
+    sql += f" WHERE {' AND '.join(where)} ORDER BY rank LIMIT ? OFFSET ?"
+    params.extend([limit, offset])
+
+    hits = []
+    for document_id, page, char_offset, content, rank in conn.execute(sql, params):
+        spans = highlight_spans(content, terms)
+        hits.append({
+            'document_id': document_id,
+            'page': page,
+            'page_offset': char_offset,
+            'score': round(-float(rank), 4),
+            'snippet': make_snippet(content, spans),
+            'highlights': [[char_offset + start, char_offset + end] for start, end in spans],
+        })
+    return hits
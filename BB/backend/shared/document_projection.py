@@ -0,0 +1,148 @@
+"""
+Projection de lecture de la table `documents` pour les filtres de Mizane.
+
+L'application Mizane (AA) filtre les numéros du JORADP par année, numéro et
+mots-clés. Interroger directement `documents` impose des `LIKE '%x%'` sur le
+JSON `extra_metadata` et un `strftime()` sur la date, donc des parcours
+complets. On matérialise ici :
+
+- `documents_search_projection` : année de publication, année/numéro du
+  numéro (extraits de l'URL `F<AAAA><NNN>.pdf` par les expressions de
+  `shared.jo_issue`) et mots-clés, indexés ;
+- `documents_search_fts` (FTS5 sans contenu) : URL, mots-clés et
+  métadonnées, pour les recherches textuelles.
+
+Des triggers sur `documents` tiennent les deux tables à jour ; tout est
+écrit en SQL pur (json_extract, substr) pour fonctionner quel que soit le
+processus qui écrit dans la base.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+from shared.jo_issue import issue_expressions
+
+DOCUMENTS_TABLE = 'documents'
+PROJECTION_TABLE = 'documents_search_projection'
+PROJECTION_FTS_TABLE = 'documents_search_fts'
+
+def _projection_values(row: str) -> str:
+    """Expressions SQL (document_id, années, numéro, mots-clés, date) pour `new`/`old`."""
+    issue = issue_expressions(row)
+    # Numéros en français uniquement ; numéro sur trois chiffres (« 012 »)
+    french = f"({issue['jo_language']}) = 'fr'"
+    metadata = f"{row}.extra_metadata"
+    return ', '.join([
+        f"{row}.id",
+        f"CASE WHEN {row}.publication_date GLOB '[0-9][0-9][0-9][0-9]*' "
+        f"THEN CAST(substr({row}.publication_date, 1, 4) AS INTEGER) END",
+        f"CASE WHEN {french} THEN {issue['jo_year']} END",
+        f"CASE WHEN {french} THEN printf('%03d', {issue['jo_number']}) END",
+        f"CASE WHEN json_valid({metadata}) THEN lower(CAST(json_extract({metadata}, '$.keywords') AS TEXT)) END",
+        f"{row}.publication_date",
+    ])
+
+
+def _fts_values(row: str) -> str:
+    metadata = f"{row}.extra_metadata"
+    return ', '.join([
+        f"COALESCE({row}.url, '')",
+        f"COALESCE(CASE WHEN json_valid({metadata}) THEN CAST(json_extract({metadata}, '$.keywords') AS TEXT) END, '')",
+        f"COALESCE({metadata}, '')",
+    ])
+
+
+PROJECTION_COLUMNS = 'document_id, publication_year, issue_year, issue_number, keywords, publication_date'
+FTS_COLUMNS = 'url, keywords, metadata'
+
+
+def _create_statements() -> list[str]:
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS {PROJECTION_TABLE} (
+            document_id INTEGER PRIMARY KEY,
+            publication_year INTEGER,
+            issue_year INTEGER,
+            issue_number TEXT,
+            keywords TEXT,
+            publication_date TEXT
+        )
+        """,
+        f"CREATE INDEX IF NOT EXISTS idx_{PROJECTION_TABLE}_year ON {PROJECTION_TABLE}(publication_year, publication_date)",
+        f"CREATE INDEX IF NOT EXISTS idx_{PROJECTION_TABLE}_issue ON {PROJECTION_TABLE}(issue_number, issue_year)",
+        f"CREATE INDEX IF NOT EXISTS idx_{PROJECTION_TABLE}_issue_year ON {PROJECTION_TABLE}(issue_year, issue_number)",
+        f"CREATE INDEX IF NOT EXISTS idx_{DOCUMENTS_TABLE}_publication_date ON {DOCUMENTS_TABLE}(publication_date)",
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {PROJECTION_FTS_TABLE}
+        USING fts5({FTS_COLUMNS}, content='', prefix='2 3', tokenize="unicode61 remove_diacritics 2")
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {PROJECTION_TABLE}_ai AFTER INSERT ON {DOCUMENTS_TABLE} BEGIN
+            INSERT OR REPLACE INTO {PROJECTION_TABLE}({PROJECTION_COLUMNS}) VALUES ({_projection_values('new')});
+            INSERT INTO {PROJECTION_FTS_TABLE}(rowid, {FTS_COLUMNS}) VALUES (new.id, {_fts_values('new')});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {PROJECTION_TABLE}_ad AFTER DELETE ON {DOCUMENTS_TABLE} BEGIN
+            DELETE FROM {PROJECTION_TABLE} WHERE document_id = old.id;
+            INSERT INTO {PROJECTION_FTS_TABLE}({PROJECTION_FTS_TABLE}, rowid, {FTS_COLUMNS})
+            VALUES ('delete', old.id, {_fts_values('old')});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {PROJECTION_TABLE}_au
+        AFTER UPDATE OF url, publication_date, extra_metadata ON {DOCUMENTS_TABLE} BEGIN
+            INSERT OR REPLACE INTO {PROJECTION_TABLE}({PROJECTION_COLUMNS}) VALUES ({_projection_values('new')});
+            INSERT INTO {PROJECTION_FTS_TABLE}({PROJECTION_FTS_TABLE}, rowid, {FTS_COLUMNS})
+            VALUES ('delete', old.id, {_fts_values('old')});
+            INSERT INTO {PROJECTION_FTS_TABLE}(rowid, {FTS_COLUMNS}) VALUES (new.id, {_fts_values('new')});
+        END
+        """,
+    ]
+
+
+def _populate(conn: sqlite3.Connection) -> None:
+    conn.execute(f"""
+        INSERT OR REPLACE INTO {PROJECTION_TABLE}({PROJECTION_COLUMNS})
+        SELECT {_projection_values(DOCUMENTS_TABLE)} FROM {DOCUMENTS_TABLE}
+    """)
+    conn.execute(f"""
+        INSERT INTO {PROJECTION_FTS_TABLE}(rowid, {FTS_COLUMNS})
+        SELECT id, {_fts_values(DOCUMENTS_TABLE)} FROM {DOCUMENTS_TABLE}
+    """)
+
+
+def ensure_document_projection(conn: sqlite3.Connection) -> bool:
+    """Crée la projection, son index FTS et les triggers (remplissage initial inclus)."""
+    try:
+        existing = conn.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table' AND name IN (?, ?)",
+            (PROJECTION_TABLE, PROJECTION_FTS_TABLE)
+        ).fetchone()[0]
+        if existing == 2:
+            return True
+        # Rattrapage complet : on repart de zéro si une seule des deux tables existe
+        conn.execute(f"DROP TABLE IF EXISTS {PROJECTION_TABLE}")
+        conn.execute(f"DROP TABLE IF EXISTS {PROJECTION_FTS_TABLE}")
+        for statement in _create_statements():
+            conn.execute(statement)
+        _populate(conn)
+        conn.commit()
+        return True
+    except sqlite3.OperationalError as exc:
+        if 'fts5' in str(exc).lower():
+            conn.rollback()
+            return False
+        raise
+
+
+def rebuild_document_projection(conn: sqlite3.Connection) -> int:
+    """Vide et reconstruit la projection à partir de `documents`."""
+    if not ensure_document_projection(conn):
+        return 0
+    conn.execute(f"DELETE FROM {PROJECTION_TABLE}")
+    conn.execute(f"INSERT INTO {PROJECTION_FTS_TABLE}({PROJECTION_FTS_TABLE}) VALUES ('delete-all')")
+    _populate(conn)
+    conn.commit()
+    return conn.execute(f"SELECT COUNT(*) FROM {PROJECTION_TABLE}").fetchone()[0]
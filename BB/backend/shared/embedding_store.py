@@ -0,0 +1,64 @@
+"""
+Stockage binaire des embeddings de documents JORADP.
+
+Les vecteurs sont écrits en BLOB float32 dans `document_embeddings` (une
+ligne par document) et ne transitent plus par le JSON `extra_metadata`,
+qui ne conserve qu'un résumé léger (modèle, dimension, date). Chaque
+lecture de `extra_metadata` évite ainsi de parser plusieurs Ko de floats.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime
+
+import numpy as np
+
+DEFAULT_MODEL_NAME = 'all-MiniLM-L6-v2'
+
+
+def save_document_embedding(conn, document_id: int, vector, model_name: str = DEFAULT_MODEL_NAME) -> np.ndarray:
+    """
+    Enregistre (ou remplace) le vecteur d'un document, sans commit.
+
+    `INSERT OR REPLACE` attribue un nouvel `id` à la ligne, ce qui permet
+    aux index ANN de détecter la mise à jour lors de leur synchronisation.
+    Retourne le vecteur float32 effectivement stocké.
+    """
+    array = np.asarray(vector, dtype=np.float32).reshape(-1)
+    conn.execute(
+        """
+        INSERT OR REPLACE INTO document_embeddings (document_id, embedding, model_name, dimension)
+        VALUES (?, ?, ?, ?)
+        """,
+        (document_id, array.tobytes(), model_name, int(array.shape[0]))
+    )
+    return array
+
+
+def embedding_summary(model_name: str, dimension: int) -> dict:
+    """Résumé conservé dans `extra_metadata['embedding']` (sans le vecteur)."""
+    return {
+        'model': model_name,
+        'dimension': int(dimension),
+        'generated_at': datetime.now().isoformat(),
+        'storage': 'document_embeddings',
+    }
+
+
+def strip_embedding_vector(metadata) -> list | None:
+    """
+    Retire le vecteur de `metadata['embedding']` (modifié sur place).
+
+    Retourne la liste de floats retirée, ou None s'il n'y en avait pas.
+    """
+    if not isinstance(metadata, dict):
+        return None
+    embedding = metadata.get('embedding')
+    if not isinstance(embedding, dict):
+        return None
+    vector = embedding.pop('vector', None)
+    if vector is None:
+        return None
+    embedding.setdefault('dimension', len(vector) if isinstance(vector, list) else None)
+    embedding['storage'] = 'document_embeddings'
+    return vector if isinstance(vector, list) else None
@@ -0,0 +1,141 @@
+"""
+Compteurs de facettes (chambres / thèmes) de la Cour suprême.
+
+L'accordéon chambres → thèmes est la première chose chargée par chaque
+session du viewer, et chaque appel recalculait des `COUNT(DISTINCT …)` sur
+la jointure chambres × thèmes × classifications × décisions. Les compteurs
+sont désormais matérialisés dans `supreme_court_facet_counts` :
+
+- `('chamber', id)` : décisions distinctes classées dans la chambre et
+  thèmes distincts qui en contiennent ;
+- `('theme', id)` : décisions distinctes classées dans le thème.
+
+Seules les classifications dont la décision existe sont comptées (comme la
+jointure d'origine). Des triggers SQL tiennent la table à jour, quel que
+soit le processus qui écrit : insertion d'une classification (par exemple
+`harvest_section`), suppression d'une classification, et suppression d'une
+décision, qui retire désormais ses classifications au lieu de les laisser
+orphelines.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+DECISIONS_TABLE = 'supreme_court_decisions'
+CLASSIFICATIONS_TABLE = 'supreme_court_decision_classifications'
+FACET_COUNTS_TABLE = 'supreme_court_facet_counts'
+
+
+def _exists_decision(row: str) -> str:
+    return f"EXISTS (SELECT 1 FROM {DECISIONS_TABLE} WHERE id = {row}.decision_id)"
+
+
+def _other_classification(row: str, columns: tuple[str, ...], exclude_self: bool) -> str:
+    """Autre classification (décision existante) partageant les colonnes données avec `row`."""
+    conditions = [f"c.{column} = {row}.{column}" for column in columns]
+    if exclude_self:
+        conditions.append(f"c.id != {row}.id")
+    return f"""EXISTS (
+        SELECT 1 FROM {CLASSIFICATIONS_TABLE} c
+        JOIN {DECISIONS_TABLE} d ON d.id = c.decision_id
+        WHERE {' AND '.join(conditions)}
+    )"""
+
+
+def _bump(row: str, facet: str, facet_column: str, counter: str, delta: int,
+          columns: tuple[str, ...], exclude_self: bool) -> str:
+    """Ajoute `delta` au compteur si `row` est la seule classification de son groupe."""
+    return f"""
+        INSERT INTO {FACET_COUNTS_TABLE}(facet, facet_id, {counter})
+        SELECT '{facet}', {row}.{facet_column}, {max(delta, 0)}
+        WHERE NOT {_other_classification(row, columns, exclude_self)}
+        ON CONFLICT(facet, facet_id) DO UPDATE SET {counter} = {counter} + ({delta});
+    """
+
+
+def _maintenance_statements(row: str, delta: int, exclude_self: bool) -> str:
+    return ''.join([
+        _bump(row, 'theme', 'theme_id', 'decision_count', delta, ('theme_id', 'decision_id'), exclude_self),
+        _bump(row, 'chamber', 'chamber_id', 'decision_count', delta, ('chamber_id', 'decision_id'), exclude_self),
+        _bump(row, 'chamber', 'chamber_id', 'theme_count', delta, ('chamber_id', 'theme_id'), exclude_self),
+    ])
+
+
+def _create_statements() -> list[str]:
+    return [
+        f"""
+        CREATE TABLE IF NOT EXISTS {FACET_COUNTS_TABLE} (
+            facet TEXT NOT NULL,
+            facet_id INTEGER NOT NULL,
+            decision_count INTEGER NOT NULL DEFAULT 0,
+            theme_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (facet, facet_id)
+        ) WITHOUT ROWID
+        """,
+        # Tests d'unicité des triggers : (thème, décision), (chambre, décision), (chambre, thème)
+        f"CREATE INDEX IF NOT EXISTS idx_classifications_theme_decision ON {CLASSIFICATIONS_TABLE}(theme_id, decision_id)",
+        f"CREATE INDEX IF NOT EXISTS idx_classifications_chamber_decision ON {CLASSIFICATIONS_TABLE}(chamber_id, decision_id)",
+        f"CREATE INDEX IF NOT EXISTS idx_classifications_chamber_theme ON {CLASSIFICATIONS_TABLE}(chamber_id, theme_id)",
+        f"CREATE INDEX IF NOT EXISTS idx_classifications_decision ON {CLASSIFICATIONS_TABLE}(decision_id)",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FACET_COUNTS_TABLE}_ai AFTER INSERT ON {CLASSIFICATIONS_TABLE}
+        WHEN {_exists_decision('new')} BEGIN
+            {_maintenance_statements('new', 1, exclude_self=True)}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FACET_COUNTS_TABLE}_ad AFTER DELETE ON {CLASSIFICATIONS_TABLE}
+        WHEN {_exists_decision('old')} BEGIN
+            {_maintenance_statements('old', -1, exclude_self=False)}
+        END
+        """,
+        # BEFORE : la décision existe encore quand ses classifications sont retirées
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {FACET_COUNTS_TABLE}_decision_bd BEFORE DELETE ON {DECISIONS_TABLE} BEGIN
+            DELETE FROM {CLASSIFICATIONS_TABLE} WHERE decision_id = old.id;
+        END
+        """,
+    ]
+
+
+def _populate(conn: sqlite3.Connection) -> None:
+    conn.execute(f"""
+        INSERT OR REPLACE INTO {FACET_COUNTS_TABLE}(facet, facet_id, decision_count, theme_count)
+        SELECT 'chamber', c.chamber_id, COUNT(DISTINCT c.decision_id), COUNT(DISTINCT c.theme_id)
+        FROM {CLASSIFICATIONS_TABLE} c
+        JOIN {DECISIONS_TABLE} d ON d.id = c.decision_id
+        WHERE c.chamber_id IS NOT NULL
+        GROUP BY c.chamber_id
+    """)
+    conn.execute(f"""
+        INSERT OR REPLACE INTO {FACET_COUNTS_TABLE}(facet, facet_id, decision_count, theme_count)
+        SELECT 'theme', c.theme_id, COUNT(DISTINCT c.decision_id), 0
+        FROM {CLASSIFICATIONS_TABLE} c
+        JOIN {DECISIONS_TABLE} d ON d.id = c.decision_id
+        WHERE c.theme_id IS NOT NULL
+        GROUP BY c.theme_id
+    """)
+
+
+def ensure_facet_counts(conn: sqlite3.Connection) -> None:
+    """Crée la table des compteurs et ses triggers (remplissage initial inclus)."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+        (FACET_COUNTS_TABLE,)
+    ).fetchone()
+    if exists:
+        return
+    for statement in _create_statements():
+        conn.execute(statement)
+    _populate(conn)
+    conn.commit()
+
+
+def rebuild_facet_counts(conn: sqlite3.Connection) -> int:
+    """Recalcule tous les compteurs à partir des classifications."""
+    ensure_facet_counts(conn)
+    conn.execute(f"DELETE FROM {FACET_COUNTS_TABLE}")
+    _populate(conn)
+    conn.commit()
+    return conn.execute(f"SELECT COUNT(*) FROM {FACET_COUNTS_TABLE}").fetchone()[0]
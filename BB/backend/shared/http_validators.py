@@ -0,0 +1,139 @@
+"""
+Validateurs HTTP (ETag / Last-Modified) par URL, pour la revalidation conditionnelle.
+
+Les passes incrémentales re-téléchargeaient pages et PDF déjà traités pour
+constater, presque toujours, qu'ils n'avaient pas changé. La table
+`http_validators` garde les validateurs de la version déjà traitée de
+chaque URL :
+
+- `conditional_headers` en tire `If-None-Match` / `If-Modified-Since` ;
+- `is_unchanged` interprète la réponse : 304, ou mêmes validateurs quand le
+  serveur ignore les en-têtes conditionnels ; sans validateur comparable
+  (`validators_comparable`), l'état de la ressource est inconnu ;
+- `record_validators` enregistre la version traitée, dans la transaction de
+  l'appelant : les validateurs ne sont validés qu'avec le traitement
+  correspondant.
+
+Les routes en aval (téléchargement, extraction, analyse) ne retraitent que
+les éléments signalés comme modifiés.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+VALIDATORS_TABLE = 'http_validators'
+
+
+def ensure_validators_table(conn: sqlite3.Connection) -> None:
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {VALIDATORS_TABLE} (
+            url TEXT PRIMARY KEY,
+            etag TEXT,
+            last_modified TEXT,
+            checked_at TEXT,
+            changed_at TEXT
+        ) WITHOUT ROWID
+    """)
+
+
+def load_validators(conn: sqlite3.Connection, urls) -> dict[str, tuple]:
+    """{url: (etag, last_modified)} des URL déjà vues."""
+    urls = list(urls)
+    validators = {}
+    # Par tranches : limite du nombre de paramètres SQLite
+    for start in range(0, len(urls), 500):
+        chunk = urls[start:start + 500]
+        placeholders = ','.join('?' * len(chunk))
+        for url, etag, last_modified in conn.execute(
+            f"SELECT url, etag, last_modified FROM {VALIDATORS_TABLE} WHERE url IN ({placeholders})",
+            chunk
+        ):
+            validators[url] = (etag, last_modified)
+    return validators
+
+
+def conditional_headers(validators: tuple | None) -> dict[str, str]:
+    """En-têtes conditionnels pour des validateurs (etag, last_modified)."""
+    if not validators:
+        return {}
+    etag, last_modified = validators
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+
+def response_validators(response) -> tuple:
+    return response.headers.get('ETag'), response.headers.get('Last-Modified')
+
+
+def validators_comparable(validators: tuple | None, etag: str | None, last_modified: str | None) -> bool:
+    """Vrai si un même validateur (ETag ou Last-Modified) est connu des deux côtés."""
+    if not validators:
+        return False
+    stored_etag, stored_last_modified = validators
+    return bool((stored_etag and etag) or (stored_last_modified and last_modified))
+
+
+def validators_match(validators: tuple | None, etag: str | None, last_modified: str | None) -> bool:
+    """Vrai si (etag, last_modified) désignent la version décrite par `validators`."""
+    if not validators:
+        return False
+    stored_etag, stored_last_modified = validators
+    if stored_etag and etag:
+        return etag == stored_etag
+    return bool(stored_last_modified and last_modified == stored_last_modified)
+
+
+def is_unchanged(response, validators: tuple | None) -> bool:
+    """Vrai si la réponse confirme la version déjà traitée."""
+    if response.status_code == 304:
+        return True
+    if response.status_code != 200:
+        return False
+    return validators_match(validators, *response_validators(response))
+
+
+def record_validators(conn: sqlite3.Connection, url: str, etag: str | None,
+                      last_modified: str | None, changed: bool = True) -> None:
+    """
+    Enregistre les validateurs de la version traitée (sans commit).
+
+    Une réponse sans ETag ni Last-Modified n'est pas enregistrée : elle
+    efface au contraire d'anciens validateurs qui ne décrivent plus la
+    version traitée.
+    """
+    if changed and etag is None and last_modified is None:
+        conn.execute(f"DELETE FROM {VALIDATORS_TABLE} WHERE url = ?", (url,))
+    elif changed:
+        conn.execute(f"""
+            INSERT INTO {VALIDATORS_TABLE}(url, etag, last_modified, checked_at, changed_at)
+            VALUES (?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            ON CONFLICT(url) DO UPDATE SET
+                etag = excluded.etag,
+                last_modified = excluded.last_modified,
+                checked_at = excluded.checked_at,
+                changed_at = excluded.changed_at
+        """, (url, etag, last_modified))
+    else:
+        conn.execute(
+            f"UPDATE {VALIDATORS_TABLE} SET checked_at = CURRENT_TIMESTAMP WHERE url = ?",
+            (url,)
+        )
+
+
+def revalidate(http, conn: sqlite3.Connection, url: str, method: str = 'GET', **kwargs):
+    """
+    Requête conditionnelle sur `url` : (réponse, modifiée).
+
+    Les validateurs ne sont pas enregistrés : l'appelant appelle
+    `record_validators` une fois le contenu traité.
+    """
+    validators = load_validators(conn, [url]).get(url)
+    headers = dict(kwargs.pop('headers', None) or {})
+    headers.update(conditional_headers(validators))
+    response = http.request(method, url, headers=headers, **kwargs)
+    return response, not is_unchanged(response, validators)
@@ -10,6 +10,8 @@ from pathlib import Path
 from io import BytesIO
 import base64
 
+from shared.document_fts import PAGE_BREAK, index_document_text_safely
+
 class IntelligentTextExtractor:
 
     def __init__(self, db_path='harvester.db'):
@@ -123,10 +125,11 @@ class IntelligentTextExtractor:
             with pdfplumber.open(pdf_path) as pdf:
                 for page in pdf.pages:
                     page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n\n"
+                    # Saut de page conservé même pour une page vide (numérotation de l'index plein texte)
+                    text += (page_text or "") + "\n\n" + PAGE_BREAK
 
-            return text.strip(), 'pdfplumber'
+            # strip(' \n') et non strip() : '\f' est un blanc, les pages vides en tête perdraient leur saut
+            return text.strip(' \n'), 'pdfplumber'
 
         except ImportError:
             print("⚠️ PDFPlumber non installé")
@@ -148,9 +151,10 @@ class IntelligentTextExtractor:
             for i, image in enumerate(images):
                 # OCR avec support arabe + français
                 page_text = pytesseract.image_to_string(image, lang='ara+fra')
-                text += page_text + "\n\n"
+                # Tesseract termine chaque page par '\f' : un seul saut par page
+                text += page_text.replace(PAGE_BREAK, '') + "\n\n" + PAGE_BREAK
 
-            return text.strip(), 'ocr_tesseract'
+            return text.strip(' \n'), 'ocr_tesseract'
 
         except ImportError as e:
             print(f"⚠️ Dépendances OCR non installées: {e}")
@@ -210,9 +214,9 @@ Instructions:
                     max_tokens=4000
                 )
 
-                full_text += response.choices[0].message.content + "\n\n"
+                full_text += response.choices[0].message.content + "\n\n" + PAGE_BREAK
 
-            return full_text.strip(), 'vision_api'
+            return full_text.strip(' \n'), 'vision_api'
 
         except ImportError as e:
             print(f"⚠️ OpenAI SDK non installé: {e}")
@@ -283,6 +287,9 @@ Instructions:
         except Exception as e:
             print(f"❌ Erreur mise à jour DB: {e}")
 
+        if status_value == 'success':
+            index_document_text_safely(self.db_path, document_id, text, txt_path)
+
         return {
             'text': text,
             'method': method,
@@ -0,0 +1,107 @@
+"""
+Année, numéro et langue des numéros du Journal officiel, en colonnes.
+
+Les écrans JORADP filtraient l'année par `url LIKE '%F1973%'` et le numéro
+par `url LIKE '%12%'` (parcours complets), puis ré-analysaient l'URL
+`.../F<AAAA><NNN>.pdf` ligne par ligne en Python. Les colonnes
+`jo_year`, `jo_number` et `jo_language` de `documents` portent ces valeurs
+et sont indexées :
+
+- `JORADPExhaustiveHarvester.save_document` les renseigne à l'insertion ;
+- un trigger les déduit de l'URL pour les autres écrivains (et si l'URL
+  change) ;
+- `ensure_issue_columns` ajoute les colonnes et complète les lignes
+  existantes (voir aussi `scripts/backfill_jo_issue_columns.py`).
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+
+ISSUE_COLUMNS = {
+    'jo_year': 'INTEGER',
+    'jo_number': 'INTEGER',
+    'jo_language': 'TEXT',
+}
+ISSUE_LANGUAGES = {'f': 'fr', 'a': 'ar'}
+
+_ISSUE_FILENAME = re.compile(r'([FA])(\d{4})(\d{3})\.pdf$', re.IGNORECASE)
+_ISSUE_URL_GLOB = "'*[fa][0-9][0-9][0-9][0-9][0-9][0-9][0-9].pdf'"
+
+
+def parse_issue_url(url: str | None) -> tuple[int | None, int | None, str | None]:
+    """(année, numéro, langue) d'une URL `.../F<AAAA><NNN>.pdf`, sinon (None, None, None)."""
+    match = _ISSUE_FILENAME.search(url or '')
+    if not match:
+        return None, None, None
+    return int(match.group(2)), int(match.group(3)), ISSUE_LANGUAGES[match.group(1).lower()]
+
+
+def _issue_url_matches(row: str) -> str:
+    return f"lower(COALESCE({row}.url, '')) GLOB {_ISSUE_URL_GLOB}"
+
+
+def issue_expressions(row: str) -> dict[str, str]:
+    """Mêmes valeurs que `parse_issue_url`, en SQL (triggers, rattrapage, projections)."""
+    url = f"lower(COALESCE({row}.url, ''))"
+    matches = _issue_url_matches(row)
+    return {
+        'jo_year': f"CASE WHEN {matches} THEN CAST(substr({url}, -11, 4) AS INTEGER) END",
+        'jo_number': f"CASE WHEN {matches} THEN CAST(substr({url}, -7, 3) AS INTEGER) END",
+        'jo_language': f"CASE WHEN {matches} THEN "
+                       f"CASE substr({url}, -12, 1) WHEN 'f' THEN 'fr' WHEN 'a' THEN 'ar' END END",
+    }
+
+
+def _assignments(row: str) -> str:
+    return ', '.join(f"{column} = {expression}" for column, expression in issue_expressions(row).items())
+
+
+def ensure_issue_columns(conn: sqlite3.Connection) -> int:
+    """
+    Ajoute les colonnes, leurs index et triggers si besoin.
+
+    Quand les colonnes viennent d'être créées, les lignes existantes sont
+    complétées ; retourne le nombre de lignes renseignées.
+    """
+    existing = {row[1] for row in conn.execute("PRAGMA table_info(documents)").fetchall()}
+    missing = [column for column in ISSUE_COLUMNS if column not in existing]
+    for column in missing:
+        conn.execute(f"ALTER TABLE documents ADD COLUMN {column} {ISSUE_COLUMNS[column]}")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_jo_issue ON documents(jo_year, jo_number)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_documents_jo_number ON documents(jo_number, jo_year)")
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS documents_jo_issue_ai AFTER INSERT ON documents
+        WHEN new.jo_year IS NULL BEGIN
+            UPDATE documents SET {_assignments('new')} WHERE id = new.id;
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS documents_jo_issue_au AFTER UPDATE OF url ON documents BEGIN
+            UPDATE documents SET {_assignments('new')} WHERE id = new.id;
+        END
+    """)
+    backfilled = backfill_issue_columns(conn) if missing else 0
+    conn.commit()
+    return backfilled
+
+
+def backfill_issue_columns(conn: sqlite3.Connection, only_missing: bool = True) -> int:
+    """
+    Renseigne les colonnes à partir de l'URL (sans commit).
+
+    Retourne le nombre de lignes renseignées : les URL non reconnues ne
+    sont pas comptées (elles sont remises à NULL si `only_missing=False`).
+    """
+    matches = _issue_url_matches('documents')
+    if only_missing:
+        where = f"jo_year IS NULL AND {matches}"
+    else:
+        where = matches
+        conn.execute(f"""
+            UPDATE documents SET {', '.join(f'{column} = NULL' for column in ISSUE_COLUMNS)}
+            WHERE NOT ({matches}) AND jo_year IS NOT NULL
+        """)
+    cursor = conn.execute(f"UPDATE documents SET {_assignments('documents')} WHERE {where}")
+    return cursor.rowcount
@@ -0,0 +1,150 @@
+"""
+Pagination par clé (seek) des documents d'une session.
+
+`LIMIT ? OFFSET ?` oblige SQLite à parcourir puis jeter toutes les lignes
+des pages précédentes : les pages profondes d'une session 1962–2025
+ralentissent linéairement. Les documents sont triés par numéro du Journal
+officiel (jo_year, jo_number, id décroissants) ; le curseur opaque
+`next_cursor` encode la clé de la dernière ligne servie et la page suivante
+reprend directement à cette position dans l'index
+`idx_documents_session_issue`, qui couvre le tri.
+
+Le mode par numéro de page reste disponible (petites sessions, saut direct
+à une page). Le total, qui demande un `COUNT(*)` complet, est mis en cache
+quelques secondes par jeu de filtres.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from shared.jo_issue import ensure_issue_columns
+
+SESSION_ORDER_INDEX = 'idx_documents_session_issue'
+DOCUMENT_ORDER_SQL = 'd.jo_year DESC, d.jo_number DESC, d.id DESC'
+SESSION_COUNT_TTL = float(os.getenv('SESSION_COUNT_TTL', '30'))
+SESSION_COUNT_MAX_ENTRIES = 512
+
+
+def ensure_session_order_index(conn) -> None:
+    """Migration (à l'import des routes, pas par requête) : index couvrant le tri des listes."""
+    ensure_issue_columns(conn)
+    # L'id (rowid) est implicitement la dernière colonne de l'index
+    conn.execute("DROP INDEX IF EXISTS idx_documents_session_order")
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS {SESSION_ORDER_INDEX} ON documents(session_id, jo_year, jo_number)"
+    )
+    conn.commit()
+
+
+def encode_keyset_cursor(jo_year, jo_number, document_id) -> str:
+    raw = json.dumps(['k', jo_year, jo_number, int(document_id)], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_keyset_cursor(cursor: str | None) -> tuple | None:
+    """(jo_year, jo_number, id) de la dernière ligne servie, ou None si le curseur est absent ou illisible."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        marker, jo_year, jo_number, document_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        return None
+    if marker != 'k' or not isinstance(document_id, int):
+        return None
+    if (jo_year is None) != (jo_number is None):
+        return None
+    if jo_year is not None and not (isinstance(jo_year, int) and isinstance(jo_number, int)):
+        return None
+    return jo_year, jo_number, document_id
+
+
+def seek_document_keys(cursor, from_sql: str, where_sql: str, params: list,
+                       limit: int, after: tuple | None = None, offset: int = 0) -> list[tuple]:
+    """
+    Clés (id, jo_year, jo_number) d'une page triée par numéro du JO puis id décroissants.
+
+    Avec `after`, la page commence juste après cette clé (seek) ; sinon
+    `offset` est appliqué (mode numéro de page). Les documents sans numéro
+    (NULL, triés en dernier) sont parcourus dans un second temps : une
+    comparaison de row values avec NULL n'est jamais vraie.
+    """
+    select = f"SELECT d.id, d.jo_year, d.jo_number FROM {from_sql} WHERE {where_sql}"
+    if after is None:
+        cursor.execute(f"{select} ORDER BY {DOCUMENT_ORDER_SQL} LIMIT ? OFFSET ?", list(params) + [limit, offset])
+        return [tuple(row) for row in cursor.fetchall()]
+
+    jo_year, jo_number, document_id = after
+    rows = []
+    if jo_year is not None:
+        cursor.execute(
+            f"{select} AND (d.jo_year, d.jo_number, d.id) < (?, ?, ?) ORDER BY {DOCUMENT_ORDER_SQL} LIMIT ?",
+            list(params) + [jo_year, jo_number, document_id, limit]
+        )
+        rows = [tuple(row) for row in cursor.fetchall()]
+        if len(rows) < limit:
+            cursor.execute(
+                f"{select} AND d.jo_year IS NULL ORDER BY {DOCUMENT_ORDER_SQL} LIMIT ?",
+                list(params) + [limit - len(rows)]
+            )
+            rows.extend(tuple(row) for row in cursor.fetchall())
+    else:
+        cursor.execute(
+            f"{select} AND d.jo_year IS NULL AND d.id < ? ORDER BY {DOCUMENT_ORDER_SQL} LIMIT ?",
+            list(params) + [document_id, limit]
+        )
+        rows = [tuple(row) for row in cursor.fetchall()]
+    return rows
+
+
+def next_keyset_cursor(keys: list[tuple], limit: int) -> str | None:
+    """Curseur de la page suivante (None si la page n'est pas pleine)."""
+    if len(keys) < limit or not keys:
+        return None
+    document_id, jo_year, jo_number = keys[-1]
+    return encode_keyset_cursor(jo_year, jo_number, document_id)
+
+
+class CountCache:
+    """Totaux `COUNT(*)` par requête et paramètres, avec TTL et éviction LRU."""
+
+    def __init__(self, ttl: float = SESSION_COUNT_TTL, max_entries: int = SESSION_COUNT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def count(self, cursor, sql: str, params: list) -> tuple[int, bool]:
+        """(total, servi_depuis_le_cache)."""
+        key = (sql, tuple(params))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[1], True
+        cursor.execute(sql, params)
+        total = cursor.fetchone()[0]
+        with self._lock:
+            self._entries[key] = (now, total)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return total, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_COUNT_CACHE = CountCache()
+
+
+def get_count_cache() -> CountCache:
+    return _COUNT_CACHE
@@ -0,0 +1,285 @@
+"""
+Embeddings par passage des numéros du JORADP.
+
+Un numéro du Journal officiel compte souvent des dizaines de pages, alors
+que le modèle d'embedding ne lit que quelques centaines de mots : encoder
+`text[:5000]` ne représentait que les premières pages. Le texte extrait est
+désormais découpé en passages qui se chevauchent, tous encodés en un seul
+appel `encode` par document, et stockés dans `document_passages` (vecteur,
+page, décalages).
+
+- le vecteur du document (`document_embeddings`) devient la moyenne
+  normalisée de ses passages ;
+- la recherche par passage classe les documents par leur meilleur passage
+  et renvoie ce passage.
+"""
+
+from __future__ import annotations
+
+import re
+import sqlite3
+import threading
+from bisect import bisect_right
+from pathlib import Path
+
+import numpy as np
+
+from shared.document_fts import PAGE_BREAK
+from shared.vector_index import normalize_vector, top_k
+
+PASSAGES_TABLE = 'document_passages'
+# all-MiniLM-L6-v2 tronque à 256 sous-mots : ~150 mots par passage
+PASSAGE_WORDS = 150
+PASSAGE_OVERLAP = 30
+ENCODE_BATCH_SIZE = 64
+
+_WORD = re.compile(r'\S+')
+
+
+def ensure_passages_table(conn) -> None:
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {PASSAGES_TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            document_id INTEGER NOT NULL,
+            passage_index INTEGER NOT NULL,
+            page INTEGER,
+            char_start INTEGER NOT NULL,
+            char_end INTEGER NOT NULL,
+            content TEXT NOT NULL,
+            model_name TEXT NOT NULL,
+            dimension INTEGER NOT NULL,
+            embedding BLOB NOT NULL,
+            UNIQUE(document_id, passage_index)
+        )
+    """)
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS idx_{PASSAGES_TABLE}_model ON {PASSAGES_TABLE}(model_name, document_id)"
+    )
+
+
+def chunk_text(text: str | None, words: int = PASSAGE_WORDS, overlap: int = PASSAGE_OVERLAP) -> list[dict]:
+    """
+    Découpe un texte en passages de `words` mots se chevauchant de `overlap` mots.
+
+    Chaque passage porte ses décalages (caractères) dans le texte complet et
+    le numéro de la page (séparateur `\\f`) où il commence.
+    """
+    text = text or ''
+    matches = list(_WORD.finditer(text))
+    if not matches:
+        return []
+    step = max(1, words - overlap)
+    page_starts = [0] + [index + 1 for index, ch in enumerate(text) if ch == PAGE_BREAK]
+    passages = []
+    start = 0
+    while start < len(matches):
+        window = matches[start:start + words]
+        char_start, char_end = window[0].start(), window[-1].end()
+        page = bisect_right(page_starts, char_start)
+        passages.append({
+            'passage_index': len(passages),
+            'page': page,
+            'char_start': char_start,
+            'char_end': char_end,
+            'content': ' '.join(match.group(0) for match in window),
+        })
+        if start + words >= len(matches):
+            break
+        start += step
+    return passages
+
+
+def embed_document_text(model, text: str | None) -> tuple[list[dict], np.ndarray | None, np.ndarray | None]:
+    """
+    Encode tous les passages d'un document en un seul appel.
+
+    Retourne (passages, matrice des vecteurs normalisés, vecteur du document).
+    """
+    passages = chunk_text(text)
+    if not passages:
+        return [], None, None
+    vectors = model.encode(
+        [passage['content'] for passage in passages],
+        batch_size=ENCODE_BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+    )
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(len(passages), -1)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms > 0, norms, 1.0)
+    document_vector = normalize_vector(vectors.mean(axis=0))
+    return passages, vectors, document_vector
+
+
+def save_document_passages(conn, document_id: int, passages: list[dict], vectors: np.ndarray, model_name: str) -> int:
+    """Remplace les passages d'un document (sans commit)."""
+    ensure_passages_table(conn)
+    conn.execute(f"DELETE FROM {PASSAGES_TABLE} WHERE document_id = ?", (document_id,))
+    conn.executemany(
+        f"""
+        INSERT INTO {PASSAGES_TABLE}
+            (document_id, passage_index, page, char_start, char_end, content, model_name, dimension, embedding)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        [
+            (
+                document_id, passage['passage_index'], passage['page'],
+                passage['char_start'], passage['char_end'], passage['content'],
+                model_name, int(vector.shape[0]), np.asarray(vector, dtype=np.float32).tobytes(),
+            )
+            for passage, vector in zip(passages, vectors)
+        ]
+    )
+    return len(passages)
+
+
+def remove_document_passages(conn, document_id: int) -> None:
+    ensure_passages_table(conn)
+    conn.execute(f"DELETE FROM {PASSAGES_TABLE} WHERE document_id = ?", (document_id,))
+
+
+class PassageIndex:
+    """
+    Matrice résidente des vecteurs de passages d'un modèle.
+
+    Tenue à jour par id : seuls les passages d'id supérieur au dernier chargé
+    sont lus. Les passages d'un document étant supprimés puis réinsérés, un
+    écart de COUNT(*) signale des suppressions : on retire alors les lignes
+    disparues d'après la seule liste des ids, sans relire les vecteurs.
+    """
+
+    def __init__(self, db_path: str, model_name: str):
+        self.db_path = db_path
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._last_id = 0
+        self.passage_ids = np.empty(0, dtype=np.int64)
+        self.document_ids = np.empty(0, dtype=np.int64)
+        self.matrix = None
+
+    def _refresh(self, conn) -> None:
+        try:
+            rows = conn.execute(
+                f"SELECT id, document_id, embedding FROM {PASSAGES_TABLE} WHERE model_name = ? AND id > ? ORDER BY id",
+                (self.model_name, self._last_id)
+            ).fetchall()
+            count = conn.execute(
+                f"SELECT COUNT(*) FROM {PASSAGES_TABLE} WHERE model_name = ?", (self.model_name,)
+            ).fetchone()[0]
+        except sqlite3.OperationalError:
+            return  # table pas encore créée : aucun passage
+        passage_ids, document_ids, matrix = self.passage_ids, self.document_ids, self.matrix
+
+        if rows:
+            dimension = matrix.shape[1] if matrix is not None else len(rows[0][2]) // 4
+            vectors = [np.frombuffer(row[2], dtype=np.float32) for row in rows]
+            keep = [index for index, vector in enumerate(vectors) if vector.shape[0] == dimension]
+            if keep:
+                new_matrix = np.vstack([vectors[i] for i in keep])
+                matrix = new_matrix if matrix is None else np.vstack([matrix, new_matrix])
+                passage_ids = np.concatenate([
+                    passage_ids, np.fromiter((rows[i][0] for i in keep), dtype=np.int64, count=len(keep))
+                ])
+                document_ids = np.concatenate([
+                    document_ids, np.fromiter((rows[i][1] for i in keep), dtype=np.int64, count=len(keep))
+                ])
+            self._last_id = int(rows[-1][0])
+
+        if count != len(passage_ids) and len(passage_ids):
+            current = np.fromiter(
+                (row[0] for row in conn.execute(
+                    f"SELECT id FROM {PASSAGES_TABLE} WHERE model_name = ?", (self.model_name,)
+                )),
+                dtype=np.int64,
+            )
+            alive = np.isin(passage_ids, current)
+            if not alive.all():
+                passage_ids, document_ids = passage_ids[alive], document_ids[alive]
+                matrix = matrix[alive] if alive.any() else None
+
+        self.passage_ids, self.document_ids, self.matrix = passage_ids, document_ids, matrix
+
+    def search(self, query_vector, limit: int = 20, document_ids: set | None = None) -> list[dict]:
+        """
+        Documents classés par leur meilleur passage.
+
+        Retourne [{'document_id', 'score', 'passage_id', 'matching_passages'}].
+        """
+        query = normalize_vector(query_vector)
+        if query is None:
+            return []
+        conn = sqlite3.connect(self.db_path)
+        try:
+            with self._lock:
+                self._refresh(conn)
+                matrix, passage_ids, owners = self.matrix, self.passage_ids, self.document_ids
+        finally:
+            conn.close()
+        if matrix is None or matrix.shape[1] != query.shape[0]:
+            return []
+
+        if document_ids is not None:
+            # Filtre appliqué avant le produit : seuls les passages des documents autorisés sont scannés
+            rows = np.flatnonzero(np.isin(owners, np.fromiter(document_ids, dtype=np.int64, count=len(document_ids))))
+            if not len(rows):
+                return []
+            scores = matrix[rows] @ query
+            passage_ids, owners = passage_ids[rows], owners[rows]
+        else:
+            scores = matrix @ query
+
+        # Meilleurs passages d'abord : la première occurrence de chaque document est son meilleur passage
+        depth = min(len(scores), max(limit * 20, 200))
+        while True:
+            order = top_k(scores, depth)
+            documents, first, counts = np.unique(owners[order], return_index=True, return_counts=True)
+            if len(documents) >= limit or depth >= len(scores):
+                break
+            depth = min(len(scores), depth * 4)
+        best = order[first]
+        ranking = np.argsort(-scores[best], kind='stable')[:limit]
+        return [
+            {
+                'document_id': int(documents[i]),
+                'score': float(scores[best[i]]),
+                'passage_id': int(passage_ids[best[i]]),
+                'matching_passages': int(counts[i]),
+            }
+            for i in ranking
+        ]
+
+
+_INDEXES: dict[tuple[str, str], PassageIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_passage_index(db_path: str, model_name: str) -> PassageIndex:
+    key = (str(Path(db_path).resolve()), model_name)
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = PassageIndex(db_path, model_name)
+            _INDEXES[key] = index
+        return index
+
+
+def fetch_passages(conn, passage_ids: list[int]) -> dict[int, dict]:
+    """Détail (page, décalages, texte) des passages demandés."""
+    if not passage_ids:
+        return {}
+    placeholders = ','.join('?' * len(passage_ids))
+    rows = conn.execute(f"""
+        SELECT id, document_id, passage_index, page, char_start, char_end, content
+        FROM {PASSAGES_TABLE}
+        WHERE id IN ({placeholders})
+    """, passage_ids).fetchall()
+    return {
+        row[0]: {
+            'passage_index': row[2],
+            'page': row[3],
+            'char_start': row[4],
+            'char_end': row[5],
+            'content': row[6],
+        }
+        for row in rows
+    }
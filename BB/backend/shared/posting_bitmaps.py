@@ -0,0 +1,136 @@
+"""
+Listes de postings en bitmaps compressés, mises en cache en mémoire.
+
+La recherche avancée combine des ensembles de décisions (mots-clés,
+chambres, thèmes). Plutôt que de matérialiser des `set` Python puis de
+renvoyer des milliers de paramètres `id IN (...)` à SQLite, chaque posting
+list est chargée une fois sous forme de bitmap ; ET/OU/SAUF deviennent des
+opérations sur bitmaps.
+
+`pyroaring` (Roaring bitmaps) est utilisé s'il est installé ; sinon un
+bitmap basé sur les entiers Python (opérations bit à bit natives) offre la
+même interface.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+try:
+    from pyroaring import BitMap as _RoaringBitMap
+    ROARING_AVAILABLE = True
+except ImportError:
+    ROARING_AVAILABLE = False
+
+POSTING_CACHE_SIZE = int(os.getenv('POSTING_CACHE_SIZE', '4096'))
+# Filet de sécurité pour les écritures faites hors de ce processus (moissonneurs)
+POSTING_CACHE_TTL = float(os.getenv('POSTING_CACHE_TTL', '300'))
+
+
+class _IntBitmap:
+    """Bitmap d'entiers positifs stocké dans un `int` Python (repli sans pyroaring)."""
+
+    __slots__ = ('_bits',)
+
+    def __init__(self, values=(), _bits: int | None = None):
+        if _bits is not None:
+            self._bits = _bits
+            return
+        bits = 0
+        for value in values:
+            bits |= 1 << int(value)
+        self._bits = bits
+
+    def __and__(self, other):
+        return _IntBitmap(_bits=self._bits & other._bits)
+
+    def __or__(self, other):
+        return _IntBitmap(_bits=self._bits | other._bits)
+
+    def __sub__(self, other):
+        return _IntBitmap(_bits=self._bits & ~other._bits)
+
+    def __len__(self):
+        return self._bits.bit_count() if hasattr(self._bits, 'bit_count') else bin(self._bits).count('1')
+
+    def __bool__(self):
+        return self._bits != 0
+
+    def __contains__(self, value):
+        return value >= 0 and (self._bits >> int(value)) & 1 == 1
+
+    def __iter__(self):
+        """Identifiants en ordre croissant."""
+        reversed_bits = bin(self._bits)[:1:-1]
+        position = reversed_bits.find('1')
+        while position != -1:
+            yield position
+            position = reversed_bits.find('1', position + 1)
+
+
+Bitmap = _RoaringBitMap if ROARING_AVAILABLE else _IntBitmap
+
+
+def sorted_id_chunks(bitmap, size: int = 500):
+    """Découpe un bitmap en listes d'ids triés (taille compatible avec la limite de variables SQLite)."""
+    chunk = []
+    for value in bitmap:
+        chunk.append(int(value))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class PostingListCache:
+    """Cache LRU de bitmaps, invalidable par famille de clés (`key[0]`)."""
+
+    def __init__(self, max_entries: int = POSTING_CACHE_SIZE, ttl: float = POSTING_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, loader):
+        """Retourne le bitmap de `key`, en le construisant via `loader()` (itérable d'ids) au besoin."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                return entry[1]
+        bitmap = Bitmap(loader())
+        with self._lock:
+            self._entries[key] = (now, bitmap)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return bitmap
+
+    def invalidate(self, family: str | None = None) -> None:
+        with self._lock:
+            if family is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] == family]:
+                del self._entries[key]
+
+
+_CACHES: dict[str, PostingListCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def get_posting_cache(db_path: str) -> PostingListCache:
+    """Cache partagé du processus pour une base donnée."""
+    key = str(Path(db_path).resolve())
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = PostingListCache()
+            _CACHES[key] = cache
+        return cache
@@ -0,0 +1,216 @@
+"""
+Cache des embeddings de requêtes de recherche.
+
+L'encodage d'une requête par le modèle est le coût CPU dominant d'une
+recherche sémantique, alors que les mêmes requêtes reviennent sans cesse
+(pagination, requêtes juridiques fréquentes). Les vecteurs sont mis en
+cache par (modèle, texte normalisé) :
+
+- en mémoire, LRU avec durée de vie ;
+- optionnellement sur disque (petite base SQLite dédiée) pour survivre
+  aux redémarrages. `QUERY_EMBEDDING_CACHE_DB=` (vide) désactive ce niveau.
+
+Les compteurs hits/misses sont exposés par `stats()`.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '2048'))
+QUERY_EMBEDDING_CACHE_TTL = float(os.getenv('QUERY_EMBEDDING_CACHE_TTL', '3600'))
+QUERY_EMBEDDING_DISK_TTL = float(os.getenv('QUERY_EMBEDDING_DISK_TTL', str(30 * 24 * 3600)))
+QUERY_EMBEDDING_CACHE_DB = os.getenv(
+    'QUERY_EMBEDDING_CACHE_DB',
+    str(Path(__file__).resolve().parents[1] / 'query_embeddings.db')
+)
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+# Format des clés du cache disque (1 : sans passage en minuscules)
+QUERY_KEY_VERSION = 1
+
+
+def normalize_query_text(text: str | None) -> str:
+    """Forme canonique d'une requête : NFC et espaces réduits (casse conservée, modèles sensibles à la casse)."""
+    value = unicodedata.normalize('NFC', text or '')
+    return _WHITESPACE.sub(' ', value).strip()
+
+
+class QueryEmbeddingCache:
+    """Cache LRU + TTL des vecteurs de requêtes, avec niveau disque facultatif."""
+
+    def __init__(
+        self,
+        max_entries: int = QUERY_EMBEDDING_CACHE_SIZE,
+        ttl: float = QUERY_EMBEDDING_CACHE_TTL,
+        disk_path: str | None = QUERY_EMBEDDING_CACHE_DB,
+        disk_ttl: float = QUERY_EMBEDDING_DISK_TTL,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_path = disk_path or None
+        self.disk_ttl = disk_ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_ready = False
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    # --- niveau disque -------------------------------------------------
+
+    def _disk_connect(self) -> sqlite3.Connection | None:
+        if not self.disk_path:
+            return None
+        try:
+            conn = sqlite3.connect(self.disk_path, timeout=5)
+            if not self._disk_ready:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS query_embeddings (
+                        model_name TEXT NOT NULL,
+                        query TEXT NOT NULL,
+                        dimension INTEGER NOT NULL,
+                        vector BLOB NOT NULL,
+                        created_at REAL NOT NULL,
+                        PRIMARY KEY (model_name, query)
+                    )
+                """)
+                if conn.execute("PRAGMA user_version").fetchone()[0] < QUERY_KEY_VERSION:
+                    # Anciennes clés en minuscules : vecteurs d'une casse arbitraire
+                    conn.execute("DELETE FROM query_embeddings")
+                    conn.execute(f"PRAGMA user_version = {QUERY_KEY_VERSION}")
+                conn.commit()
+                self._disk_ready = True
+            return conn
+        except sqlite3.Error as exc:
+            print(f"⚠️  Cache disque des embeddings de requêtes désactivé: {exc}")
+            self.disk_path = None
+            return None
+
+    def _disk_get(self, key: tuple) -> np.ndarray | None:
+        conn = self._disk_connect()
+        if conn is None:
+            return None
+        try:
+            row = conn.execute(
+                "SELECT vector, created_at FROM query_embeddings WHERE model_name = ? AND query = ?",
+                key
+            ).fetchone()
+        except sqlite3.Error:
+            return None
+        finally:
+            conn.close()
+        if row is None or time.time() - row[1] >= self.disk_ttl:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def _disk_put(self, key: tuple, vector: np.ndarray) -> None:
+        conn = self._disk_connect()
+        if conn is None:
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO query_embeddings(model_name, query, dimension, vector, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key[0], key[1], int(vector.shape[0]), vector.tobytes(), time.time())
+            )
+            conn.commit()
+        except sqlite3.Error as exc:
+            print(f"⚠️  Écriture du cache d'embedding impossible: {exc}")
+        finally:
+            conn.close()
+
+    # --- API -----------------------------------------------------------
+
+    def get(self, model_name: str, text: str) -> np.ndarray | None:
+        key = (model_name, normalize_query_text(text))
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        vector = self._disk_get(key)
+        if vector is not None:
+            self._remember(key, vector)
+            with self._lock:
+                self.disk_hits += 1
+        return vector
+
+    def put(self, model_name: str, text: str, vector) -> np.ndarray:
+        key = (model_name, normalize_query_text(text))
+        vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+        vector.setflags(write=False)
+        self._remember(key, vector)
+        self._disk_put(key, vector)
+        return vector
+
+    def _remember(self, key: tuple, vector: np.ndarray) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def encode(self, model, model_name: str, text: str, normalize_embeddings: bool = False) -> np.ndarray:
+        """Vecteur de la requête, calculé par `model.encode` seulement en cas d'absence."""
+        cache_name = f"{model_name}|norm" if normalize_embeddings else model_name
+        cached = self.get(cache_name, text)
+        if cached is not None:
+            return cached
+        with self._lock:
+            self.misses += 1
+        vector = model.encode(
+            normalize_query_text(text),
+            convert_to_numpy=True,
+            normalize_embeddings=normalize_embeddings
+        )
+        return self.put(cache_name, text, vector)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.disk_hits) / lookups, 4) if lookups else None,
+                'disk_path': self.disk_path,
+            }
+
+
+_CACHE: QueryEmbeddingCache | None = None
+_CACHE_LOCK = threading.Lock()
+
+
+def get_query_embedding_cache() -> QueryEmbeddingCache:
+    """Cache partagé du processus."""
+    global _CACHE
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = QueryEmbeddingCache()
+        return _CACHE
+
+
+def encode_query(model, model_name: str, text: str, normalize_embeddings: bool = False) -> np.ndarray:
+    """Raccourci : encode `text` via le cache partagé."""
+    return get_query_embedding_cache().encode(model, model_name, text, normalize_embeddings)
@@ -0,0 +1,56 @@
+"""
+Limitation de débit par hôte (seau à jetons) pour les moissonneurs.
+
+Les sondes concurrentes partagent un seau par hôte : `rate` requêtes par
+seconde en régime établi, avec des rafales d'au plus `burst` requêtes.
+Plusieurs moissonneurs d'un même processus qui visent le même site
+partagent donc le même budget de politesse.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """Seau à jetons thread-safe : `acquire()` bloque jusqu'à disposer d'un jeton."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate doit être strictement positif")
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_BUCKETS: dict[str, TokenBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def get_host_bucket(url: str, rate: float, burst: int = 1) -> TokenBucket:
+    """Seau partagé de l'hôte de `url` (créé au premier appel avec `rate` / `burst`)."""
+    host = urlsplit(url).netloc.lower()
+    with _BUCKETS_LOCK:
+        bucket = _BUCKETS.get(host)
+        if bucket is None:
+            bucket = _BUCKETS[host] = TokenBucket(rate, burst)
+        return bucket
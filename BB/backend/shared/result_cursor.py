@@ -0,0 +1,91 @@
+"""
+Curseurs opaques sur des classements mis en cache.
+
+Une recherche sémantique calcule un classement complet (ids + scores) une
+seule fois ; la liste est conservée en mémoire quelques minutes sous un
+jeton aléatoire. Le client reçoit un curseur (jeton + position) et les pages
+suivantes ne sont plus qu'une lecture d'ids, sans recalcul des similarités.
+
+Le curseur est lié à la signature de la requête (texte, filtres...) : un
+curseur réutilisé avec d'autres paramètres est ignoré et la recherche est
+recalculée.
+"""
+
+from __future__ import annotations
+
+import base64
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+RESULT_CURSOR_TTL = float(os.getenv('RESULT_CURSOR_TTL', '600'))
+RESULT_CURSOR_MAX_ENTRIES = int(os.getenv('RESULT_CURSOR_MAX_ENTRIES', '256'))
+
+
+def encode_cursor(token: str, offset: int) -> str:
+    raw = f"{token}:{int(offset)}".encode('ascii')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str | None) -> tuple[str | None, int]:
+    """(jeton, position) ; (None, 0) si le curseur est absent ou illisible."""
+    if not cursor:
+        return None, 0
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        token, offset = base64.urlsafe_b64decode(padded.encode('ascii')).decode('ascii').rsplit(':', 1)
+        return token, max(0, int(offset))
+    except (ValueError, UnicodeError):
+        return None, 0
+
+
+class RankedResultCache:
+    """Classements [(id, score)] indexés par jeton, avec TTL et éviction LRU."""
+
+    def __init__(self, ttl: float = RESULT_CURSOR_TTL, max_entries: int = RESULT_CURSOR_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def store(self, ranked: list[tuple[int, float]], signature: dict | None = None,
+              total: int | None = None) -> str:
+        """`total` : nombre de résultats quand `ranked` n'en garde que la tête (défaut : len(ranked))."""
+        token = secrets.token_urlsafe(12)
+        ranked = list(ranked)
+        with self._lock:
+            self._entries[token] = (time.monotonic(), signature or {}, ranked, len(ranked) if total is None else total)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return token
+
+    def load(self, token: str | None, signature: dict | None = None, with_total: bool = False):
+        """
+        Classement associé au jeton, ou None s'il a expiré / ne correspond pas à la requête.
+
+        Avec `with_total`, retourne (classement, total).
+        """
+        if not token:
+            return None
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            created_at, stored_signature, ranked, total = entry
+            if time.monotonic() - created_at >= self.ttl:
+                del self._entries[token]
+                return None
+            if stored_signature != (signature or {}):
+                return None
+            self._entries.move_to_end(token)
+            return (ranked, total) if with_total else ranked
+
+
+_CACHE = RankedResultCache()
+
+
+def get_ranked_result_cache() -> RankedResultCache:
+    """Cache partagé du processus."""
+    return _CACHE
@@ -0,0 +1,143 @@
+"""
+Compteurs globaux des tableaux de bord (`/api/joradp/stats`, `/api/coursupreme/stats`).
+
+Chaque appel exécutait un `COUNT(*)` par statut, soit cinq ou six parcours
+complets de `documents` / `supreme_court_decisions`, et le tableau de bord
+interroge les deux routes en boucle. La table `stats_counters` garde une
+ligne (périmètre, compteur) par valeur affichée :
+
+- le remplissage initial et la reconstruction calculent tous les compteurs
+  d'un périmètre en un seul passage (`SUM(CASE ...)`) ;
+- des triggers sur la table source les ajustent de +1/-1 à chaque insertion,
+  suppression ou changement de statut ; les routes batch, les moissonneurs
+  et les scripts n'ont donc rien à faire de plus.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+
+COUNTERS_TABLE = 'stats_counters'
+
+
+def _filled(row: str, column: str) -> str:
+    return f"({row}.{column} IS NOT NULL AND {row}.{column} != '')"
+
+
+# Périmètre -> (table source, {compteur: condition SQL sur la ligne `{row}`}, colonnes surveillées)
+COUNTER_DEFINITIONS = {
+    'joradp': (
+        'documents',
+        {
+            'total': '1',
+            'collected': "{row}.metadata_collection_status = 'success'",
+            'downloaded': "{row}.download_status = 'success'",
+            'extracted': "{row}.text_extraction_status = 'success'",
+            'analyzed': "{row}.ai_analysis_status = 'success'",
+            'embedded': "{row}.embedding_status = 'success'",
+        },
+        ('metadata_collection_status', 'download_status', 'text_extraction_status',
+         'ai_analysis_status', 'embedding_status'),
+    ),
+    'coursupreme': (
+        'supreme_court_decisions',
+        {
+            'total': '1',
+            'downloaded': "{row}.download_status IN ('downloaded', 'completed')",
+            'translated': f"({_filled('{row}', 'html_content_fr')} OR {_filled('{row}', 'file_path_fr')})",
+            'analyzed': _filled('{row}', 'summary_fr'),
+            'embedded': "({row}.embedding_fr IS NOT NULL OR {row}.embedding_ar IS NOT NULL)",
+        },
+        ('download_status', 'html_content_fr', 'file_path_fr', 'summary_fr', 'embedding_fr', 'embedding_ar'),
+    ),
+}
+
+
+def _flag(condition: str, row: str) -> str:
+    return f"CASE WHEN {condition.format(row=row)} THEN 1 ELSE 0 END"
+
+
+def _delta(counters: dict[str, str], sign: str, row: str) -> str:
+    cases = ' '.join(f"WHEN '{name}' THEN {_flag(condition, row)}" for name, condition in counters.items())
+    return f"{sign} CASE counter {cases} ELSE 0 END"
+
+
+def _trigger_statements(scope: str) -> list[str]:
+    table, counters, columns = COUNTER_DEFINITIONS[scope]
+    prefix = f"{COUNTERS_TABLE}_{scope}"
+
+    def update(*deltas: str) -> str:
+        return (
+            f"UPDATE {COUNTERS_TABLE} SET value = value {' '.join(deltas)} "
+            f"WHERE scope = '{scope}';"
+        )
+
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_ai AFTER INSERT ON {table} BEGIN
+            {update(_delta(counters, '+', 'new'))}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_au AFTER UPDATE OF {', '.join(columns)} ON {table} BEGIN
+            {update(_delta(counters, '+', 'new'), _delta(counters, '-', 'old'))}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {prefix}_ad AFTER DELETE ON {table} BEGIN
+            {update(_delta(counters, '-', 'old'))}
+        END
+        """,
+    ]
+
+
+def _populate(conn: sqlite3.Connection, scope: str) -> None:
+    """Tous les compteurs du périmètre en un seul parcours de la table source."""
+    table, counters, _ = COUNTER_DEFINITIONS[scope]
+    sums = ', '.join(f"COALESCE(SUM({_flag(condition, table)}), 0)" for condition in counters.values())
+    values = conn.execute(f"SELECT {sums} FROM {table}").fetchone()
+    conn.executemany(
+        f"INSERT OR REPLACE INTO {COUNTERS_TABLE}(scope, counter, value) VALUES (?, ?, ?)",
+        [(scope, name, value) for name, value in zip(counters, values)]
+    )
+
+
+def ensure_stats_counters(conn: sqlite3.Connection, scope: str) -> None:
+    """Crée la table, les triggers du périmètre et ses compteurs (remplissage initial inclus)."""
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {COUNTERS_TABLE} (
+            scope TEXT NOT NULL,
+            counter TEXT NOT NULL,
+            value INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (scope, counter)
+        ) WITHOUT ROWID
+    """)
+    exists = conn.execute(
+        f"SELECT 1 FROM {COUNTERS_TABLE} WHERE scope = ? LIMIT 1", (scope,)
+    ).fetchone()
+    if exists:
+        return
+    # Triggers et remplissage dans la même transaction : aucun écrivain ne s'intercale
+    if not conn.in_transaction:
+        conn.execute("BEGIN IMMEDIATE")
+    for statement in _trigger_statements(scope):
+        conn.execute(statement)
+    _populate(conn, scope)
+    conn.commit()
+
+
+def rebuild_stats_counters(conn: sqlite3.Connection, scope: str) -> dict[str, int]:
+    """Recalcule les compteurs du périmètre à partir de la table source."""
+    ensure_stats_counters(conn, scope)
+    _populate(conn, scope)
+    conn.commit()
+    return read_stats_counters(conn, scope)
+
+
+def read_stats_counters(conn: sqlite3.Connection, scope: str) -> dict[str, int]:
+    """Compteurs du périmètre, dans l'ordre de `COUNTER_DEFINITIONS`."""
+    ensure_stats_counters(conn, scope)
+    rows = dict(conn.execute(
+        f"SELECT counter, value FROM {COUNTERS_TABLE} WHERE scope = ?", (scope,)
+    ).fetchall())
+    return {name: rows.get(name, 0) for name in COUNTER_DEFINITIONS[scope][1]}
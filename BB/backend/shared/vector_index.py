@@ -0,0 +1,423 @@
+"""
+Index vectoriel résident pour les décisions de la Cour Suprême.
+
+Les embeddings AR/FR de `supreme_court_decisions` sont chargés une seule
+fois par processus dans des matrices float32 pré-normalisées. Une requête
+se résume alors à un produit matrice-vecteur suivi d'un `argpartition`,
+au lieu d'un scan complet de la table et d'une boucle Python par ligne.
+Les routes d'écriture (`batch_embed`, suppression) tiennent l'index à jour
+via `upsert` / `remove`.
+
+Avec `DECISION_INDEX_QUANTIZATION=int8`, seule une copie int8 (un facteur
+d'échelle par vecteur) reste en mémoire, soit 4x moins que float32 : le
+premier passage se fait sur les codes int8, puis les `DECISION_INDEX_RERANK`
+meilleurs candidats sont re-classés exactement à partir des vecteurs float32,
+projetés en mémoire (mmap) depuis un fichier temporaire plutôt que relus en
+base. numpy n'ayant pas de produit int8 natif, le parcours int8 décode des
+blocs en float32 : il est plus lent que le parcours float32, le gain est la
+mémoire seule. `scripts/benchmark_quantized_index.py` mesure mémoire, latence du
+parcours, latence totale et rappel.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+
+import numpy as np
+
+LANGUAGES = ('ar', 'fr')
+QUANTIZATION = os.getenv('DECISION_INDEX_QUANTIZATION', 'none').lower()
+RERANK_CANDIDATES = int(os.getenv('DECISION_INDEX_RERANK', '300'))
+# Blocs de lignes décodés à la volée : la matrice int8 n'est jamais convertie d'un coup
+SCAN_BLOCK_ROWS = 16384
+
+
+def decode_vector(blob) -> np.ndarray | None:
+    """Convertit un BLOB float32 en vecteur numpy (None si vide)."""
+    if not blob:
+        return None
+    if isinstance(blob, memoryview):
+        blob = blob.tobytes()
+    vector = np.frombuffer(blob, dtype=np.float32)
+    return vector if vector.size else None
+
+
+def normalize_vector(vector) -> np.ndarray | None:
+    """Retourne une copie float32 de norme 1, ou None si la norme est nulle."""
+    if vector is None:
+        return None
+    vector = np.asarray(vector, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(vector))
+    if norm == 0.0 or not np.isfinite(norm):
+        return None
+    return vector / norm
+
+
+def top_k(scores: np.ndarray, k: int | None) -> np.ndarray:
+    """Indices des k meilleurs scores, triés par score décroissant."""
+    total = scores.shape[0]
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    if k is None or k >= total:
+        return np.argsort(-scores, kind='stable')
+    k = max(1, k)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Quantification symétrique par vecteur : (codes int8, échelles float32)."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    peaks = np.abs(vectors).max(axis=1)
+    scales = np.where(peaks > 0, peaks / 127.0, 1.0).astype(np.float32)
+    codes = np.clip(np.rint(vectors / scales[:, np.newaxis]), -127, 127).astype(np.int8)
+    return codes, scales
+
+
+class _RerankStore:
+    """
+    Vecteurs float32 normalisés du re-classement int8, hors du tas Python.
+
+    Ils sont écrits dans un fichier temporaire anonyme (à côté de la base, pas
+    en tmpfs) puis projetés en lecture seule : le noyau ne garde en mémoire que
+    les pages lues. Les vecteurs modifiés depuis le dernier chargement restent
+    dans `overlay`.
+    """
+
+    def __init__(self, directory: str | None = None):
+        self.directory = directory
+        self._file = None
+        self.rows = None
+        self.positions: dict[int, int] = {}
+        self.overlay: dict[int, np.ndarray] = {}
+
+    def load(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        handle = tempfile.TemporaryFile(dir=self.directory)
+        handle.write(vectors.tobytes())
+        handle.flush()
+        rows = np.memmap(handle, dtype=np.float32, mode='r', shape=vectors.shape) if vectors.size else None
+        if self._file is not None:
+            self._file.close()
+        self._file, self.rows = handle, rows
+        self.positions = {int(decision_id): row for row, decision_id in enumerate(ids)}
+        self.overlay = {}
+
+    def set(self, decision_id: int, vector: np.ndarray) -> None:
+        self.overlay[decision_id] = np.asarray(vector, dtype=np.float32)
+
+    def drop(self, decision_id: int) -> None:
+        self.overlay.pop(decision_id, None)
+        self.positions.pop(decision_id, None)
+
+    def get(self, decision_ids: np.ndarray) -> tuple[np.ndarray, np.ndarray | None]:
+        """(ids trouvés, vecteurs) des décisions demandées."""
+        found, vectors = [], []
+        for decision_id in map(int, decision_ids):
+            vector = self.overlay.get(decision_id)
+            if vector is None:
+                row = self.positions.get(decision_id)
+                if row is None:
+                    continue
+                vector = self.rows[row]
+            found.append(decision_id)
+            vectors.append(vector)
+        if not found:
+            return np.empty(0, dtype=np.int64), None
+        return np.asarray(found, dtype=np.int64), np.vstack(vectors)
+
+
+class _LanguageMatrix:
+    """Matrice d'embeddings d'une langue, adressée par id de décision (float32 ou int8)."""
+
+    def __init__(self, quantized: bool = False, rerank_dir: str | None = None):
+        self.quantized = quantized
+        self.rerank_dir = rerank_dir
+        self.ids = np.empty(0, dtype=np.int64)
+        self.matrix = None
+        self.scales = None
+        self.positions: dict[int, int] = {}
+        # Vecteurs exacts du re-classement (mode int8 uniquement)
+        self.exact = _RerankStore(rerank_dir) if quantized else None
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def dimension(self) -> int | None:
+        return None if self.matrix is None else self.matrix.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        if self.matrix is None:
+            return 0
+        return self.matrix.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def _encode(self, vectors: np.ndarray):
+        if self.quantized:
+            return quantize_int8(vectors)
+        return np.atleast_2d(vectors).astype(np.float32, copy=False), None
+
+    def load(self, pairs: list[tuple[int, np.ndarray]]) -> None:
+        if not pairs:
+            self.__init__(self.quantized, self.rerank_dir)
+            return
+        dimension = pairs[0][1].shape[0]
+        pairs = [(decision_id, vec) for decision_id, vec in pairs if vec.shape[0] == dimension]
+        self.ids = np.fromiter((decision_id for decision_id, _ in pairs), dtype=np.int64, count=len(pairs))
+        vectors = np.vstack([vec for _, vec in pairs])
+        self.matrix, self.scales = self._encode(vectors)
+        self.positions = {int(decision_id): row for row, decision_id in enumerate(self.ids)}
+        if self.exact is not None:
+            self.exact.load(self.ids, vectors)
+
+    def upsert(self, decision_id: int, vector: np.ndarray) -> None:
+        if self.matrix is None:
+            self.load([(decision_id, vector)])
+            return
+        if vector.shape[0] != self.matrix.shape[1]:
+            raise ValueError(
+                f"dimension {vector.shape[0]} incompatible avec l'index ({self.matrix.shape[1]})"
+            )
+        encoded, scale = self._encode(vector)
+        if self.exact is not None:
+            self.exact.set(decision_id, vector)
+        row = self.positions.get(decision_id)
+        if row is not None:
+            self.matrix[row] = encoded[0]
+            if scale is not None:
+                self.scales[row] = scale[0]
+            return
+        self.matrix = np.vstack([self.matrix, encoded])
+        if scale is not None:
+            self.scales = np.append(self.scales, scale)
+        self.ids = np.append(self.ids, np.int64(decision_id))
+        self.positions[decision_id] = len(self.ids) - 1
+
+    def remove(self, decision_id: int) -> None:
+        row = self.positions.pop(decision_id, None)
+        if self.exact is not None:
+            self.exact.drop(decision_id)
+        if row is None:
+            return
+        last = len(self.ids) - 1
+        if row != last:
+            # On déplace la dernière ligne dans le trou pour garder une matrice dense.
+            self.matrix[row] = self.matrix[last]
+            if self.scales is not None:
+                self.scales[row] = self.scales[last]
+            moved_id = int(self.ids[last])
+            self.ids[row] = moved_id
+            self.positions[moved_id] = row
+        self.matrix = self.matrix[:last]
+        self.ids = self.ids[:last]
+        if self.scales is not None:
+            self.scales = self.scales[:last]
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Similarités (exactes en float32, approchées en int8)."""
+        if self.matrix is None or not len(self.ids):
+            return np.empty(0, dtype=np.float32)
+        if not self.quantized:
+            return self.matrix @ query
+        result = np.empty(len(self.ids), dtype=np.float32)
+        for start in range(0, len(self.ids), SCAN_BLOCK_ROWS):
+            block = self.matrix[start:start + SCAN_BLOCK_ROWS]
+            result[start:start + len(block)] = block.astype(np.float32) @ query
+        return result * self.scales
+
+
+class DecisionEmbeddingIndex:
+    """Index en mémoire des embeddings AR/FR des décisions."""
+
+    def __init__(self, db_path: str, quantization: str = QUANTIZATION, rerank: int = RERANK_CANDIDATES):
+        self.db_path = db_path
+        self.quantized = quantization == 'int8'
+        self.rerank = max(1, rerank)
+        self._lock = threading.RLock()
+        self._loaded = False
+        rerank_dir = str(Path(db_path).resolve().parent) if self.quantized else None
+        self._matrices = {lang: _LanguageMatrix(self.quantized, rerank_dir) for lang in LANGUAGES}
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.reload()
+
+    def reload(self) -> int:
+        """(Re)charge toutes les décisions ayant au moins un embedding."""
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute("""
+                SELECT id, embedding_ar, embedding_fr
+                FROM supreme_court_decisions
+                WHERE (embedding_fr IS NOT NULL AND embedding_fr != '')
+                   OR (embedding_ar IS NOT NULL AND embedding_ar != '')
+            """).fetchall()
+        finally:
+            conn.close()
+
+        pairs = {lang: [] for lang in LANGUAGES}
+        for decision_id, blob_ar, blob_fr in rows:
+            for lang, blob in (('ar', blob_ar), ('fr', blob_fr)):
+                vector = normalize_vector(decode_vector(blob))
+                if vector is not None:
+                    pairs[lang].append((int(decision_id), vector))
+
+        with self._lock:
+            for lang in LANGUAGES:
+                self._matrices[lang].load(pairs[lang])
+            self._loaded = True
+            return len(rows)
+
+    def upsert(self, decision_id: int, embedding_ar=None, embedding_fr=None) -> None:
+        """Ajoute ou remplace les vecteurs d'une décision (bytes ou ndarray)."""
+        with self._lock:
+            self._ensure_loaded()
+            for lang, value in (('ar', embedding_ar), ('fr', embedding_fr)):
+                if value is None:
+                    continue
+                if isinstance(value, (bytes, memoryview)):
+                    value = decode_vector(value)
+                vector = normalize_vector(value)
+                if vector is None:
+                    self._matrices[lang].remove(int(decision_id))
+                else:
+                    self._matrices[lang].upsert(int(decision_id), vector)
+
+    def remove(self, decision_id: int) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            for matrix in self._matrices.values():
+                matrix.remove(int(decision_id))
+
+    def size(self, lang: str = 'fr') -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._matrices[lang])
+
+    def memory_bytes(self) -> int:
+        with self._lock:
+            return sum(matrix.nbytes + matrix.ids.nbytes for matrix in self._matrices.values())
+
+    @staticmethod
+    def _fuse(parts, fusion: str, weights: dict[str, float] | None):
+        """
+        Fusionne des scores par décision.
+
+        `parts` : [(langue, ids, scores)]. Retourne (ids uniques, scores fusionnés).
+        """
+        if len(parts) == 1:
+            return parts[0][1], parts[0][2]
+        ids = np.concatenate([part_ids for _, part_ids, _ in parts])
+        scores = np.concatenate([part_scores for _, _, part_scores in parts]).astype(np.float32, copy=False)
+        decision_ids, owner = np.unique(ids, return_inverse=True)
+        if fusion == 'weighted':
+            weights = weights or {}
+            row_weights = np.concatenate([
+                np.full(len(part_ids), float(weights.get(name, 1.0)), dtype=np.float32)
+                for name, part_ids, _ in parts
+            ])
+            numerator = np.zeros(len(decision_ids), dtype=np.float32)
+            denominator = np.zeros(len(decision_ids), dtype=np.float32)
+            np.add.at(numerator, owner, scores * row_weights)
+            np.add.at(denominator, owner, row_weights)
+            return decision_ids, numerator / np.where(denominator > 0, denominator, 1.0)
+        fused = np.full(len(decision_ids), -np.inf, dtype=np.float32)
+        np.maximum.at(fused, owner, scores)
+        return decision_ids, fused
+
+    def _exact_parts(self, decision_ids: np.ndarray, langs, query: np.ndarray):
+        """Scores float32 exacts des candidats, à partir des vecteurs projetés en mémoire."""
+        parts = []
+        with self._lock:
+            for lang in langs:
+                ids, vectors = self._matrices[lang].exact.get(decision_ids)
+                if vectors is not None and vectors.shape[1] == query.shape[0]:
+                    parts.append((lang, ids, (vectors @ query).astype(np.float32, copy=False)))
+        return parts
+
+    def search(
+        self,
+        query_vec,
+        lang: str = 'fr',
+        limit: int | None = None,
+        fusion: str = 'max',
+        weights: dict[str, float] | None = None,
+        allowed=None,
+    ):
+        """
+        Score les décisions en un seul passage vectorisé.
+
+        `lang` vaut 'ar', 'fr' ou 'both'. En 'both', les scores AR et FR sont
+        fusionnés par décision : maximum (`fusion='max'`) ou moyenne pondérée
+        par `weights` (`fusion='weighted'`, poids renormalisés sur les langues
+        disponibles pour la décision). Une décision sans traduction est donc
+        classée avec la seule langue dont elle dispose.
+
+        `allowed` (itérable d'ids, ex. bitmap de filtres) écarte les autres
+        décisions avant la sélection du top-k.
+
+        Retourne (ids, scores) triés par similarité cosinus décroissante,
+        tronqués à `limit` si fourni. En mode int8, les `max(rerank, limit)`
+        meilleurs candidats sont re-scorés exactement ; au-delà (`limit=None`),
+        les scores restent approchés mais l'ordre reste décroissant.
+        """
+        empty = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = normalize_vector(query_vec)
+        if query is None:
+            return empty
+        langs = LANGUAGES if lang == 'both' else (lang,)
+        with self._lock:
+            self._ensure_loaded()
+            parts = [
+                (name, self._matrices[name].ids.copy(), self._matrices[name].scores(query))
+                for name in langs
+                if self._matrices[name].dimension == query.shape[0]
+            ]
+        if not parts:
+            return empty
+
+        decision_ids, fused = self._fuse(parts, fusion, weights)
+        if allowed is not None:
+            mask = np.isin(decision_ids, np.fromiter(allowed, dtype=np.int64))
+            decision_ids, fused = decision_ids[mask], fused[mask]
+        if not self.quantized:
+            order = top_k(fused, limit)
+            return decision_ids[order], fused[order]
+
+        # Premier passage int8, puis re-classement exact des meilleurs candidats
+        head = top_k(fused, max(self.rerank, limit or 0))
+        exact_ids, exact_scores = self._fuse(
+            self._exact_parts(decision_ids[head], [name for name, _, _ in parts], query), fusion, weights
+        )
+        exact_order = np.argsort(-exact_scores, kind='stable')
+        ranked_ids, ranked_scores = exact_ids[exact_order], exact_scores[exact_order]
+        if limit is not None and limit <= len(ranked_ids):
+            return ranked_ids[:limit], ranked_scores[:limit]
+        # Suite approchée fusionnée à la tête exacte : les seuils de score restent valides
+        tail = top_k(fused, limit)
+        tail = tail[~np.isin(decision_ids[tail], ranked_ids)]
+        merged_ids = np.concatenate([ranked_ids, decision_ids[tail]])
+        merged_scores = np.concatenate([ranked_scores, fused[tail]])
+        order = np.argsort(-merged_scores, kind='stable')
+        return merged_ids[order], merged_scores[order]
+
+
+_INDEXES: dict[str, DecisionEmbeddingIndex] = {}
+_INDEXES_LOCK = threading.Lock()
+
+
+def get_decision_index(db_path: str) -> DecisionEmbeddingIndex:
+    """Retourne l'index partagé du processus pour une base donnée."""
+    key = str(Path(db_path).resolve())
+    with _INDEXES_LOCK:
+        index = _INDEXES.get(key)
+        if index is None:
+            index = DecisionEmbeddingIndex(key)
+            _INDEXES[key] = index
+        return index
@@ -1,6 +1,21 @@
 from flask import request, jsonify
+import os
 import sqlite3
-import math
+
+from shared.keyset_pagination import (
+    decode_keyset_cursor,
+    ensure_session_order_index,
+    get_count_cache,
+    next_keyset_cursor,
+    seek_document_keys,
+)
+from shared.result_cursor import decode_cursor, encode_cursor, get_ranked_result_cache
+
+DB_PATH = 'harvester.db'
+# Voisins demandés à l'index ANN (parmi les documents filtrés) : hnswlib impose
+# ef >= k, un k trop grand rendrait `semantic_ef` inopérant. Les pages au-delà
+# de cette profondeur relancent la recherche plus profondément.
+SEMANTIC_RANK_DEPTH = int(os.getenv('SESSION_SEMANTIC_DEPTH', '200'))
 
 
 def _safe_split_csv(value: str):
@@ -9,62 +24,41 @@ def _safe_split_csv(value: str):
     return [chunk.strip() for chunk in value.split(',') if chunk.strip()]
 
 
-def _semantic_rank(session_id: int, query: str, limit: int = 500):
-    """Retourne une liste ordonnée (doc_id, score) pour une requête sémantique.
+def _semantic_rank(session_id: int, query: str, limit: int = 500, ef: int | None = None, allowed=None):
+    """Retourne (liste ordonnée (doc_id, score), total, erreur) pour une requête sémantique.
 
+    La recherche passe par l'index ANN de la session (`shared.ann_index`),
+    restreinte aux ids `allowed` (filtres de la liste) ; `total` est le
+    nombre de documents autorisés présents dans l'index.
+    `ef` permet d'échanger de la latence contre du rappel.
     La fonction reste tolérante : si le modèle ou numpy manquent, on renvoie
-    ([], "message d'erreur") afin que l'appelant puisse afficher un fallback.
+    ([], 0, "message d'erreur") afin que l'appelant puisse afficher un fallback.
     """
     try:
-        from analysis import get_embedding_model
-        import numpy as np
+        from analysis import EMBEDDING_MODEL_NAME, get_embedding_model
+        from shared.ann_index import get_session_ann_index
+        from shared.query_embeddings import encode_query
     except Exception as exc:  # numpy ou import indisponible
-        return [], f"embedding non disponible ({exc})"
+        return [], 0, f"embedding non disponible ({exc})"
 
     model = get_embedding_model()
     if not model:
-        return [], "Aucun modèle d'embedding disponible"
+        return [], 0, "Aucun modèle d'embedding disponible"
 
     try:
-        query_vec = model.encode(query, convert_to_numpy=True, normalize_embeddings=True)
+        query_vec = encode_query(model, EMBEDDING_MODEL_NAME, query, normalize_embeddings=True)
     except Exception as exc:
-        return [], f"Impossible de générer l'embedding requête : {exc}"
+        return [], 0, f"Impossible de générer l'embedding requête : {exc}"
+
+    try:
+        index = get_session_ann_index(DB_PATH, session_id)
+        return index.search(query_vec, limit, ef=ef, allowed=allowed), index.count(allowed), None
+    except Exception as exc:
+        return [], 0, f"Index ANN indisponible : {exc}"
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        """
-        SELECT d.id, e.embedding, e.dimension
-        FROM document_embeddings e
-        JOIN documents d ON d.id = e.document_id
-        WHERE d.session_id = ? AND e.embedding IS NOT NULL
-        """,
-        (session_id,),
-    )
-
-    scores = []
-    for row in cursor.fetchall():
-        try:
-            emb = np.frombuffer(row["embedding"], dtype=np.float32)
-            if row["dimension"] and emb.shape[0] >= row["dimension"]:
-                emb = emb[: row["dimension"]]
-            if emb.size == 0:
-                continue
-            norm = np.linalg.norm(emb)
-            if norm == 0 or math.isnan(norm):
-                continue
-            emb = emb / norm
-            score = float(np.dot(query_vec, emb))
-            scores.append((row["id"], score))
-        except Exception:
-            continue
-
-    conn.close()
-    scores.sort(key=lambda tup: tup[1], reverse=True)
-    return scores[:limit], None
 
 def get_db_connection():
-    conn = sqlite3.connect('harvester.db')
+    conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row
     return conn
 
@@ -87,6 +81,14 @@ def normalize_status(status):
 
 
 def register_sites_routes(app):
+    # Migration une fois à l'enregistrement : les listes restent en lecture seule
+    conn = get_db_connection()
+    try:
+        ensure_session_order_index(conn)
+    except sqlite3.Error as exc:
+        print(f"⚠️  Index de pagination des sessions indisponible: {exc}")
+    finally:
+        conn.close()
     
     @app.route('/api/sites', methods=['GET'])
     def get_sites():
@@ -342,6 +344,7 @@ def register_sites_routes(app):
             keywords_un_de = request.args.get('keywords_un_de') or request.args.get('keywordsUnDe')
             keywords_exclut = request.args.get('keywords_exclut') or request.args.get('keywordsExclut')
             search_semantique = request.args.get('search_semantique') or request.args.get('searchSemantique')
+            semantic_ef = request.args.get('semantic_ef', type=int)
 
             conn = get_db_connection()
             cursor = conn.cursor()
@@ -352,9 +355,9 @@ def register_sites_routes(app):
             join_sql = ""
 
             if year:
-                # Chercher l'année dans l'URL (ex: F1973xxx.pdf)
-                where_clauses.append("d.url LIKE ?")
-                params.append(f'%F{year}%')
+                # Année du numéro (colonne indexée jo_year, ex: F1973xxx.pdf -> 1973)
+                where_clauses.append("d.jo_year = ?")
+                params.append(int(year) if year.isdigit() else None)
 
             if date_debut:
                 where_clauses.append('d.publication_date >= ?')
@@ -373,8 +376,12 @@ def register_sites_routes(app):
                     where_clauses.append("d.ai_analysis_status = 'success'")
 
             if search_num:
-                where_clauses.append('d.url LIKE ?')
-                params.append(f'%{search_num}%')
+                if search_num.strip().isdigit():
+                    where_clauses.append('d.jo_number = ?')
+                    params.append(int(search_num))
+                else:
+                    where_clauses.append('d.url LIKE ?')
+                    params.append(f'%{search_num}%')
 
             # Filtres textuels basés sur les analyses IA (keywords + summary)
             keyword_fields = [
@@ -422,37 +429,78 @@ def register_sites_routes(app):
                         d.ai_analysis_status,
                         d.embedding_status,
                         d.file_path,
-                        d.text_path
+                        d.text_path,
+                        d.jo_year,
+                        d.jo_number
                     FROM documents d
                     {join_sql}
                     WHERE {where_sql}
             """
 
-            # Si recherche sémantique : on récupère tout et on trie côté Python (pour conserver l'ordre de similarité)
+            # Si recherche sémantique : classement mis en cache derrière un curseur, puis lecture de la seule page
             if search_semantique:
-                cursor.execute(base_select, params)
-                rows = cursor.fetchall()
-                total_pre_filter = len(rows)
+                result_cache = get_ranked_result_cache()
+                signature = {
+                    'session_id': session_id,
+                    'query': search_semantique,
+                    'ef': semantic_ef,
+                    'where': where_sql,
+                    'params': list(params),
+                }
+                token, offset = decode_cursor(request.args.get('cursor'))
+                if token is None:
+                    offset = (page - 1) * per_page
+                cached = result_cache.load(token, signature, with_total=True)
+                ranked, semantic_total = cached if cached is not None else (None, 0)
+                total_pre_filter = None
+                sem_error = None
+                # Classement absent, ou trop court pour la page demandée
+                if ranked is None or (offset + per_page > len(ranked) and len(ranked) < semantic_total):
+                    # Filtres appliqués sur les seuls ids, puis passés à l'index (top-k parmi eux)
+                    cursor.execute(f'SELECT d.id FROM documents d {join_sql} WHERE {where_sql}', params)
+                    allowed = {row[0] for row in cursor.fetchall()}
+                    total_pre_filter = len(allowed)
+                    depth = max(SEMANTIC_RANK_DEPTH, offset + per_page)
+                    ranked, semantic_total, sem_error = _semantic_rank(
+                        session_id, search_semantique, limit=depth, ef=semantic_ef, allowed=allowed
+                    )
+                    token = result_cache.store(ranked, signature, total=semantic_total)
+                page_ranked = ranked[offset: offset + per_page]
+                score_map = dict(page_ranked)
+                page_ids = [doc_id for doc_id, _ in page_ranked]
+                rows = []
+                if page_ids:
+                    cursor.execute(
+                        base_select + f" AND d.id IN ({','.join('?' * len(page_ids))})",
+                        params + page_ids
+                    )
+                    position = {doc_id: index for index, doc_id in enumerate(page_ids)}
+                    rows = sorted(cursor.fetchall(), key=lambda row: position[row['id']])
             else:
-                cursor.execute(f'SELECT COUNT(*) FROM documents d {join_sql} WHERE {where_sql}', params)
-                total = cursor.fetchone()[0]
-                offset = (page - 1) * per_page
-                cursor.execute(
-                    base_select + " ORDER BY d.publication_date DESC, d.url DESC LIMIT ? OFFSET ?",
-                    params + [per_page, offset]
+                # Total mis en cache quelques secondes ; page par seek après le curseur, sinon par numéro
+                total, total_cached = get_count_cache().count(
+                    cursor, f'SELECT COUNT(*) FROM documents d {join_sql} WHERE {where_sql}', params
+                )
+                keys = seek_document_keys(
+                    cursor, f'documents d {join_sql}', where_sql, params, per_page,
+                    after=decode_keyset_cursor(request.args.get('cursor')),
+                    offset=(page - 1) * per_page
                 )
-                rows = cursor.fetchall()
+                page_ids = [key[0] for key in keys]
+                rows = []
+                if page_ids:
+                    cursor.execute(
+                        base_select + f" AND d.id IN ({','.join('?' * len(page_ids))})",
+                        params + page_ids
+                    )
+                    position = {doc_id: index for index, doc_id in enumerate(page_ids)}
+                    rows = sorted(cursor.fetchall(), key=lambda row: position[row['id']])
 
             documents = []
             for row in rows:
-                # Extraire le numéro depuis l'URL
-                filename = row['url'].split('/')[-1]  # F2024001.pdf
-                num = filename[5:8] if len(filename) > 8 else '000'
-
-                # Extraire l'année de l'URL (ex: F1973001.pdf -> 1973)
-                import re
-                year_match = re.search(r'F(\d{4})\d{3}\.pdf', row['url'])
-                year_str = year_match.group(1) if year_match else None
+                # Numéro et année du JO (colonnes jo_number / jo_year)
+                num = f"{row['jo_number']:03d}" if row['jo_number'] is not None else '000'
+                year_str = str(row['jo_year']) if row['jo_year'] is not None else None
 
                 file_exists = bool(row['file_path'])
                 text_exists = bool(row['text_path'])
@@ -484,29 +532,26 @@ def register_sites_routes(app):
                 })
 
             if search_semantique:
-                scores, sem_error = _semantic_rank(session_id, search_semantique, limit=5000)
-                score_map = {doc_id: score for doc_id, score in scores}
-                documents = [doc for doc in documents if doc['id'] in score_map]
-                documents.sort(key=lambda d: score_map.get(d['id'], 0), reverse=True)
-                total = len(documents)
-                offset = (page - 1) * per_page
-                documents = documents[offset: offset + per_page]
                 for doc in documents:
                     doc['similarity'] = round(score_map.get(doc['id'], 0.0), 3)
+                next_offset = offset + per_page
                 pagination_meta = {
-                    'page': page,
+                    'page': offset // per_page + 1 if per_page else page,
                     'per_page': per_page,
-                    'total': total,
+                    'total': semantic_total,
                     'semantic_query': search_semantique,
                     'pre_filtered': total_pre_filter,
                     'semantic_error': sem_error,
+                    'next_cursor': encode_cursor(token, next_offset) if next_offset < semantic_total else None,
                 }
             else:
                 pagination_meta = {
                     'page': page,
                     'per_page': per_page,
                     'total': total,
-                    'total_pages': (total + per_page - 1) // per_page
+                    'total_pages': (total + per_page - 1) // per_page,
+                    'total_cached': total_cached,
+                    'next_cursor': next_keyset_cursor(keys, per_page),
                 }
 
             conn.close()
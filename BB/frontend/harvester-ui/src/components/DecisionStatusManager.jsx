@@ -7,6 +7,7 @@ const COURSUPREME_API_URL = 'http://localhost:5001/api/coursupreme';
 
 const SEMANTIC_SCORE_THRESHOLD = 0.45;
 const SEMANTIC_ITEM_LIMIT = 20;
+const SEMANTIC_MAX_LIMIT = 50;
 const DECISIONS_PAGE_SIZE = 20;
 
 const toIsoFromDecisionDate = (value) => {
@@ -559,14 +560,14 @@ const DecisionStatusManager = ({ exportEndpoint = 'http://localhost:5001/api/jor
       const semanticParams = new URLSearchParams({
         q: trimmed,
         language_scope: languageScope,
-        // Le backend renvoie all_results, on garde limit/threshold pour les stats initiales.
-        limit: semanticLimit.toString(),
-        score_threshold: semanticThreshold.toString()
+        // On récupère la première page maximale sans seuil : limite et seuil restent filtrés localement.
+        limit: SEMANTIC_MAX_LIMIT.toString(),
+        score_threshold: '0'
       });
       fetch(`${COURSUPREME_API_URL}/search/semantic?${semanticParams.toString()}`)
         .then((res) => res.json())
         .then((data) => {
-          const allResults = (data.all_results || data.results || []).map((item) => ({
+          const allResults = (data.results || []).map((item) => ({
             ...decisionsById.get(item.id),
             ...item
           }));
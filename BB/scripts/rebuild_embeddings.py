@@ -1,9 +1,17 @@
 import sqlite3
+import sys
 import time
+from pathlib import Path
+
 import requests
-import numpy as np
 from sentence_transformers import SentenceTransformer
 
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "backend"))
+
+from shared.embedding_store import save_document_embedding
+from shared.passages import embed_document_text, ensure_passages_table, save_document_passages
+
 DB_PATH = "harvester.db"
 MODEL_NAME = "all-MiniLM-L6-v2"
 
@@ -11,6 +19,7 @@ model = SentenceTransformer(MODEL_NAME)
 conn = sqlite3.connect(DB_PATH)
 conn.row_factory = sqlite3.Row
 cursor = conn.cursor()
+ensure_passages_table(conn)
 
 cursor.execute("""
 SELECT d.id, d.url, d.text_path
@@ -20,15 +29,6 @@ WHERE e.document_id IS NULL AND d.text_path IS NOT NULL
 """)
 rows = cursor.fetchall()
 
-upsert = """
-INSERT INTO document_embeddings (document_id, embedding, model_name, dimension)
-VALUES (?, ?, ?, ?)
-ON CONFLICT(document_id) DO UPDATE SET
-  embedding = excluded.embedding,
-  model_name = excluded.model_name,
-  dimension = excluded.dimension
-"""
-
 processed = 0
 for doc_id, url, text_path in rows:
     if not text_path:
@@ -42,8 +42,12 @@ for doc_id, url, text_path in rows:
         continue
     if not text:
         continue
-    embedding = model.encode(text[:10000], convert_to_numpy=True).astype(np.float32)
-    cursor.execute(upsert, (doc_id, embedding.tobytes(), MODEL_NAME, embedding.shape[0]))
+    # Même écriture que /batch/embeddings : passages encodés en un appel, vecteur = moyenne
+    passages, passage_vectors, embedding = embed_document_text(model, text)
+    if embedding is None:
+        continue
+    save_document_embedding(conn, doc_id, embedding, MODEL_NAME)
+    save_document_passages(conn, doc_id, passages, passage_vectors, MODEL_NAME)
     processed += 1
     if processed % 100 == 0:
         conn.commit()